@@ -0,0 +1,234 @@
+"""
+Micro-benchmark and golden-signal check for the strategy layer.
+
+Times every strategy's `check_setup` (plus TREND_FOLLOWING's `check_setup_unified`,
+`engine.check_option_ema_filter` and the engine's candle -> DataFrame step) at
+realistic history lengths, and walks each strategy forward bar by bar over a fixed
+session to check the emitted signal sequence against a stored golden file.
+
+    python -m benchmarks.bench_strategies                      # time + check golden
+    python -m benchmarks.bench_strategies --lengths 100 375    # subset of lengths
+    python -m benchmarks.bench_strategies --csv nifty_1m.csv   # recorded session (time,open,high,low,close,volume)
+    python -m benchmarks.bench_strategies --db "NSE:NIFTY" 1m  # recorded session from the ohlcv table
+    python -m benchmarks.bench_strategies --update-golden      # after an intended behaviour change
+
+The golden file is only meaningful for the synthetic session; pandas/pandas_ta versions
+are stored with it because indicator output (and column names) differ between releases.
+Exits 1 when a signal sequence differs.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pandas_ta as ta
+
+import config
+import engine
+from core.strategies.master_strategies import STRATEGIES
+from core.strategies.trend_following import TrendFollowingStrategy
+
+GOLDEN = os.path.join(os.path.dirname(__file__), "golden", "strategy_signals.json")
+BARS_PER_DAY = 375 # 09:15 - 15:30 IST
+BUILDUPS = ["Long Build", "Short Cover", "Neutral", "Short Build", "Long Unwind", ""]
+
+def synthetic_session(days=2, spot=24000.0, seed=11, option=False):
+    """Minute bars on an IST DatetimeIndex: random walk with volatility bursts and volume spikes."""
+    rnd = random.Random(seed + (1000 if option else 0))
+    price = 150.0 if option else spot
+    rows, index = [], []
+    day = datetime(2026, 1, 5)
+    for d in range(days):
+        # Overnight gap, sometimes large enough for the gap strategies
+        price *= 1 + rnd.choice([-0.004, -0.001, 0.0, 0.002])
+        t = day + timedelta(days=d, hours=9, minutes=15)
+        for i in range(BARS_PER_DAY):
+            burst = 3.0 if (i // 25) % 4 == 3 else 1.0
+            sigma = (4.0 if option else 0.0006 * price) * burst
+            o = price
+            c = max(1.0, o + rnd.gauss(0, sigma))
+            h = max(o, c) + abs(rnd.gauss(0, sigma * 0.6))
+            l = max(0.5, min(o, c) - abs(rnd.gauss(0, sigma * 0.6)))
+            vol = int(rnd.lognormvariate(8.5, 0.5) * (4 if rnd.random() < 0.05 else 1) * burst)
+            rows.append((round(o, 2), round(h, 2), round(l, 2), round(c, 2), vol))
+            index.append(t + timedelta(minutes=i))
+            price = c
+    return pd.DataFrame(rows, columns=["open", "high", "low", "close", "volume"], index=pd.DatetimeIndex(index))
+
+def recorded_session(csv=None, db=None):
+    if csv:
+        df = pd.read_csv(csv)
+        df.index = pd.DatetimeIndex(pd.to_datetime(df.pop("time")))
+    else:
+        from data.database import DatabaseManager
+        symbol, interval = db
+        df = DatabaseManager(db_path=config.DB_PATH).get_ohlcv(symbol.replace("NSE:", ""), config.OHLCV_1M if interval == "1m" else interval)
+        if not df.empty:
+            df.index = df.index.tz_convert("Asia/Kolkata").tz_localize(None)
+            df = df.drop(columns=["timestamp"])
+    if df.index.tz is not None: df.index = df.index.tz_localize(None)
+    return df[["open", "high", "low", "close", "volume"]].astype(float)
+
+def pcr_at(i):
+    # Deterministic sentiment that rotates through every buildup so the gated strategies get a chance
+    return {"pcr": round(1.0 + 0.3 * math.sin(i / 17), 2), "pcr_change": round(1.0 + 0.1 * math.cos(i / 11), 3),
+            "buildup_status": BUILDUPS[(i // 7) % len(BUILDUPS)]}
+
+def to_rows(df):
+    """The hub's candle dict shape (UTC ISO `time`), for timing engine.candles_frame."""
+    times = (df.index.tz_localize("Asia/Kolkata").tz_convert("UTC")).strftime("%Y-%m-%dT%H:%M:%S+00:00")
+    return [{"time": t, "open": o, "high": h, "low": l, "close": c, "volume": v}
+            for t, o, h, l, c, v in zip(times, df["open"], df["high"], df["low"], df["close"], df["volume"])]
+
+def _clean(setup):
+    out = []
+    for k in ("type", "entry_price", "sl", "target"):
+        v = setup.get(k)
+        out.append(round(float(v), 4) if isinstance(v, (int, float)) and not isinstance(v, bool) else v)
+    return out
+
+def cases():
+    """(name, make_fn) where make_fn() returns a fresh fn(window_idx, window_opt, i) -> setup or bool."""
+    out = []
+    for cls in STRATEGIES:
+        def make(cls=cls):
+            strat = cls()
+            return lambda idx, opt, i: strat.check_setup(idx, pcr_at(i))
+        out.append((cls().name, make))
+    def make_tf():
+        tf = TrendFollowingStrategy("NSE:NIFTY")
+        return lambda idx, opt, i: tf.check_setup_unified(idx, opt, pcr_at(i), "CE" if i % 2 else "PE")
+    out.append(("TREND_FOLLOWING", make_tf))
+    out.append(("OPTION_EMA_FILTER", lambda: (lambda idx, opt, i: engine.check_option_ema_filter(opt))))
+    return out
+
+def walk(fn, idx_df, opt_df, history):
+    """Yields (bar, result) for every bar once `history` bars exist; windows end at that bar."""
+    for i in range(history - 1, len(idx_df)):
+        lo = i + 1 - history
+        try: res = fn(idx_df.iloc[lo:i + 1], opt_df.iloc[lo:i + 1], i)
+        except Exception as e: res = {"type": "ERROR", "entry_price": type(e).__name__}
+        yield i, res
+
+def signal_sequences(idx_df, opt_df, history):
+    signals = {}
+    for name, make in cases():
+        seq = []
+        for i, res in walk(make(), idx_df, opt_df, history):
+            if isinstance(res, dict): seq.append([i] + _clean(res))
+            elif res is not None and bool(res): seq.append([i]) # filters return numpy bools
+        signals[name] = seq
+    return signals
+
+def check_golden(signals, meta, update):
+    versions = {"pandas": pd.__version__, "pandas_ta": getattr(ta, "version", "?")}
+    if update or not os.path.exists(GOLDEN):
+        os.makedirs(os.path.dirname(GOLDEN), exist_ok=True)
+        with open(GOLDEN, "w") as f:
+            # One signal per line keeps diffs of the golden file readable
+            f.write(f'{{"meta": {json.dumps(meta)}, "versions": {json.dumps(versions)}, "signals": {{\n')
+            f.write(",\n".join(f'{json.dumps(name)}: [' + ",".join("\n  " + json.dumps(x) for x in seq) + "]"
+                               for name, seq in signals.items()))
+            f.write("\n}}\n")
+        print(f"golden written: {GOLDEN}")
+        return True
+    with open(GOLDEN) as f: golden = json.load(f)
+    if golden.get("meta") != meta:
+        print(f"golden was recorded with {golden.get('meta')}, not {meta}; skipping check")
+        return True
+    if golden.get("versions") != versions:
+        print(f"note: golden recorded with {golden.get('versions')}, running {versions}")
+    ok = True
+    for name in sorted(set(golden["signals"]) | set(signals)):
+        want, got = golden["signals"].get(name), signals.get(name)
+        if want == got: continue
+        ok = False
+        if want is None or got is None:
+            print(f"MISMATCH {name}: {'new strategy' if want is None else 'strategy missing'}")
+            continue
+        first = next((k for k, (a, b) in enumerate(zip(want, got)) if a != b), min(len(want), len(got)))
+        print(f"MISMATCH {name}: {len(want)} golden vs {len(got)} signals; first difference at #{first}: "
+              f"{want[first] if first < len(want) else '-'} vs {got[first] if first < len(got) else '-'}")
+    print("golden signals: " + ("OK" if ok else "DIFFERENT"))
+    return ok
+
+def time_calls(make, idx_df, opt_df, length, steps, alloc_samples):
+    fn = make()
+    windows = [(idx_df.iloc[i + 1 - length:i + 1], opt_df.iloc[i + 1 - length:i + 1], i)
+               for i in range(len(idx_df) - steps, len(idx_df))]
+    try: fn(*windows[0]) # warm-up: first calls pay for lazy imports and caches
+    except Exception: pass
+    times = []
+    for w in windows:
+        t0 = time.perf_counter_ns()
+        try: fn(*w)
+        except Exception: pass
+        times.append((time.perf_counter_ns() - t0) / 1000)
+    tracemalloc.start()
+    peak = 0
+    for w in windows[:alloc_samples]:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        try: fn(*w)
+        except Exception: pass
+        peak += tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    times.sort()
+    return {"mean": sum(times) / len(times), "p50": times[len(times) // 2], "p99": times[min(len(times) - 1, int(len(times) * 0.99))],
+            "alloc": peak / max(1, min(alloc_samples, len(windows)))}
+
+def bench(idx_df, opt_df, lengths, steps, alloc_samples):
+    for length in lengths:
+        if len(idx_df) < length + steps:
+            print(f"\n--- {length} bars: session too short ({len(idx_df)} bars), skipped")
+            continue
+        print(f"\n--- history {length} bars, {steps} calls each ---")
+        print(f"{'':28s} {'mean us':>9s} {'p50 us':>9s} {'p99 us':>9s} {'alloc KB':>9s}")
+        rows = to_rows(idx_df.iloc[-length:])
+        frame = lambda: (lambda idx, opt, i: engine.candles_frame(rows))
+        total = 0.0
+        for name, make in [("engine.candles_frame", frame)] + cases():
+            r = time_calls(make, idx_df, opt_df, length, steps, alloc_samples)
+            if name != "engine.candles_frame": total += r["mean"]
+            print(f"{name:28s} {r['mean']:9.1f} {r['p50']:9.1f} {r['p99']:9.1f} {r['alloc'] / 1024:9.1f}")
+        print(f"{'all strategies / candle':28s} {total:9.1f}")
+
+def main(args):
+    if args.csv or args.db:
+        idx_df = recorded_session(args.csv, args.db)
+        opt_df = idx_df # no recorded option leg: filters run on the same bars
+        source = args.csv or " ".join(args.db)
+    else:
+        days = max(args.days, -(-(max(args.lengths) + args.steps) // BARS_PER_DAY))
+        idx_df, opt_df = synthetic_session(days), synthetic_session(days, option=True)
+        source = f"synthetic {days}d"
+    print(f"session: {source}, {len(idx_df)} bars")
+    bench(idx_df, opt_df, args.lengths, args.steps, args.alloc_samples)
+    if args.csv or args.db or args.no_golden: return 0
+    # Golden walk uses its own fixed session so it does not move with --lengths
+    g_idx, g_opt = synthetic_session(args.days), synthetic_session(args.days, option=True)
+    meta = {"days": args.days, "history": args.history}
+    t0 = time.perf_counter()
+    signals = signal_sequences(g_idx, g_opt, args.history)
+    print(f"\nwalk-forward: {len(g_idx)} bars x {len(signals)} checks in {time.perf_counter() - t0:.1f}s, "
+          f"{sum(len(v) for v in signals.values())} signals")
+    return 0 if check_golden(signals, meta, args.update_golden) else 1
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lengths", type=int, nargs="+", default=[100, 375, 2000])
+    parser.add_argument("--steps", type=int, default=50, help="timed calls per strategy and length")
+    parser.add_argument("--alloc-samples", type=int, default=5)
+    parser.add_argument("--days", type=int, default=3, help="synthetic session length for the golden walk")
+    parser.add_argument("--history", type=int, default=100, help="window per call in the golden walk (hub keeps 100)")
+    parser.add_argument("--csv")
+    parser.add_argument("--db", nargs=2, metavar=("SYMBOL", "INTERVAL"))
+    parser.add_argument("--update-golden", action="store_true")
+    parser.add_argument("--no-golden", action="store_true")
+    sys.exit(main(parser.parse_args()))
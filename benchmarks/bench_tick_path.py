@@ -0,0 +1,87 @@
+"""
+Micro-benchmark for the data hub's per-tick hot path (`process_tick`).
+
+Builds an index + ATM pair + chain mapping, feeds synthetic Upstox fullFeed docs
+through `process_tick` and reports time and memory allocated per tick.
+
+    python -m benchmarks.bench_tick_path --ticks 200000 --strikes 11
+"""
+import argparse
+import asyncio
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+import data_acquisition as hub
+from core.state_manager import MarketState
+
+def build_mapping(spot, n_strikes, step=50):
+    atm = int(round(spot / step) * step)
+    half = n_strikes // 2
+    options = []
+    for i in range(-half, half + 1):
+        k = atm + i * step
+        options.append({"strike": k, "ce": f"NSE_FO|C{k}", "ce_trading_symbol": f"NIFTY C {k}",
+                        "pe": f"NSE_FO|P{k}", "pe_trading_symbol": f"NIFTY P {k}"})
+    return {"options": options}
+
+def make_docs(keys, n, start):
+    rnd = random.Random(7)
+    prices = {k: 100.0 for k in keys}
+    vtt = {k: 0 for k in keys}
+    docs = []
+    for i in range(n):
+        k = keys[i % len(keys)]
+        prices[k] = max(0.05, prices[k] + rnd.uniform(-0.5, 0.5))
+        vtt[k] += rnd.randint(1, 50)
+        docs.append({
+            "instrumentKey": k,
+            "_insertion_time": start + timedelta(milliseconds=5 * i),
+            "fullFeed": {"marketFF": {
+                "ltpc": {"ltp": round(prices[k], 2), "ltq": 25}, "vtt": vtt[k], "oi": 100000 + i % 500,
+                "atp": prices[k], "iv": 0.14, "tbq": 5000, "tsq": 4800,
+                "optionGreeks": {"delta": 0.5, "theta": -10.0, "gamma": 0.001, "vega": 8.0, "rho": 0.1},
+                "marketLevel": {"bidAskQuote": [{"bidQ": 75, "bidP": prices[k] - 0.05, "askQ": 50, "askP": prices[k] + 0.05}] * 5}
+            }}
+        })
+    return docs
+
+def _no_engine(close_ts, histories, timeframes=(), trace=None):
+    pass
+
+async def run(n_ticks, n_strikes):
+    hub.trigger_engine = _no_engine
+    hub.state.market_state = MarketState()
+    hub.state.is_live = False
+    hub.state.index_sym = "NSE:NIFTY"
+    hub.setup_market_mapping("NIFTY", build_mapping(24000, n_strikes), 24000)
+    keys = list(hub.state.market_state.instruments.keys())
+    docs = make_docs(keys, n_ticks, datetime(2026, 1, 5, 3, 45, tzinfo=timezone.utc))
+
+    for doc in docs[:1000]: await hub.process_tick(doc) # warm up
+
+    t0 = time.perf_counter()
+    for doc in docs: await hub.process_tick(doc)
+    elapsed = time.perf_counter() - t0
+
+    # Peak transient allocation inside each call (tracemalloc only sees live blocks)
+    tracemalloc.start()
+    transient = 0
+    for doc in docs[:10000]:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        await hub.process_tick(doc)
+        transient += tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+
+    print(f"instruments: {len(keys)}  ticks: {n_ticks}")
+    print(f"per tick:    {elapsed / n_ticks * 1e6:.2f} us  ({n_ticks / elapsed:,.0f} ticks/sec)")
+    print(f"allocated:   {transient / 10000:.1f} bytes/tick (peak transient, 10k sample)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ticks", type=int, default=200000)
+    parser.add_argument("--strikes", type=int, default=11)
+    args = parser.parse_args()
+    asyncio.run(run(args.ticks, args.strikes))
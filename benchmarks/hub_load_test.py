@@ -0,0 +1,162 @@
+"""
+Throughput / latency load test for the data hub, driven by the market simulator.
+
+    python -m benchmarks.hub_load_test --rates 1000 10000 50000 --duration 5
+    python -m benchmarks.hub_load_test --mode feed --rates 1000 5000 20000
+
+direct: simulator docs are paced straight into process_tick on the event loop.
+feed:   a SimulatedStreamer thread drives UpstoxLiveFeed -> FeedManager -> process_tick_live,
+        i.e. the same thread hop and tick queue as live trading.
+
+Candle closes go to a no-op engine unless --engine is given (then a running engine.py
+receives them). Broadcasts go to a null WebSocket that only counts bytes.
+"""
+import argparse
+import asyncio
+import time
+from datetime import timedelta
+
+import data_acquisition as hub
+from core.latency import LatencyHistogram
+from core.exit_manager import ExitManager
+from core.metrics import process_rss_bytes
+from core.state_manager import MarketState
+from data.gathering.feed_manager import feed_manager
+from data.gathering.simulator import MarketSimulator, SimulatedStreamer
+
+class NullWebSocket:
+    client = None
+
+    def __init__(self):
+        self.bytes, self.messages, self.sent_at = 0, 0, []
+
+    async def send_text(self, text):
+        self.bytes += len(text)
+        self.messages += 1
+        self.sent_at.append(time.perf_counter())
+
+    async def send_json(self, data):
+        pass
+
+def _no_engine(close_ts, histories, timeframes=(), trace=None):
+    pass
+
+def reset_hub(sim, use_engine):
+    hub.state.market_state = MarketState()
+    hub.state.exits = ExitManager()
+    hub.state.strike_map = {}
+    hub.state.index_sym = f"NSE:{sim.index}"
+    hub.state.is_playing, hub.state.is_live = False, True
+    hub.state.websocket, hub.state.client_id = NullWebSocket(), "loadtest"
+    hub.last_broadcast_time = 0
+    if not use_engine: hub.trigger_engine = _no_engine
+    # Re-centering asks the simulator, not the Upstox instrument master, for the new strikes
+    hub.state.chain_mapper = lambda idx_raw, spot: MarketSimulator(index=sim.index, spot=spot, n_strikes=len(sim.strikes)).mapping()
+    hub.setup_market_mapping(sim.index, sim.mapping(), sim.spot)
+
+def wrap_broadcast(hist):
+    orig = hub.broadcast_state
+    async def timed():
+        t0 = time.perf_counter_ns()
+        await orig()
+        hist.observe((time.perf_counter_ns() - t0) / 1000)
+    hub.broadcast_state = timed
+    return orig
+
+def processed_ticks():
+    return sum(rec.ticks for rec in hub.state.market_state.instruments.values())
+
+async def run_direct(sim, rate, duration, pool):
+    tick_hist = LatencyHistogram()
+    span = pool[-1]['_insertion_time'] - pool[0]['_insertion_time'] + timedelta(seconds=1.0 / rate)
+    t_start, cpu_start = time.perf_counter(), time.process_time()
+    sent, max_backlog, i = 0, 0, 0
+    while True:
+        elapsed = time.perf_counter() - t_start
+        if elapsed >= duration: break
+        due = int(elapsed * rate)
+        backlog = due - sent
+        if backlog > max_backlog: max_backlog = backlog
+        if backlog <= 0:
+            await asyncio.sleep(0.001)
+            continue
+        for _ in range(min(backlog, 2000)):
+            cycle, idx = divmod(i, len(pool))
+            src = pool[idx]
+            doc = {"instrumentKey": src['instrumentKey'], "fullFeed": src['fullFeed'],
+                   "_insertion_time": src['_insertion_time'] + span * cycle if cycle else src['_insertion_time']}
+            if i % 50 == 0:
+                t0 = time.perf_counter_ns()
+                await hub.process_tick(doc)
+                tick_hist.observe((time.perf_counter_ns() - t0) / 1000)
+            else:
+                await hub.process_tick(doc)
+            i += 1
+        sent = i
+        await asyncio.sleep(0) # let broadcasts / other tasks in, like the real loop
+    wall = time.perf_counter() - t_start
+    return {"offered": int(wall * rate), "processed": sent, "wall": wall, "cpu": time.process_time() - cpu_start,
+            "backlog_ms": max_backlog / rate * 1000, "tick": tick_hist}
+
+async def run_feed(sim, rate, duration, pool):
+    batch = max(1, rate // 1000)
+    streamer = SimulatedStreamer(sim, rate=rate, batch=batch, pool=max(1, pool // batch))
+    feed_manager.upstox_feed = None
+    feed_manager.subscribers = []
+    base = processed_ticks()
+    t_start, cpu_start = time.perf_counter(), time.process_time()
+    upstox = hub.start_live_feed(streamer_factory=lambda cfg: streamer)
+    max_queue = 0
+    while time.perf_counter() - t_start < duration:
+        await asyncio.sleep(0.05)
+        max_queue = max(max_queue, hub.m_tick_queue.children[None].value)
+    upstox.stop()
+    wall = time.perf_counter() - t_start
+    feed_manager.subscribers = []
+    # Drain what is already queued so the counts line up
+    for _ in range(200):
+        if hub.m_tick_queue.children[None].value <= 0: break
+        await asyncio.sleep(0.01)
+    return {"offered": streamer.sent, "processed": processed_ticks() - base, "wall": wall,
+            "cpu": time.process_time() - cpu_start, "backlog_ms": max_queue / rate * 1000, "tick": None}
+
+def report(rate, res, bcast_hist, ws, rss_before):
+    achieved = res["processed"] / res["wall"]
+    gaps = [b - a for a, b in zip(ws.sent_at, ws.sent_at[1:])]
+    late_ms = max((g - 1.0 for g in gaps), default=0.0) * 1000
+    sustainable = achieved >= 0.97 * rate and res["backlog_ms"] < 100
+    print(f"\n=== target {rate:,} ticks/sec ({'OK' if sustainable else 'NOT SUSTAINABLE'}) ===")
+    if res["offered"] < 0.97 * rate * res["wall"]: print("(offered below target: the sender thread shares the GIL with the loop, so the process is CPU-bound)")
+    print(f"offered {res['offered']:,}  processed {res['processed']:,}  achieved {achieved:,.0f}/s  max backlog {res['backlog_ms']:.1f} ms")
+    print(f"cpu {res['cpu'] / res['wall'] * 100:.0f}%  rss {process_rss_bytes() / 2**20:.0f} MB (+{(process_rss_bytes() - rss_before) / 2**20:.0f})")
+    if res["tick"] and res["tick"].count:
+        t = res["tick"].summary()
+        print(f"process_tick p50 {t['p50_ms'] * 1000:.1f} us  p99 {t['p99_ms'] * 1000:.1f} us  max {t['max_ms'] * 1000:.1f} us")
+    b = bcast_hist.summary()
+    print(f"broadcasts {ws.messages} ({ws.bytes / max(1, ws.messages) / 1024:.1f} KB each)  build+send p99 {b['p99_ms']:.2f} ms  worst lateness {late_ms:.0f} ms")
+
+async def main(args):
+    for rate in args.rates:
+        sim = MarketSimulator(index=args.index, n_strikes=args.strikes, rate=rate, seed=rate)
+        reset_hub(sim, args.engine)
+        bcast_hist = LatencyHistogram()
+        orig = wrap_broadcast(bcast_hist)
+        rss_before = process_rss_bytes()
+        if args.mode == "direct":
+            pool = sim.docs(min(rate * int(args.duration), args.pool))
+            res = await run_direct(sim, rate, args.duration, pool)
+        else:
+            res = await run_feed(sim, rate, args.duration, min(rate * int(args.duration), args.pool) // 10)
+        report(rate, res, bcast_hist, hub.state.websocket, rss_before)
+        hub.broadcast_state = orig
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--mode", choices=["direct", "feed"], default="direct")
+    parser.add_argument("--rates", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--strikes", type=int, default=11)
+    parser.add_argument("--index", default="NIFTY")
+    parser.add_argument("--pool", type=int, default=50000, help="pre-generated ticks, cycled in virtual time")
+    parser.add_argument("--engine", action="store_true", help="send candle closes to a running engine.py")
+    asyncio.run(main(parser.parse_args()))
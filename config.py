@@ -28,3 +28,58 @@ TARGET_PER_TRADE = 40 # points
 MARKET_START_TIME = '09:15'
 MARKET_END_TIME = '15:30'
 SQUARE_OFF_TIME = '15:20'
+
+# Chain candles (1m bars for every subscribed strike)
+CHAIN_CANDLE_BARS = 375  # one session
+CHAIN_RECENTER = True  # follow ATM when spot moves a strike step (live only)
+CHAIN_EVALUATION = True  # send every strike's bars to the engine; option-side checks pick the strike
+CHAIN_EVAL_BARS = 100  # minutes of chain bars per evaluation (the panel history length)
+CHAIN_PICK = "volume"  # best qualifying strike by "volume" (last 5 bars) or "delta" (closest to CHAIN_TARGET_DELTA; the ATM strike while deltas are unknown)
+CHAIN_TARGET_DELTA = 0.5
+SHARED_CANDLES = True  # hub and engine on one host: bars go through shared memory, only segment names over HTTP
+
+# Bar timeframes in minutes; 1m always exists, the rest roll up from it
+CANDLE_TIMEFRAMES = [1, 3, 5, 15]
+STRATEGY_TIMEFRAMES = {}  # strategy name -> timeframe it evaluates on (default 1)
+ENGINE_WORKERS = 4  # strategy worker processes; each index is pinned to one (0: evaluate in the engine process)
+STRATEGY_PARAMS = {}  # strategy name -> threshold overrides, e.g. {"BIGDOG_BREAKOUT_LONG": {"vol_mult": 2.0}}
+BAR_CLOSE_GRACE_SEC = 0.5  # bars close this long after the exchange-clock minute so late ticks still land
+ENGINE_QUEUE_SIZE = 4  # boundaries waiting for the engine; one per index, a newer one replaces the pending one
+ENGINE_TIMEOUT_SEC = 1.0
+SIGNAL_OUTBOX_SIZE = 1000  # signals waiting to reach the hub; the oldest is dropped past this
+SIGNAL_RETRIES = 3  # extra attempts per signal, backing off 0.2s, 0.4s, 0.8s
+REPLAY_CHECKPOINT_DIR = "replay_checkpoints"  # replay state snapshots, one directory per index and date
+REPLAY_CHECKPOINT_MIN = 15  # checkpoint interval; a seek replays at most this many minutes of ticks
+REPLAY_SPEED = 1.0  # replay data seconds per wall second (0.5-100, None for as fast as possible)
+REPLAY_BROADCAST_SEC = 0.25  # replay UI updates on this wall-clock cadence, independent of speed
+TICK_RECORDING = False  # record every live tick to compressed columnar segments under TICK_RECORD_DIR
+TICK_RECORD_DIR = "tick_recordings"  # one directory per session date; replay them with {"source": "recording"}
+TICK_RECORD_FLUSH_ROWS = 50000  # ticks per chunk handed to the writer thread (or every TICK_RECORD_FLUSH_SEC)
+TICK_RECORD_FLUSH_SEC = 2.0
+TICK_RECORD_SEGMENT_MB = 256  # segment files also rotate past this size
+WARM_START = True  # engine seeds bars and strategy vars from the ohlcv table when it first sees an index
+WARM_START_BARS = 100  # bars per evaluation window (the hub's history length); short hub histories are filled up to it
+STORE_LIVE_CANDLES = True  # hub writes closed live panel bars to ohlcv, so a mid-session restart warm starts from them
+OHLCV_1M = "Interval.in_1_minute"  # ohlcv interval key of 1m bars (DataManager.get_data's str(Interval.in_1_minute))
+RUNTIME_SNAPSHOTS = True  # snapshot + journal live runtime state so a crash or restart resumes where it was
+SNAPSHOT_DIR = "runtime_state"  # hub/ (paper trades, PnL, OI baselines) and engine/ (strategy vars)
+SNAPSHOT_SEC = 30  # snapshot cadence; events in between go to the append-only journal
+SESSION_ANALYTICS = True  # per-instrument session VWAP + bands, volume profile and order-flow delta, sent with each boundary
+PROFILE_BUCKET_PCT = 0.0005  # volume profile price bucket as a share of the first price, rounded to a 1-2-5 step
+VALUE_AREA = 0.7  # share of session volume the value area holds
+VWAP_BAND_SD = (1.0, 2.0)  # VWAP bands in standard deviations of volume-weighted price
+IO_POOL_WORKERS = 4  # threads for blocking data access (SQLite, REST, instrument master, Mongo)
+IO_POOL_MAX_PENDING = 16  # calls queued or running at once; more wait for a slot
+IO_TIMEOUT_SEC = 30.0  # default per-call timeout
+
+# Paper-trade exits
+PARTIAL_EXITS = False  # book PARTIAL_EXIT_FRACTION at RiskManager tp1, rest at target/tp2
+PARTIAL_EXIT_FRACTION = 0.5
+TRAILING_STOP_PTS = None  # e.g. 15 to trail the stop that many points below the high
+
+# Strategy Engine profiling / cost budget
+STRATEGY_PROFILING = False  # sample cProfile of strategy evaluations
+STRATEGY_BUDGET_MS = 5.0  # per strategy, per candle
+STRATEGY_BUDGET_STRIKES = 3  # consecutive overruns before a strategy is deprioritized
+PROFILE_SAMPLE_EVERY = 20  # profile every Nth call of each strategy
+PROFILE_KEEP_SLOWEST = 10
@@ -0,0 +1,76 @@
+import numpy as np
+
+FIELDS = ("open", "high", "low", "close", "volume")
+
+def ema_rows(close, count, length):
+    """
+    pandas_ta ema (SMA seed, then ewm adjust=False) of every right-aligned row: the last and
+    previous value. Rows shorter than `length` come back NaN.
+    """
+    w = close.shape[1]
+    a = 2.0 / (length + 1)
+    b = 1.0 - a
+    start = w - count # first valid column of each row
+    cols = np.arange(w)
+    seed_mask = (cols >= start[:, None]) & (cols < (start + length)[:, None])
+    seed = np.where(seed_mask, np.nan_to_num(close), 0.0).sum(axis=1) / length
+    steps = count - length # values folded in after the seed
+    rev = np.nan_to_num(close[:, ::-1]) # rev[:, k] is k bars back from the last
+    out = []
+    for back in (0, 1):
+        r = rev[:, back:]
+        m = steps - back
+        k = np.arange(r.shape[1])
+        weights = np.where(k < m[:, None], a * b ** k, 0.0)
+        val = b ** np.maximum(m, 0) * seed + (r * weights).sum(axis=1)
+        out.append(np.where((count >= length) & (m >= 0), val, np.nan))
+    return out
+
+class ChainSide:
+    """
+    One side of the option chain from the hub's `chain` payload: (strike x minute) bar matrices,
+    rows right-aligned on the minutes each strike traded, so the last column is every strike's
+    last closed bar. Option-side checks run on all strikes at once.
+    """
+    def __init__(self, payload):
+        self.symbols = payload["symbols"]
+        self.strikes = np.asarray(payload["strikes"], dtype=float)
+        self.delta = np.asarray(payload.get("delta", [0] * len(self.symbols)), dtype=float)
+        close = np.asarray(payload["close"], dtype=float).reshape(len(self.symbols), -1)
+        valid = ~np.isnan(close)
+        order = np.argsort(valid, axis=1, kind="stable")
+        self.count = valid.sum(axis=1)
+        self.fresh = valid[:, -1] if close.shape[1] else np.zeros(len(self.symbols), bool) # traded in the minute just closed
+        self.bars = {f: np.take_along_axis(np.asarray(payload[f], dtype=float).reshape(close.shape), order, axis=1) for f in FIELDS}
+        self.last = {f: m[:, -1] if m.shape[1] else np.full(len(self.symbols), np.nan) for f, m in self.bars.items()}
+        self._ema_ok = None
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def ema_filter(self):
+        """engine.check_option_ema_filter for every strike (cached per request)."""
+        if self._ema_ok is None:
+            close, count = self.bars["close"], self.count
+            e9, e9_prev = ema_rows(close, count, 9)
+            e14, _ = ema_rows(close, count, 14)
+            c = self.last["close"]
+            with np.errstate(invalid="ignore"):
+                ok = ((c > e9) | (c > e14)) & ((e9 > e9_prev) | (e9 > e14))
+            self._ema_ok = ok & (count >= 15)
+        return self._ema_ok
+
+    def pullback(self, min_range, max_range, body_ratio):
+        """TrendFollowing's option candle: bearish, range within [min_range, max_range], body >= ratio of range."""
+        o, h, l, c = (self.last[f] for f in ("open", "high", "low", "close"))
+        rng = h - l
+        with np.errstate(invalid="ignore"):
+            return (c < o) & (min_range <= rng) & (rng <= max_range) & (np.abs(c - o) >= body_ratio * rng)
+
+    def best(self, mask, pick="volume", target_delta=0.5, bars=5):
+        """Row of the best qualifying strike that traded in the last minute: most volume over the last `bars`, or delta closest to target."""
+        mask = mask & self.fresh
+        if not mask.any(): return None
+        if pick == "delta": score = -np.abs(np.abs(self.delta) - target_delta)
+        else: score = np.nansum(self.bars["volume"][:, -bars:], axis=1)
+        return int(np.argmax(np.where(mask, score, -np.inf)))
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+from collections import OrderedDict, deque
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+class LatestQueue:
+    """
+    Bounded queue holding at most one pending item per key. A newer item replaces the pending
+    one in place (latest wins), and when `maxsize` keys are pending the oldest is dropped, so a
+    slow or dead consumer sees the newest state instead of a growing backlog. `merge(pending, item)`,
+    when given, returns what replaces a pending item, for what the newer one must carry over.
+    """
+    def __init__(self, maxsize=8, merge=None):
+        self.maxsize = maxsize
+        self.merge = merge
+        self.items = OrderedDict()
+        self.ready = asyncio.Event()
+        self.coalesced = self.dropped = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def put(self, key, item):
+        if key in self.items:
+            self.coalesced += 1
+            if self.merge: item = self.merge(self.items[key], item)
+        elif len(self.items) >= self.maxsize:
+            self.items.popitem(last=False)
+            self.dropped += 1
+        self.items[key] = item
+        self.ready.set()
+
+    def clear(self):
+        self.items.clear()
+
+    async def get(self):
+        while not self.items:
+            self.ready.clear()
+            await self.ready.wait()
+        return self.items.popitem(last=False)[1]
+
+class FifoQueue:
+    """Bounded FIFO for items that must each be delivered; past `maxsize` the oldest is dropped."""
+    def __init__(self, maxsize=1000):
+        self.items = deque()
+        self.maxsize = maxsize
+        self.ready = asyncio.Event()
+        self.coalesced = self.dropped = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def put(self, item):
+        if len(self.items) >= self.maxsize:
+            self.items.popleft()
+            self.dropped += 1
+        self.items.append(item)
+        self.ready.set()
+
+    async def get(self):
+        while not self.items:
+            self.ready.clear()
+            await self.ready.wait()
+        return self.items.popleft()
+
+class Poster:
+    """
+    Drains a queue into POSTs from one task on one keep-alive client, so producers only enqueue
+    and never wait on the network. Each item is retried `retries` times with doubling backoff,
+    then given up. `on_send(item)` runs just before each attempt, `on_done(item, ok, seconds)` once per item.
+    """
+    def __init__(self, url, queue, timeout=1.0, retries=0, backoff=0.2, on_send=None, on_done=None):
+        self.url, self.queue, self.timeout = url, queue, timeout
+        self.retries, self.backoff = retries, backoff
+        self.on_send, self.on_done = on_send, on_done
+        self.task = None
+        self.busy = False # an item is being posted
+        self.idle = asyncio.Event()
+        self.sent = self.failed = self.retried = 0
+
+    def start(self):
+        """Start the sender on the running loop (idempotent; call from a coroutine or loop callback)."""
+        if self.task is None or self.task.done(): self.task = asyncio.get_running_loop().create_task(self.run())
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        limits = httpx.Limits(max_connections=4, max_keepalive_connections=4)
+        async with httpx.AsyncClient(timeout=self.timeout, limits=limits) as client:
+            while True:
+                item = await self.queue.get()
+                self.busy, t0 = True, loop.time()
+                try:
+                    ok = await self._post(client, item)
+                    if self.on_done: self.on_done(item, ok, loop.time() - t0)
+                finally:
+                    self.busy = False
+                    if not len(self.queue): self.idle.set()
+
+    async def drain(self):
+        """Wait until everything queued so far has been posted (or given up); returns at once if not running."""
+        while self.task is not None and not self.task.done() and (len(self.queue) or self.busy):
+            self.idle.clear()
+            await self.idle.wait()
+
+    async def _post(self, client, item):
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.retried += 1
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+            if self.on_send: self.on_send(item)
+            try:
+                r = await client.post(self.url, json=item)
+                r.raise_for_status()
+                self.sent += 1
+                return True
+            except Exception as e:
+                err = e
+        self.failed += 1
+        logger.warning(f"POST {self.url} failed after {self.retries + 1} attempt(s): {err!r}")
+        return False
+
+    async def close(self):
+        if self.task is None: return
+        self.task.cancel()
+        try: await self.task
+        except asyncio.CancelledError: pass
+        self.task = None
+        self.idle.set()
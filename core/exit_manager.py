@@ -0,0 +1,138 @@
+import heapq
+import itertools
+from datetime import datetime, timedelta, timezone
+
+IST_TZ = timezone(timedelta(hours=5, minutes=30))
+
+class _Book:
+    """Exit levels of the open trades on one symbol. Heaps are lazy: stale entries are skipped on pop."""
+    __slots__ = ("stops", "targets", "trails", "count")
+
+    def __init__(self):
+        self.stops = [] # (-sl, seq, trade): highest stop on top
+        self.targets = [] # (level, seq, trade, leg): lowest target on top
+        self.trails = [] # (peak, seq, trade): lowest high-water mark on top
+        self.count = 0
+
+class ExitManager:
+    """
+    Stop/target/trailing/time exits for open paper trades, indexed by symbol and price level.
+    A tick only pops the levels it actually crossed, so the cost does not grow with the
+    number of open trades. Call on_tick after the tick price has been marked on the
+    PnLTracker, so partials are booked at the marked price.
+    """
+    def __init__(self, square_off="15:20", partial_fraction=0.5):
+        hh, mm = map(int, square_off.split(":"))
+        self.square_off = timedelta(hours=hh, minutes=mm)
+        self.partial_fraction = partial_fraction
+        self.books = {}
+        self.open = {} # id(trade) -> trade
+        self._seq = itertools.count()
+        self._cutoff, self._rollover = 0.0, 0.0
+        self.raised = [] # trades whose trailing stop on_tick raised; the caller journals and clears them
+
+    def __getstate__(self):
+        # Replay checkpoints pickle the manager: trades are keyed by id() and the tie-break counter is not picklable
+        return dict(self.__dict__, open=list(self.open.values()), _seq=next(self._seq))
+
+    def __setstate__(self, s):
+        self.__dict__.update(s, open={id(t): t for t in s['open']}, _seq=itertools.count(s['_seq']), raised=[])
+
+    def __len__(self):
+        return len(self.open)
+
+    def __iter__(self):
+        return iter(list(self.open.values()))
+
+    def add(self, trade):
+        book = self.books.get(trade.symbol)
+        if book is None: book = self.books[trade.symbol] = _Book()
+        seq = self._seq
+        if trade.sl is not None: heapq.heappush(book.stops, (-trade.sl, next(seq), trade))
+        if trade.target is not None: heapq.heappush(book.targets, (trade.target, next(seq), trade, "TARGET"))
+        if trade.tp1 is not None and (trade.target is None or trade.tp1 < trade.target):
+            heapq.heappush(book.targets, (trade.tp1, next(seq), trade, "TP1"))
+        if trade.trail: heapq.heappush(book.trails, (trade.peak, next(seq), trade))
+        book.count += 1
+        self.open[id(trade)] = trade
+
+    def on_tick(self, symbol, price, ts):
+        """Returns [(trade, price, reason, fraction)] for every exit this tick triggered."""
+        book = self.books.get(symbol)
+        if book is None: return ()
+        events = []
+        seq = self._seq
+
+        # New highs raise trailing stops before the stop check
+        trails = book.trails
+        while trails and trails[0][0] < price:
+            peak, _, t = heapq.heappop(trails)
+            if t.status != 'OPEN' or peak < t.peak: continue # closed, or a restored raise left this entry behind
+            t.peak = price
+            sl = price - t.trail
+            if t.sl is None or sl > t.sl:
+                t.sl = sl
+                heapq.heappush(book.stops, (-sl, next(seq), t))
+                self.raised.append(t)
+            heapq.heappush(trails, (price, next(seq), t))
+
+        stops = book.stops
+        while stops and -stops[0][0] >= price:
+            neg_sl, _, t = heapq.heappop(stops)
+            if t.status != 'OPEN' or t.sl != -neg_sl: continue # closed, or stop moved since
+            reason = "TRAIL" if t.trail and t.peak > t.entry_price else "SL"
+            events.append((t, price, reason, t.remaining))
+            self._close(book, t, price, ts, reason)
+
+        targets = book.targets
+        while targets and targets[0][0] <= price:
+            _, _, t, leg = heapq.heappop(targets)
+            if t.status != 'OPEN': continue
+            if leg == "TP1":
+                if t.partials: continue
+                fraction = min(self.partial_fraction, t.remaining)
+                t.partial_close(price, ts, fraction, "TP1")
+                events.append((t, price, "TP1", fraction))
+            else:
+                events.append((t, price, "TARGET", t.remaining))
+                self._close(book, t, price, ts, "TARGET")
+
+        if not book.count: del self.books[symbol]
+        return events
+
+    def check_time(self, ts):
+        """Square off everything at SQUARE_OFF_TIME (IST) on the tick clock; two compares otherwise."""
+        if ts >= self._rollover: self._set_day(ts)
+        if ts < self._cutoff or not self.open: return ()
+        events = []
+        for t in list(self.open.values()):
+            events.append((t, t.mark_price, "TIME", t.remaining))
+            self._close(self.books[t.symbol], t, t.mark_price, ts, "TIME")
+        self.books = {}
+        return events
+
+    def apply_trail(self, trade, peak, sl):
+        """Re-apply a trailing stop raise (runtime journal replay)."""
+        if trade.status != 'OPEN' or sl <= (trade.sl if trade.sl is not None else -float('inf')): return
+        trade.peak, trade.sl = peak, sl
+        book = self.books[trade.symbol]
+        heapq.heappush(book.stops, (-sl, next(self._seq), trade))
+        heapq.heappush(book.trails, (peak, next(self._seq), trade))
+
+    def apply(self, trade, price, ts, reason, fraction):
+        """Re-apply an exit on_tick/check_time reported before a restart (runtime journal replay)."""
+        if trade.status != 'OPEN': return
+        if reason == "TP1": return trade.partial_close(price, ts, fraction, reason)
+        book = self.books[trade.symbol]
+        self._close(book, trade, price, ts, reason)
+        if not book.count: del self.books[trade.symbol]
+
+    def _set_day(self, ts):
+        day = datetime.fromtimestamp(ts, IST_TZ).replace(hour=0, minute=0, second=0, microsecond=0)
+        self._cutoff = (day + self.square_off).timestamp()
+        self._rollover = (day + timedelta(days=1)).timestamp()
+
+    def _close(self, book, trade, price, ts, reason):
+        trade.close(price, ts, reason)
+        book.count -= 1
+        del self.open[id(trade)]
@@ -0,0 +1,56 @@
+import asyncio
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+
+class BlockingPool:
+    """
+    Bounded thread pool for blocking data access (SQLite, Upstox/TradingView REST, the instrument
+    master download, Mongo cursors), so the event loop never runs it. At most `max_pending` calls
+    are queued or running; further callers wait their turn inside their own timeout. A call that
+    times out or is cancelled is dropped if it has not started; one already running finishes
+    in its thread (threads cannot be killed) and keeps its slot until then, so stragglers
+    cannot pile up.
+    """
+    def __init__(self, workers=4, max_pending=16, timeout=30.0):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="blocking-io")
+        self.max_pending, self.timeout = max_pending, timeout
+        self.slots = None # asyncio.Semaphore, made on the loop that first uses the pool
+        self.pending = 0
+        self.timeouts = 0
+
+    async def run(self, fn, *args, timeout=None, **kwargs):
+        """fn(*args, **kwargs) on the pool; raises TimeoutError after `timeout` seconds (default: the pool's)."""
+        loop = asyncio.get_running_loop()
+        if self.slots is None: self.slots = asyncio.Semaphore(self.max_pending)
+        limit = asyncio.timeout(timeout or self.timeout)
+        try:
+            async with limit:
+                await self.slots.acquire()
+                self.pending += 1
+                fut = self.executor.submit(fn, *args, **kwargs)
+                fut.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release))
+                try: return await asyncio.wrap_future(fut)
+                finally: fut.cancel() # no-op once running or done
+        except TimeoutError:
+            if not limit.expired(): raise # fn's own timeout
+            self.timeouts += 1
+            raise TimeoutError(f"{getattr(fn, '__qualname__', fn)} did not finish in {timeout or self.timeout}s") from None
+
+    def _release(self):
+        self.pending -= 1
+        self.slots.release()
+
+    async def iterate(self, iterable, batch=2000, timeout=None):
+        """Async iteration over a blocking iterator (e.g. a Mongo cursor), pulling `batch` items per pool call."""
+        it = iter(iterable)
+        while True:
+            items = await self.run(lambda: list(itertools.islice(it, batch)), timeout=timeout)
+            if not items: return
+            for item in items: yield item
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+io_pool = BlockingPool(config.IO_POOL_WORKERS, config.IO_POOL_MAX_PENDING, config.IO_TIMEOUT_SEC)
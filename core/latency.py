@@ -0,0 +1,72 @@
+import os
+import time
+import itertools
+from bisect import bisect_left
+
+# Bucket upper bounds in microseconds: 1us .. 60s on a 1-2-5 ladder
+BUCKETS_US = [m * 10 ** e for e in range(0, 8) for m in (1, 2, 5)] + [60_000_000]
+
+_trace_seq = itertools.count(1)
+_trace_prefix = f"{os.getpid():x}"
+
+def now_ns():
+    # CLOCK_MONOTONIC is host-wide on Linux, so hub and engine stamps on one box are comparable
+    return time.monotonic_ns()
+
+def new_trace(feed_ts=None):
+    """Trace context carried from feed ingestion through candle payload and signal."""
+    return {"id": f"{_trace_prefix}-{next(_trace_seq):x}", "feed_ts": feed_ts, "ingest_ns": now_ns()}
+
+class LatencyHistogram:
+    __slots__ = ("counts", "count", "total_us", "max_us")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_US) + 1)
+        self.count, self.total_us, self.max_us = 0, 0.0, 0.0
+
+    def observe(self, us):
+        self.counts[bisect_left(BUCKETS_US, us)] += 1
+        self.count += 1
+        self.total_us += us
+        if us > self.max_us: self.max_us = us
+
+    def percentile(self, q):
+        if not self.count: return 0.0
+        rank, seen = q * self.count, 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                # Bucket upper bound, capped by the exact max we have seen
+                return min(BUCKETS_US[i] if i < len(BUCKETS_US) else self.max_us, self.max_us)
+        return self.max_us
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "p50_ms": round(self.percentile(0.50) / 1000, 3),
+            "p99_ms": round(self.percentile(0.99) / 1000, 3),
+            "max_ms": round(self.max_us / 1000, 3),
+            "mean_ms": round(self.total_us / self.count / 1000, 3) if self.count else 0.0
+        }
+
+class LatencyTracer:
+    """Per-stage latency histograms for one service."""
+    def __init__(self, service):
+        self.service = service
+        self.stages = {}
+
+    def observe(self, stage, us):
+        hist = self.stages.get(stage)
+        if hist is None:
+            hist = self.stages[stage] = LatencyHistogram()
+        hist.observe(us)
+
+    def record(self, stage, start_ns, end_ns=None):
+        if start_ns is None: return
+        self.observe(stage, ((end_ns or now_ns()) - start_ns) / 1000)
+
+    def reset(self):
+        self.stages = {}
+
+    def snapshot(self):
+        return {"service": self.service, "stages": {name: h.summary() for name, h in sorted(self.stages.items())}}
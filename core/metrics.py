@@ -0,0 +1,156 @@
+import os
+import time
+import asyncio
+from core.latency import LatencyHistogram, BUCKETS_US
+
+class Counter:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, n=1):
+        self.value += n
+
+class Gauge:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def set(self, v):
+        self.value = v
+
+    def inc(self, n=1):
+        self.value += n
+
+    def dec(self, n=1):
+        self.value -= n
+
+class Family:
+    """One metric with an optional single label; children are created once and reused."""
+    def __init__(self, kind, name, help, label=None, rate=False):
+        self.kind, self.name, self.help, self.label, self.rate = kind, name, help, label, rate
+        self.children = {}
+        self._last = {} # label value -> (value, ts) at previous render, for *_per_second
+        if label is None: self.children[None] = self._new()
+
+    def _new(self):
+        return Counter() if self.kind == "counter" else (Gauge() if self.kind == "gauge" else LatencyHistogram())
+
+    def labels(self, value):
+        child = self.children.get(value)
+        if child is None:
+            child = self.children[value] = self._new()
+        return child
+
+    # Unlabelled shortcuts
+    def inc(self, n=1): self.children[None].inc(n)
+    def dec(self, n=1): self.children[None].dec(n)
+    def set(self, v): self.children[None].set(v)
+    def observe(self, us): self.children[None].observe(us)
+
+class MetricsRegistry:
+    """Allocation-free counters/gauges/histograms, rendered in Prometheus text format on scrape."""
+    def __init__(self, namespace):
+        self.namespace = namespace
+        self.families = []
+        self.callbacks = [] # (kind, name, help, label, rate, fn -> {label_value: value} or number)
+        self._last = {} # (name, label value) -> (value, ts) for callback rates
+
+    def _add(self, kind, name, help, label=None, rate=False):
+        fam = Family(kind, f"{self.namespace}_{name}", help, label, rate)
+        self.families.append(fam)
+        return fam
+
+    def counter(self, name, help, label=None, rate=False):
+        return self._add("counter", name, help, label, rate)
+
+    def gauge(self, name, help, label=None):
+        return self._add("gauge", name, help, label)
+
+    def histogram(self, name, help, label=None):
+        return self._add("histogram", name, help, label)
+
+    def gauge_fn(self, name, help, fn, label=None):
+        """Gauge read at scrape time, for state that already lives elsewhere."""
+        self.callbacks.append(("gauge", f"{self.namespace}_{name}", help, label, False, fn))
+
+    def counter_fn(self, name, help, fn, label=None, rate=False):
+        """Counter read at scrape time (e.g. plain ints kept on hot-path records)."""
+        self.callbacks.append(("counter", f"{self.namespace}_{name}", help, label, rate, fn))
+
+    def render(self):
+        now, out = time.monotonic(), []
+        for fam in self.families:
+            kind = fam.kind
+            out.append(f"# HELP {fam.name} {fam.help}")
+            out.append(f"# TYPE {fam.name} {kind}")
+            for lv, child in list(fam.children.items()):
+                lbl = _labels(fam.label, lv)
+                if kind == "histogram":
+                    out.extend(_render_histogram(fam.name, fam.label, lv, child))
+                else:
+                    out.append(f"{fam.name}{lbl} {child.value}")
+            if fam.rate:
+                out.extend(_render_rate(fam.name, fam.label, ((lv, c.value) for lv, c in list(fam.children.items())), fam._last, now))
+        for kind, name, help, label, rate, fn in self.callbacks:
+            try: values = fn()
+            except Exception: continue
+            if not isinstance(values, dict): values = {None: values}
+            out.append(f"# HELP {name} {help}")
+            out.append(f"# TYPE {name} {kind}")
+            for lv, v in values.items(): out.append(f"{name}{_labels(label, lv)} {v}")
+            if rate: out.extend(_render_rate(name, label, values.items(), self._last.setdefault(name, {}), now))
+        return "\n".join(out) + "\n"
+
+def _render_rate(name, label, items, last, now):
+    # Per-second rate since the previous scrape, for consumers without PromQL
+    lines = [f"# TYPE {name}_per_second gauge"]
+    for lv, value in items:
+        prev_v, prev_t = last.get(lv, (value, now))
+        dt = now - prev_t
+        lines.append(f"{name}_per_second{_labels(label, lv)} {round((value - prev_v) / dt, 2) if dt > 0 else 0}")
+        last[lv] = (value, now)
+    return lines
+
+def _labels(label, value, extra=""):
+    parts = ([f'{label}="{_escape(value)}"'] if label is not None and value is not None else []) + ([extra] if extra else [])
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _escape(v):
+    return str(v).replace("\\", "\\\\").replace('"', '\\"')
+
+def _render_histogram(name, label, lv, hist):
+    lines, cum = [], 0
+    for bound, count in zip(BUCKETS_US, hist.counts):
+        cum += count
+        if count:
+            le = 'le="%g"' % (bound / 1e6)
+            lines.append(f"{name}_bucket{_labels(label, lv, le)} {cum}")
+    inf = 'le="+Inf"'
+    lines.append(f"{name}_bucket{_labels(label, lv, inf)} {hist.count}")
+    lines.append(f"{name}_sum{_labels(label, lv)} {hist.total_us / 1e6:.6f}")
+    lines.append(f"{name}_count{_labels(label, lv)} {hist.count}")
+    return lines
+
+def process_rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        try:
+            import resource
+            # ru_maxrss is peak, in KB on Linux
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        except ImportError:
+            return 0
+
+async def monitor_loop_lag(gauge, hist, interval=0.5):
+    """Background task: how late the event loop wakes us up is how long it was blocked."""
+    while True:
+        t0 = time.monotonic()
+        await asyncio.sleep(interval)
+        lag = max(0.0, time.monotonic() - t0 - interval)
+        gauge.set(round(lag * 1000, 3))
+        hist.observe(lag * 1e6)
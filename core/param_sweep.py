@@ -0,0 +1,353 @@
+"""
+Parameter sweep for strategy thresholds (the PARAMS on each strategy) over stored 1m OHLCV.
+
+Each kernel below re-implements one strategy's check_setup over whole arrays: indicators are
+computed once per distinct indicator setting, then the bars are stepped once with every
+combination of the grid held side by side in NumPy vectors (one lane per combination).
+Chunks of combinations run in parallel worker processes.
+
+Trades are simulated per lane on the strategy's own levels: one position at a time, entered at
+the signal's entry price, stop checked before target on each later bar, squared off at
+SQUARE_OFF_TIME. PnL is in points of the traded series (the index for index-driven strategies;
+the engine's option mapping and the hub's PCR/buildup gates are not modelled).
+
+    python -m core.param_sweep BIGDOG_BREAKOUT_LONG --db "NSE:NIFTY" 1m --days 180 \\
+        --grid '{"vol_mult": [1.4, 1.6, 1.8, 2.0, 2.2], "range_ratio": [0.001, 0.0015, 0.002, 0.003]}'
+    python -m core.param_sweep RSI_SCALPER_LONG --csv nifty_1m.csv --grid grid.json --top 20
+    python -m core.param_sweep BIGDOG_BREAKOUT_LONG --csv nifty_1m.csv --verify   # kernel vs check_setup
+
+Winning values go into config.STRATEGY_PARAMS.
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import config
+from core.strategies.master_strategies import BigDogBreakoutLong, BigDogBreakoutShort, RSIScalperLong, RSIScalperShort
+from core.strategies.trend_following import TrendFollowingStrategy
+
+RANKINGS = {
+    "pnl": lambda r: (-r["pnl"], r["max_dd"], -r["win_rate"]),
+    "drawdown": lambda r: (r["max_dd"], -r["pnl"], -r["win_rate"]),
+    "win_rate": lambda r: (-r["win_rate"], -r["pnl"], r["max_dd"]),
+    "pnl_dd": lambda r: (-(r["pnl"] / r["max_dd"] if r["max_dd"] else r["pnl"]), -r["pnl"]),
+}
+
+# --- bars ---
+
+def load_bars(csv=None, db=None, days=None):
+    """OHLCV DataFrame on an IST-naive DatetimeIndex, from a CSV (time,open,high,low,close,volume) or the ohlcv table."""
+    if csv:
+        df = pd.read_csv(csv)
+        df.index = pd.DatetimeIndex(pd.to_datetime(df.pop("time")))
+        if df.index.tz is not None: df.index = df.index.tz_convert("Asia/Kolkata").tz_localize(None)
+    else:
+        from data.database import DatabaseManager
+        symbol, interval = db
+        start = int(time.time()) - days * 86400 if days else None
+        # Stored as the hub/engine write them: bare symbol, "1m" under its DataManager interval key
+        df = DatabaseManager(db_path=config.DB_PATH).get_ohlcv(symbol.replace("NSE:", ""), config.OHLCV_1M if interval == "1m" else interval, start_ts=start)
+        if df.empty: return df
+        df.index = df.index.tz_convert("Asia/Kolkata").tz_localize(None)
+    if csv and days: df = df[df.index >= df.index[-1] - pd.Timedelta(days=days)]
+    return df[["open", "high", "low", "close", "volume"]].astype(float)
+
+def bar_arrays(df):
+    idx = df.index
+    return {"open": df["open"].to_numpy(), "high": df["high"].to_numpy(), "low": df["low"].to_numpy(),
+            "close": df["close"].to_numpy(), "volume": df["volume"].to_numpy(),
+            "minute": (idx.hour * 60 + idx.minute).to_numpy(), # IST minute of day
+            "day": (idx.normalize().asi8 // 86_400_000_000_000).astype(np.int64)}
+
+# --- indicators (match the pandas/pandas_ta calls in the strategies) ---
+
+def _rolling(x, n, how):
+    return getattr(pd.Series(x).rolling(n), how)().to_numpy()
+
+def _window_rma(x, n, w):
+    """pandas_ta rma (ewm adjust=False) of the last `w` values of x, evaluated at every bar."""
+    a = 1.0 / n
+    b = 1.0 - a
+    weights = a * b ** np.arange(w - 1)
+    out = np.convolve(np.nan_to_num(x), weights)[:len(x)]
+    out[w - 1:] += b ** (w - 1) * x[:len(x) - w + 1]
+    out[:w - 1] = np.nan
+    return out
+
+def window_rsi(close, n, history):
+    """ta.rsi(window)[-1] and [-2] for the `history`-bar window ending at every bar."""
+    d = np.diff(close, prepend=np.nan)
+    pos, neg = np.where(d > 0, d, 0.0), np.where(d < 0, -d, 0.0)
+    pos[0] = neg[0] = np.nan
+    out = []
+    for w in (history - 1, history - 2): # diffs in the window; [-2] sees one fewer
+        p, q = _window_rma(pos, n, w), _window_rma(neg, n, w)
+        with np.errstate(invalid="ignore", divide="ignore"): out.append(100 * p / (p + q))
+    last, prev = out
+    prev = np.concatenate([[np.nan], prev[:-1]])
+    return last, prev
+
+def _per_lane(values, fn):
+    """An indicator that depends on one discrete param: (distinct x bars) table and each lane's row."""
+    uniq, row = np.unique(values, return_inverse=True)
+    return np.vstack([fn(v) for v in uniq.tolist()]), row
+
+# --- kernels: check_setup over all lanes, one bar at a time ---
+
+class BigDogKernel:
+    def __init__(self, bars, p, history, side):
+        self.bars, self.side = bars, side
+        high, low, vol = bars["high"], bars["low"], bars["volume"]
+        self.rh, self.r_row = _per_lane(p["range_bars"], lambda n: _rolling(high, n, "max"))
+        self.rl, _ = _per_lane(p["range_bars"], lambda n: _rolling(low, n, "min"))
+        self.av, self.v_row = _per_lane(p["vol_len"], lambda n: _rolling(vol, n, "mean"))
+        self.ratio, self.mult, self.rr = p["range_ratio"], p["vol_mult"], p["rr"]
+        k = len(self.ratio)
+        self.armed = np.zeros(k, bool)
+        self.hi, self.lo = np.zeros(k), np.zeros(k)
+
+    def step(self, t):
+        c, v = self.bars["close"][t], self.bars["volume"][t]
+        hi, lo = self.rh[:, t][self.r_row], self.rl[:, t][self.r_row]
+        arm = (hi - lo) / c < self.ratio
+        self.hi, self.lo = np.where(arm, hi, self.hi), np.where(arm, lo, self.lo)
+        self.armed |= arm
+        loud = v > self.mult * self.av[:, t][self.v_row]
+        if self.side > 0:
+            fire = self.armed & (c > self.hi) & loud
+            sl, target = self.lo, c + (c - self.lo) * self.rr
+        else:
+            fire = self.armed & (c < self.lo) & loud
+            sl, target = self.hi, c - (self.hi - c) * self.rr
+        self.armed &= ~fire
+        return fire, c, sl, target
+
+class RSIScalperKernel:
+    def __init__(self, bars, p, history, side):
+        self.bars, self.side = bars, side
+        close = bars["close"]
+        rsis = {n: window_rsi(close, n, history) for n in np.unique(p["rsi_len"]).tolist()}
+        self.last, self.row = _per_lane(p["rsi_len"], lambda n: rsis[n][0])
+        self.prev, _ = _per_lane(p["rsi_len"], lambda n: rsis[n][1])
+        self.level = p["oversold_level"] if side > 0 else p["overbought_level"]
+        self.pts = p["target_pts"]
+        self.flag = np.zeros(len(self.pts), bool)
+
+    def step(self, t):
+        b = self.bars
+        o, c = b["open"][t], b["close"][t]
+        r, rp = self.last[:, t][self.row], self.prev[:, t][self.row]
+        if self.side > 0:
+            self.flag |= r < self.level
+            fire = self.flag & (c > o) & (r > rp)
+            sl, target = b["low"][t], c + self.pts
+        else:
+            self.flag |= r > self.level
+            fire = self.flag & (c < o) & (r < rp)
+            sl, target = b["high"][t], c - self.pts
+        self.flag &= ~fire
+        return fire, c, sl, target
+
+class TrendFollowingKernel:
+    """CE side only: pullback entries on the option series in a bullish index trend (no PCR gate)."""
+    def __init__(self, bars, p, history, side, option=None):
+        self.bars, self.opt = bars, option or bars
+        self.sma, self.row = _per_lane(p["sma_len"], lambda n: _rolling(bars["close"], n, "mean"))
+        self.band, self.ratio = p["trend_band"], p["body_ratio"]
+        self.min_range = p["target_range"][:, 0] - p["range_pad"][:, 0]
+        self.max_range = p["target_range"][:, 1] + p["range_pad"][:, 1]
+
+    def step(self, t):
+        bullish = self.bars["close"][t] > self.sma[:, t][self.row] + self.band
+        opt = self.opt
+        o, h, l, c = opt["open"][t], opt["high"][t], opt["low"][t], opt["close"][t]
+        rng = h - l
+        fire = bullish & (c < o) & (self.min_range <= rng) & (rng <= self.max_range) & (abs(c - o) >= self.ratio * rng)
+        return fire, h + 1, l, np.nan
+
+# name -> (kernel, strategy class, side)
+KERNELS = {
+    "BIGDOG_BREAKOUT_LONG": (BigDogKernel, BigDogBreakoutLong, 1),
+    "BIGDOG_BREAKOUT_SHORT": (BigDogKernel, BigDogBreakoutShort, -1),
+    "RSI_SCALPER_LONG": (RSIScalperKernel, RSIScalperLong, 1),
+    "RSI_SCALPER_SHORT": (RSIScalperKernel, RSIScalperShort, -1),
+    "TREND_FOLLOWING": (TrendFollowingKernel, TrendFollowingStrategy, 1),
+}
+
+# --- grid ---
+
+def expand_grid(name, grid, symbol="NIFTY"):
+    """Every combination of `grid` (param -> values) over the strategy's defaults, as a list of dicts."""
+    strat = KERNELS[name][1](symbol)
+    unknown = set(grid) - set(strat.PARAMS)
+    if unknown: raise ValueError(f"{name}: unknown params {sorted(unknown)}; has {sorted(strat.PARAMS)}")
+    names = list(grid)
+    base = dict(strat.params)
+    if "target_range" in base: base["target_range"] = strat.target_range # None -> the symbol's default
+    combos = []
+    for values in itertools.product(*(grid[n] for n in names)):
+        combo = dict(base, **dict(zip(names, values)))
+        combos.append({k: tuple(v) if isinstance(v, list) else v for k, v in combo.items()})
+    return combos
+
+def _lanes(combos):
+    return {k: np.asarray([c[k] for c in combos]) for k in combos[0]}
+
+# --- simulation ---
+
+def simulate(name, bars, combos, history=100, cost=0.0, square_off=None):
+    """Run one chunk of combinations; returns per-lane trades, wins, pnl and max drawdown (points)."""
+    kernel_cls, _, side = KERNELS[name]
+    kernel = kernel_cls(bars, _lanes(combos), history, side)
+    hh, mm = map(int, (square_off or config.SQUARE_OFF_TIME).split(":"))
+    cutoff = hh * 60 + mm
+    high, low, close, minute, day = bars["high"], bars["low"], bars["close"], bars["minute"], bars["day"]
+    k = len(combos)
+    in_pos = np.zeros(k, bool)
+    entry, sl, target = np.zeros(k), np.zeros(k), np.zeros(k)
+    trades, wins = np.zeros(k, np.int64), np.zeros(k, np.int64)
+    pnl, peak, max_dd = np.zeros(k), np.zeros(k), np.zeros(k)
+
+    def book(mask, price):
+        nonlocal pnl, peak, max_dd
+        gain = side * (price - entry) - cost
+        trades[mask] += 1
+        wins[mask & (gain > 0)] += 1
+        pnl = np.where(mask, pnl + gain, pnl)
+        peak = np.maximum(peak, pnl)
+        max_dd = np.maximum(max_dd, peak - pnl)
+        in_pos[mask] = False
+
+    for t in range(history - 1, len(close)):
+        if in_pos.any():
+            if day[t] != day[t - 1]: book(in_pos.copy(), close[t - 1]) # held over a gap: flat at the last close
+            if side > 0: stop, hit = in_pos & (low[t] <= sl), in_pos & (high[t] >= target)
+            else: stop, hit = in_pos & (high[t] >= sl), in_pos & (low[t] <= target)
+            hit &= ~stop
+            if stop.any(): book(stop, sl)
+            if hit.any(): book(hit, target)
+            if minute[t] >= cutoff and in_pos.any(): book(in_pos.copy(), close[t])
+        fire, e, s, g = kernel.step(t)
+        new = fire & ~in_pos
+        if minute[t] < cutoff and new.any():
+            in_pos |= new
+            entry, sl = np.where(new, e, entry), np.where(new, s, sl)
+            target = np.where(new, g, target) # nan target: stop or square-off only
+    if in_pos.any(): book(in_pos.copy(), close[-1])
+    return {"trades": trades, "wins": wins, "pnl": pnl, "max_dd": max_dd}
+
+_bars = None
+
+def _init_worker(bars):
+    global _bars
+    _bars = bars
+
+def _run_chunk(args):
+    name, combos, history, cost = args
+    return simulate(name, _bars, combos, history, cost)
+
+def sweep(name, bars, combos, history=100, cost=0.0, workers=None, chunk=250):
+    """All combinations, `chunk` lanes per task across `workers` processes; results in grid order."""
+    chunks = [combos[i:i + chunk] for i in range(0, len(combos), chunk)]
+    tasks = [(name, c, history, cost) for c in chunks]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(chunks) == 1:
+        _init_worker(bars)
+        parts = [_run_chunk(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), initializer=_init_worker, initargs=(bars,)) as pool:
+            parts = list(pool.map(_run_chunk, tasks))
+    results = []
+    for combos_part, part in zip(chunks, parts):
+        for i, combo in enumerate(combos_part):
+            n = int(part["trades"][i])
+            results.append({"params": combo, "trades": n, "win_rate": round(float(part["wins"][i]) / n, 4) if n else 0.0,
+                            "pnl": round(float(part["pnl"][i]), 2), "max_dd": round(float(part["max_dd"][i]), 2),
+                            "avg": round(float(part["pnl"][i]) / n, 2) if n else 0.0})
+    return results
+
+def rank(results, by="pnl", min_trades=1):
+    return sorted((r for r in results if r["trades"] >= min_trades), key=RANKINGS[by])
+
+# --- checks ---
+
+def verify(name, df, combo, history=100):
+    """Signals of the kernel vs the real check_setup walked over `history`-bar windows, for one combination."""
+    _, cls, _ = KERNELS[name]
+    bars = bar_arrays(df)
+    kernel = KERNELS[name][0](bars, _lanes([combo]), history, KERNELS[name][2])
+    strat = cls()
+    strat.set_params(**{k: v for k, v in combo.items() if k in strat.PARAMS})
+    got, want = [], []
+    for t in range(history - 1, len(df)):
+        fire, e, s, g = kernel.step(t)
+        if fire[0]: got.append((t, round(float(np.broadcast_to(e, 1)[0]), 4), round(float(np.broadcast_to(s, 1)[0]), 4)))
+        window = df.iloc[t + 1 - history:t + 1]
+        setup = strat.check_setup_unified(window, window, None, "CE") if name == "TREND_FOLLOWING" else strat.check_setup(window)
+        if setup: want.append((t, round(float(setup["entry_price"]), 4), round(float(setup["sl"]), 4)))
+    return got, want
+
+def _print(results, top):
+    keys = sorted({k for r in results for k in r["params"]})
+    varied = [k for k in keys if len({repr(r["params"][k]) for r in results}) > 1] or keys
+    print(" ".join(f"{k:>12s}" for k in varied) + f" {'trades':>7s} {'win %':>6s} {'pnl':>9s} {'max dd':>8s} {'avg':>7s}")
+    for r in results[:top]:
+        print(" ".join(f"{str(r['params'][k]):>12s}" for k in varied) +
+              f" {r['trades']:7d} {r['win_rate'] * 100:6.1f} {r['pnl']:9.1f} {r['max_dd']:8.1f} {r['avg']:7.2f}")
+
+def main(args):
+    df = load_bars(args.csv, args.db, args.days)
+    if df.empty:
+        print("no bars")
+        return 1
+    grid = args.grid
+    if grid.startswith("@") or os.path.exists(grid):
+        with open(grid.lstrip("@")) as f: grid = f.read()
+    combos = expand_grid(args.strategy, json.loads(grid), args.symbol)
+    print(f"{args.strategy}: {len(combos)} combinations over {len(df)} bars "
+          f"({df.index[0]:%Y-%m-%d} .. {df.index[-1]:%Y-%m-%d})")
+    if args.verify:
+        got, want = verify(args.strategy, df, combos[0], args.history)
+        same = got == want
+        print(f"kernel {len(got)} vs check_setup {len(want)} signals: {'MATCH' if same else 'DIFFERENT'}")
+        if not same:
+            first = next((i for i, (a, b) in enumerate(zip(got, want)) if a != b), min(len(got), len(want)))
+            print(f"first difference at #{first}: {got[first] if first < len(got) else '-'} vs {want[first] if first < len(want) else '-'}")
+        return 0 if same else 1
+    t0 = time.perf_counter()
+    results = sweep(args.strategy, bar_arrays(df), combos, args.history, args.cost, args.workers, args.chunk)
+    print(f"swept in {time.perf_counter() - t0:.1f}s\n")
+    ranked = rank(results, args.rank, args.min_trades)
+    _print(ranked, args.top)
+    if args.out:
+        pd.DataFrame([dict(r["params"], **{k: v for k, v in r.items() if k != "params"}) for r in ranked]).to_csv(args.out, index=False)
+        print(f"\nwrote {args.out}")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("strategy", choices=sorted(KERNELS))
+    parser.add_argument("--grid", default="{}", help="JSON object param -> list of values, or a path to one")
+    parser.add_argument("--csv")
+    parser.add_argument("--db", nargs=2, metavar=("SYMBOL", "INTERVAL"))
+    parser.add_argument("--days", type=int, help="only the last N days of bars")
+    parser.add_argument("--symbol", default="NIFTY", help="symbol defaults for TREND_FOLLOWING's target_range")
+    parser.add_argument("--history", type=int, default=100, help="bars each check sees (hub keeps 100)")
+    parser.add_argument("--cost", type=float, default=0.0, help="points per round trip")
+    parser.add_argument("--rank", choices=sorted(RANKINGS), default="pnl")
+    parser.add_argument("--min-trades", type=int, default=10)
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--chunk", type=int, default=250, help="combinations per worker task")
+    parser.add_argument("--out", help="write every ranked result to this CSV")
+    parser.add_argument("--verify", action="store_true", help="check the kernel against check_setup for the first combination")
+    args = parser.parse_args()
+    if not (args.csv or args.db): parser.error("one of --csv or --db is required")
+    sys.exit(main(args))
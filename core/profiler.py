@@ -0,0 +1,112 @@
+import io
+import time
+import heapq
+import pstats
+import cProfile
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+class StrategyCost:
+    __slots__ = ("calls", "total_ms", "max_ms", "last_ms", "overruns", "streak", "errors", "slow")
+
+    def __init__(self):
+        self.calls, self.total_ms, self.max_ms, self.last_ms = 0, 0.0, 0.0, 0.0
+        self.overruns, self.streak, self.errors = 0, 0, 0
+        self.slow = False
+
+    def to_dict(self):
+        return {
+            "calls": self.calls, "mean_ms": round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+            "max_ms": round(self.max_ms, 3), "last_ms": round(self.last_ms, 3),
+            "overruns": self.overruns, "errors": self.errors, "deprioritized": self.slow
+        }
+
+class StrategyProfiler:
+    """
+    Wall time per strategy per call against a per-candle budget.
+    Strategies that overrun `strikes` times in a row are deprioritized (run after the
+    fast ones) until they come back under budget. In profiling mode every Nth call,
+    and every call of a deprioritized strategy, runs under cProfile and the slowest
+    samples are kept.
+    """
+    def __init__(self, budget_ms=5.0, strikes=3, enabled=False, sample_every=20, keep=10):
+        self.budget_ms, self.strikes = budget_ms, strikes
+        self.enabled, self.sample_every, self.keep = enabled, sample_every, keep
+        self.costs = {}
+        self.samples = [] # min-heap of (ms, seq, record) -> keeps the slowest `keep`
+        self._seq = 0
+
+    def configure(self, enabled=None, budget_ms=None, strikes=None, sample_every=None, reset=False):
+        if enabled is not None: self.enabled = enabled
+        if budget_ms is not None: self.budget_ms = budget_ms
+        if strikes is not None: self.strikes = strikes
+        if sample_every is not None: self.sample_every = max(1, sample_every)
+        if reset: self.costs, self.samples = {}, []
+
+    def order(self, strategies):
+        """Fast strategies first, deprioritized ones last; stable otherwise."""
+        costs = self.costs
+        return sorted(strategies, key=lambda s: costs[s.name].slow if s.name in costs else False)
+
+    def run(self, name, fn, *args):
+        """Returns (result, elapsed_us). A raising strategy counts as no setup."""
+        cost = self.costs.get(name)
+        if cost is None: cost = self.costs[name] = StrategyCost()
+        prof = None
+        if self.enabled and (cost.slow or cost.calls % self.sample_every == 0):
+            prof = cProfile.Profile()
+            prof.enable()
+        t0 = time.perf_counter_ns()
+        try:
+            result = fn(*args)
+        except Exception as e:
+            cost.errors += 1
+            if cost.errors == 1 or cost.errors % 100 == 0:
+                logger.error(f"Strategy {name} raised ({cost.errors} so far): {e!r}")
+            result = None
+        finally:
+            elapsed_ns = time.perf_counter_ns() - t0
+            if prof: prof.disable()
+        ms = elapsed_ns / 1e6
+        self._observe(name, cost, ms)
+        if prof: self._keep_sample(name, ms, prof)
+        return result, elapsed_ns / 1000
+
+    def _observe(self, name, cost, ms):
+        cost.calls += 1
+        cost.total_ms += ms
+        cost.last_ms = ms
+        if ms > cost.max_ms: cost.max_ms = ms
+        if ms > self.budget_ms:
+            cost.overruns += 1
+            cost.streak += 1
+            if not cost.slow and cost.streak >= self.strikes:
+                cost.slow = True
+                logger.warning(f"Strategy {name} over {self.budget_ms}ms budget {cost.streak}x in a row; deprioritized")
+        else:
+            cost.streak = 0
+            if cost.slow:
+                cost.slow = False
+                logger.info(f"Strategy {name} back under budget; restored")
+
+    def _keep_sample(self, name, ms, prof):
+        if len(self.samples) >= self.keep and ms <= self.samples[0][0]: return
+        out = io.StringIO()
+        pstats.Stats(prof, stream=out).sort_stats("cumulative").print_stats(15)
+        self._seq += 1
+        record = {"strategy": name, "ms": round(ms, 3), "at": datetime.now().isoformat(timespec="seconds"), "profile": out.getvalue()}
+        if len(self.samples) >= self.keep: heapq.heapreplace(self.samples, (ms, self._seq, record))
+        else: heapq.heappush(self.samples, (ms, self._seq, record))
+
+    def report(self, with_profiles=False):
+        ranked = sorted(self.costs.items(), key=lambda kv: kv[1].total_ms, reverse=True)
+        out = {
+            "enabled": self.enabled, "budget_ms": self.budget_ms, "strikes": self.strikes,
+            "strategies": {name: c.to_dict() for name, c in ranked},
+            "deprioritized": [name for name, c in ranked if c.slow]
+        }
+        slowest = [r for _, _, r in sorted(self.samples, reverse=True)]
+        out["slowest"] = slowest if with_profiles else [{k: v for k, v in r.items() if k != "profile"} for r in slowest]
+        return out
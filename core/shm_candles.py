@@ -0,0 +1,118 @@
+import itertools
+import os
+from datetime import datetime
+from functools import lru_cache
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+FIELDS = ("minute", "open", "high", "low", "close", "volume", "oi")
+F_MINUTE = 0
+HEADER = 4 # int64: seq, rows, newest minute, capacity
+
+_names = itertools.count()
+
+class SharedBars:
+    """
+    One instrument's bars in a shared memory segment: an int64 header and a float64
+    [field x capacity] table, oldest row first, `minute` (epoch minute) as field 0.
+
+    seq in the header is a seqlock: the writer makes it odd before touching the table and
+    even again after, so a reader that sees the same even seq before and after its copy
+    has a consistent snapshot. Only the hub writes; any number of processes read.
+    """
+    def __init__(self, shm, owner):
+        self.shm, self.owner = shm, owner
+        self.name = shm.name
+        self.header = np.ndarray((HEADER,), dtype=np.int64, buffer=shm.buf)
+        self.capacity = int(self.header[3])
+        self.table = np.ndarray((len(FIELDS), self.capacity), dtype=np.float64, buffer=shm.buf, offset=HEADER * 8)
+
+    @classmethod
+    def create(cls, capacity, prefix="osc"):
+        name = f"{prefix}_{os.getpid()}_{next(_names)}"
+        shm = shared_memory.SharedMemory(name=name, create=True, size=HEADER * 8 + len(FIELDS) * capacity * 8)
+        header = np.ndarray((HEADER,), dtype=np.int64, buffer=shm.buf)
+        header[:] = (0, 0, -1, capacity)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        # The hub owns the segment; keep this process's resource tracker from unlinking it at exit
+        try: shm = shared_memory.SharedMemory(name=name, track=False) # 3.13+
+        except TypeError:
+            shm = shared_memory.SharedMemory(name=name)
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return cls(shm, owner=False)
+
+    @property
+    def seq(self):
+        return int(self.header[0])
+
+    def write(self, table):
+        """Replace the bars with `table` ([field x rows], newest last; extra rows keep the newest). Returns the new seq."""
+        rows = min(table.shape[1], self.capacity)
+        header = self.header
+        header[0] += 1 # odd: write in progress
+        self.table[:, :rows] = table[:, table.shape[1] - rows:]
+        header[1] = rows
+        header[2] = int(table[F_MINUTE, -1]) if rows else -1
+        header[0] += 1
+        return int(header[0])
+
+    def read(self, retries=10000):
+        """(table copy, seq) for a consistent version; retries while the writer is mid-update."""
+        header = self.header
+        for _ in range(retries):
+            seq = int(header[0])
+            if seq & 1: continue
+            table = self.table[:, :int(header[1])].copy()
+            if int(header[0]) == seq: return table, seq
+        raise TimeoutError(f"shared bars {self.name}: writer did not finish")
+
+    def close(self):
+        self.header = self.table = None
+        self.shm.close()
+        if self.owner: self.shm.unlink()
+
+@lru_cache(maxsize=4096)
+def iso_minute(iso):
+    # Bar times repeat across boundaries, so each is parsed about once
+    return int(datetime.fromisoformat(iso).timestamp()) // 60
+
+def history_table(history):
+    """Hub candle dicts (UTC ISO `time`) -> [field x bars] table."""
+    table = np.full((len(FIELDS), len(history)), np.nan)
+    if not history: return table
+    table[F_MINUTE] = [iso_minute(c['time']) for c in history]
+    for i, f in enumerate(FIELDS[1:], 1):
+        table[i] = [c.get(f, np.nan) for c in history]
+    return table
+
+def table_frame(table):
+    """[field x bars] table -> OHLCV frame on an IST DatetimeIndex, minutes without a trade dropped (engine.candles_frame shape)."""
+    import pandas as pd # engine side; the hub imports this module for SharedBars only
+    idx = pd.to_datetime(table[F_MINUTE].astype(np.int64) * 60, unit="s", utc=True).tz_convert("Asia/Kolkata").tz_localize(None)
+    df = pd.DataFrame(table[1:6].T, index=idx, columns=FIELDS[1:6])
+    return df[df['close'].notna()]
+
+class SharedBarsReader:
+    """Engine side: segments attached on first use and dropped once the hub stops naming them."""
+    def __init__(self):
+        self.segments = {}
+
+    def segment(self, name):
+        seg = self.segments.get(name)
+        if seg is None: seg = self.segments[name] = SharedBars.attach(name)
+        return seg
+
+    def seq(self, name):
+        return self.segment(name).seq
+
+    def read(self, name, min_seq=0):
+        table, seq = self.segment(name).read()
+        if seq < min_seq: raise RuntimeError(f"shared bars {name}: seq {seq} older than notified {min_seq}")
+        return table
+
+    def retain(self, names):
+        for name in set(self.segments) - set(names): self.segments.pop(name).close()
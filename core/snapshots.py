@@ -0,0 +1,103 @@
+import glob
+import logging
+import os
+import pickle
+import struct
+import zlib
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"SNP1"
+RECORD = struct.Struct("<II") # payload length, crc32
+
+class SnapshotStore:
+    """
+    Crash-safe runtime state of one service under `root`: `snapshot.bin` (zlib pickle with a
+    CRC, replaced atomically) plus append-only journals of the events since. Journals are
+    numbered: `rotate()` starts the next one at the instant the state is captured, and the
+    snapshot records the first journal it does not cover, so a crash between the two never
+    loses or double-applies an event. Old journals go once a newer snapshot is on disk.
+
+        gen = store.rotate()                     # on the loop, together with capturing the state
+        store.save(pickle.dumps(state), gen)     # on a pool thread
+        store.append(("event", ...))             # on the loop, between snapshots
+        state, events = store.load()             # at startup
+    """
+    def __init__(self, root, header=None):
+        self.root = root
+        self.header = header # () -> record written first in every journal, e.g. the session it belongs to
+        os.makedirs(root, exist_ok=True)
+        gens = self._journals()
+        self.gen = gens[-1] + 1 if gens else 1 # a restarted process never appends to a journal it may have torn
+        self.journal = None
+
+    def _journals(self):
+        return sorted(int(os.path.basename(p)[8:-4]) for p in glob.glob(os.path.join(self.root, "journal.*.bin")))
+
+    def _path(self, gen):
+        return os.path.join(self.root, f"journal.{gen}.bin")
+
+    def append(self, event):
+        """Framed pickle of `event`, flushed to the OS (survives a process crash; fsync'd on rotate)."""
+        if self.journal is None:
+            self.journal = open(self._path(self.gen), "ab")
+            if self.header: self._write(self.header())
+        self._write(event)
+        self.journal.flush()
+
+    def _write(self, event):
+        data = pickle.dumps(event, protocol=pickle.HIGHEST_PROTOCOL)
+        self.journal.write(RECORD.pack(len(data), zlib.crc32(data)) + data)
+
+    def rotate(self):
+        """Start a new journal; returns its number for the snapshot of the state as of now."""
+        if self.journal is not None:
+            os.fsync(self.journal.fileno())
+            self.journal.close()
+            self.journal = None
+        self.gen += 1
+        return self.gen
+
+    def save(self, data, gen):
+        """Write a snapshot (pickled state) whose events continue in journal `gen`; drops the journals before it."""
+        blob = zlib.compress(data, 1)
+        tmp = os.path.join(self.root, "snapshot.bin.tmp")
+        with open(tmp, "wb") as f:
+            f.write(MAGIC + struct.pack("<QI", gen, zlib.crc32(blob)) + blob)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(self.root, "snapshot.bin"))
+        for old in self._journals():
+            if old < gen: os.remove(self._path(old))
+
+    def load(self):
+        """(state or None, [events since]); a corrupt snapshot is ignored, a torn journal tail is dropped."""
+        state, start = None, 0
+        try:
+            with open(os.path.join(self.root, "snapshot.bin"), "rb") as f: raw = f.read()
+            gen, crc = struct.unpack("<QI", raw[4:16])
+            if raw[:4] == MAGIC and zlib.crc32(raw[16:]) == crc: state, start = pickle.loads(zlib.decompress(raw[16:])), gen
+            else: logger.warning("Snapshot failed its checksum; starting from the journals alone")
+        except FileNotFoundError:
+            pass
+        events = []
+        for gen in self._journals():
+            if gen >= start: events.extend(self._records(self._path(gen)))
+        return state, events
+
+    def _records(self, path):
+        with open(path, "rb") as f: raw = f.read()
+        pos = 0
+        while pos + RECORD.size <= len(raw):
+            n, crc = RECORD.unpack_from(raw, pos)
+            data = raw[pos + RECORD.size:pos + RECORD.size + n]
+            if len(data) < n or zlib.crc32(data) != crc: # crashed mid-append
+                logger.warning(f"Dropping torn record at {path}:{pos}")
+                return
+            yield pickle.loads(data)
+            pos += RECORD.size + n
+
+    def close(self):
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
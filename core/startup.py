@@ -0,0 +1,62 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+class StartupReport:
+    """
+    How a service's cold start was spent: consecutive phases (imports, app setup, startup hooks)
+    via `mark`, and clients built lazily on first use via `phase`, each with its duration and
+    its offset from the moment this module was imported.
+    """
+    def __init__(self):
+        self.t0 = self.last = time.perf_counter()
+        self.phases = [] # (name, ms, at_ms)
+        self.ready_ms = None
+
+    def _add(self, name, start, end):
+        self.phases.append((name, round((end - start) * 1000, 1), round((start - self.t0) * 1000, 1)))
+
+    def mark(self, name):
+        """Close the phase that ran since the previous mark."""
+        now = time.perf_counter()
+        self._add(name, self.last, now)
+        self.last = now
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try: yield
+        finally: self._add(name, start, time.perf_counter())
+
+    def ready(self, service):
+        self.mark("startup")
+        self.ready_ms = round((self.last - self.t0) * 1000, 1)
+        logger.info(f"{service} ready in {self.ready_ms} ms (" + ", ".join(f"{n} {ms} ms" for n, ms, _ in self.phases) + ")")
+
+    def report(self):
+        return {"ready_ms": self.ready_ms, "phases": [{"name": n, "ms": ms, "at_ms": at} for n, ms, at in sorted(self.phases, key=lambda p: p[2])]}
+
+class Lazy:
+    """Module-level client built on first attribute access, so importing a service never connects or logs in anywhere."""
+    def __init__(self, name, factory):
+        self._name, self._factory, self._obj = name, factory, None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self):
+        return self._obj is not None
+
+    def load(self):
+        """Build it now (e.g. from a pool thread after startup, so the first request does not pay for it)."""
+        with self._lock:
+            if self._obj is None:
+                with startup.phase(self._name): self._obj = self._factory()
+        return self._obj
+
+    def __getattr__(self, attr):
+        return getattr(self._obj if self._obj is not None else self.load(), attr)
+
+startup = StartupReport() # per process: import this first so t0 is the start of the service's imports
@@ -1,6 +1,9 @@
 import uuid
 from datetime import datetime, timezone
 import numpy as np
+import config
+from core.utils import calculate_buildup
+from data.processing.session_analytics import SessionAnalytics
 
 DEFAULT_TICK = {
     "ltp": 0, "ltq": 0, "atp": 0, "vtt": 0, "oi": 0, "oiChange": 0, "oiChangePct": 0,
@@ -9,32 +12,164 @@ DEFAULT_TICK = {
     "depth": {"bids": [], "asks": []}
 }
 
+# Instrument roles for the hub's key -> record dispatch table
+ROLE_INDEX, ROLE_CE, ROLE_PE, ROLE_CHAIN_CE, ROLE_CHAIN_PE = range(5)
+PANEL_ROLES = (ROLE_INDEX, ROLE_CE, ROLE_PE)
+PANEL_NAMES = {"underlying": ROLE_INDEX, "ceOption": ROLE_CE, "peOption": ROLE_PE}
+
+_EMPTY = {}
+_NO_DEPTH = ()
+
+class InstrumentState:
+    """Per-instrument tick record, updated in place so the tick path allocates nothing."""
+    __slots__ = (
+        "key", "sym", "role", "strike", "side",
+        "ltp", "ltq", "atp", "vtt", "oi", "start_oi", "oi_change", "iv", "tbq", "tsq", "buildup",
+        "delta", "theta", "gamma", "vega", "rho", "bid_ask", "best_bid", "best_ask", "spread", "imbalance",
+        "candle_start_vtt", "candle_minute", "ticks", "session",
+        "bar_minute", "bar_open", "bar_high", "bar_low", "bar_close", "bar_start_vtt"
+    )
+
+    def __init__(self, key, sym, role, strike=None):
+        self.key, self.sym, self.role, self.strike = key, sym, role, strike
+        self.side = 'callOi' if role in (ROLE_CE, ROLE_CHAIN_CE) else ('putOi' if role in (ROLE_PE, ROLE_CHAIN_PE) else None)
+        self.ltp, self.ltq, self.atp, self.vtt = 0, 0, 0.0, 0
+        self.oi, self.start_oi, self.oi_change = 0, None, 0
+        self.iv, self.tbq, self.tsq = 0.0, 0, 0
+        self.buildup = "Neutral"
+        self.delta = self.theta = self.gamma = self.vega = self.rho = 0
+        self.bid_ask = _NO_DEPTH # raw marketLevel.bidAskQuote, materialized only for viewed instruments
+        self.best_bid = self.best_ask = self.spread = self.imbalance = 0.0
+        self.candle_start_vtt, self.candle_minute = 0, None
+        self.ticks = 0
+        self.session = None # SessionAnalytics, shared with MarketState.analytics
+        # Bar in progress for the chain candle store
+        self.bar_minute, self.bar_start_vtt = None, 0
+        self.bar_open = self.bar_high = self.bar_low = self.bar_close = 0.0
+
+    def update(self, data, ltp):
+        self.ticks += 1
+        oi = int(data.get('oi', 0))
+        if self.start_oi is None: self.start_oi = oi # unless restored from the session's snapshot
+        if self.ticks == 1: prev_p, prev_oi = ltp, oi
+        else: prev_p, prev_oi = self.ltp, self.oi
+        self.buildup = calculate_buildup(ltp - prev_p, oi - prev_oi)
+
+        self.ltp, self.oi, self.oi_change = ltp, oi, oi - self.start_oi
+        self.ltq = int(data.get('ltpc', _EMPTY).get('ltq', 0))
+        self.atp = float(data.get('atp', ltp))
+        self.vtt = int(data.get('vtt', 0))
+        self.iv = float(data.get('iv', 0))
+        self.tbq, self.tsq = int(data.get('tbq', 0)), int(data.get('tsq', 0))
+
+        greeks = data.get('optionGreeks')
+        if greeks:
+            self.delta, self.theta, self.gamma = greeks.get('delta', 0), greeks.get('theta', 0), greeks.get('gamma', 0)
+            self.vega, self.rho = greeks.get('vega', 0), greeks.get('rho', 0)
+
+        bid_ask = data.get('marketLevel', _EMPTY).get('bidAskQuote', _NO_DEPTH)
+        self.bid_ask = bid_ask
+        if bid_ask:
+            # Top of book only; the full ladder stays raw until someone looks at it
+            top = bid_ask[0]
+            bid_p, ask_p = top.get('bidP', 0), top.get('askP', 0)
+            bid_q, ask_q = int(top.get('bidQ', 0)), int(top.get('askQ', 0)) # int64 arrives as str from the SDK
+            self.best_bid, self.best_ask = bid_p, ask_p
+            self.spread = ask_p - bid_p if bid_p and ask_p else 0.0
+            self.imbalance = (bid_q - ask_q) / (bid_q + ask_q) if (bid_q + ask_q) else 0.0
+
+    def top_of_book(self):
+        return {"best_bid": self.best_bid, "best_ask": self.best_ask, "spread": round(self.spread, 2), "imbalance": round(self.imbalance, 4)}
+
+    def depth(self):
+        bid_ask = self.bid_ask
+        return {
+            "bids": [{"price": b.get('bidP', 0), "quantity": int(b.get('bidQ', 0)), "orders": 0} for b in bid_ask],
+            "asks": [{"price": a.get('askP', 0), "quantity": int(a.get('askQ', 0)), "orders": 0} for a in bid_ask]
+        }
+
+    def to_tick(self, with_depth=True):
+        """Materialize the cockpit `tick` shape (broadcast/engine time only)."""
+        start_oi = self.start_oi or 0
+        return {
+            "ltp": self.ltp, "ltq": self.ltq, "atp": self.atp, "vtt": self.vtt,
+            "oi": self.oi, "oiChange": self.oi_change,
+            "oiChangePct": round((self.oi_change/start_oi*100) if start_oi>0 else 0, 2),
+            "iv": self.iv, "tbq": self.tbq, "tsq": self.tsq, "buildup": self.buildup,
+            "greeks": {"delta": self.delta, "theta": self.theta, "gamma": self.gamma, "vega": self.vega, "rho": self.rho},
+            "depth": self.depth() if with_depth else {"bids": [], "asks": []}
+        }
+
 class MarketState:
     def __init__(self):
-        self.underlying = {"history": [], "tick": DEFAULT_TICK.copy(), "signals": []}
-        self.ceOption = {"history": [], "tick": DEFAULT_TICK.copy(), "signals": []}
-        self.peOption = {"history": [], "tick": DEFAULT_TICK.copy(), "signals": []}
+        self.underlying = {"history": [], "signals": []}
+        self.ceOption = {"history": [], "signals": []}
+        self.peOption = {"history": [], "signals": []}
         self.oiData = []
         self.pcr = 1.0
         self.pcrChange = 0.0
 
         # Internal tracking
-        self.last_oi = {} # symbol -> last_oi
-        self.last_price = {} # symbol -> last_price
-        self.session_start_oi = {} # symbol -> first oi of session
-        self.candle_start_vtt = {} # symbol -> vtt at start of current candle
+        self.instruments = {} # key -> InstrumentState (the tick dispatch table)
+        self.panels = {ROLE_INDEX: self.underlying, ROLE_CE: self.ceOption, ROLE_PE: self.peOption}
+        self.panel_records = {} # role -> InstrumentState shown in that panel
+        self.oi_rows = {} # strike -> row in oiData
+        self.total_call_oi, self.total_put_oi = 0, 0
         self.instrument_keys = {} # sym -> key
         self.rev_instrument_keys = {} # key -> sym
+        self.hidden_panels = set() # panel roles the client has collapsed (no depth needed)
+        self.depth_keys = set() # extra chain keys whose depth the client is viewing
+        self.timeframes = {} # panel role -> TimeframeRollup (bars above 1m)
+        self.session_start_oi = {} # key -> OI at the session's first tick, the OI-change baseline (kept across re-centers and restarts)
+        self.analytics = {} # key -> SessionAnalytics (kept across re-centers, like the OI baselines)
+        self.session_levels = None # {"index", "ce", "pe", "oi"} levels as of the last closed boundary
+
+    def register(self, key, sym, role, strike=None):
+        rec = InstrumentState(key, sym, role, strike)
+        rec.start_oi = self.session_start_oi.get(key)
+        if config.SESSION_ANALYTICS:
+            rec.session = self.analytics.get(key)
+            if rec.session is None: rec.session = self.analytics[key] = SessionAnalytics(config.PROFILE_BUCKET_PCT)
+        self.instruments[key] = rec
+        self.instrument_keys[sym] = key
+        self.rev_instrument_keys[key] = sym
+        if role in PANEL_ROLES: self.panel_records[role] = rec
+        return rec
+
+    def unregister(self, key):
+        rec = self.instruments.pop(key, None)
+        if rec is None: return None
+        if self.instrument_keys.get(rec.sym) == key: del self.instrument_keys[rec.sym]
+        self.rev_instrument_keys.pop(key, None)
+        self.depth_keys.discard(key)
+        return rec
+
+    def set_view(self, hidden_panels=(), depth_keys=()):
+        self.hidden_panels = set(hidden_panels)
+        self.depth_keys = {k for k in depth_keys if k in self.instruments}
+
+    def panel_history(self, role, tf=1):
+        if tf == 1: return self.panels[role]['history']
+        rollup = self.timeframes.get(role)
+        return rollup.history.get(tf, []) if rollup else []
+
+    def panel_tick(self, role):
+        rec = self.panel_records.get(role)
+        return rec.to_tick(with_depth=role not in self.hidden_panels) if rec else DEFAULT_TICK
 
     def to_dict(self):
-        return {
-            "underlying": self.underlying,
-            "ceOption": self.ceOption,
-            "peOption": self.peOption,
+        out = {
+            "underlying": dict(self.underlying, tick=self.panel_tick(ROLE_INDEX)),
+            "ceOption": dict(self.ceOption, tick=self.panel_tick(ROLE_CE)),
+            "peOption": dict(self.peOption, tick=self.panel_tick(ROLE_PE)),
             "oiData": self.oiData,
             "pcr": self.pcr,
             "pcrChange": self.pcrChange
         }
+        if self.session_levels: out["session"] = self.session_levels
+        if self.depth_keys:
+            out["depth"] = {self.instruments[k].sym: self.instruments[k].depth() for k in self.depth_keys}
+        return out
 
 def clean_json(obj):
     if isinstance(obj, dict): return {k: clean_json(v) for k, v in obj.items()}
@@ -2,15 +2,25 @@ import pandas as pd
 import pandas_ta as ta
 
 class BaseStrategy:
-    def __init__(self, name, symbol_type="BANKNIFTY", is_index_driven=False):
+    PARAMS = {} # tunable thresholds and their defaults; core.param_sweep searches over these
+
+    def __init__(self, name, symbol_type="BANKNIFTY", is_index_driven=False, timeframe=1):
         self.name = name
         self.symbol_type = symbol_type
         self.is_index_driven = is_index_driven
+        self.timeframe = timeframe # bar size in minutes this strategy evaluates on
         self.vars = {} # Dictionary to store strategy-specific persistent variables
+        self.params = dict(self.PARAMS)
 
     def update_params(self, symbol_type):
         self.symbol_type = symbol_type
 
+    def set_params(self, **params):
+        unknown = set(params) - set(self.PARAMS)
+        if unknown: raise ValueError(f"{self.name}: unknown params {sorted(unknown)}")
+        self.params.update(params)
+        self.update_params(self.symbol_type)
+
     def get_indicators(self, df):
         """Calculate necessary indicators for the strategy."""
         return df
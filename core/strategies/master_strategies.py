@@ -12,6 +12,14 @@ def get_prev_day_close(df):
         return prev_days['close'].iloc[-1]
     return None
 
+def session_vwap(df, pcr_insights=None):
+    """VWAP of the session so far: the hub's tick-level one when it sent it, else from the bars since the last bar's day opened."""
+    levels = ((pcr_insights or {}).get('session') or {}).get('index')
+    if levels and levels.get('vwap') is not None: return levels['vwap']
+    if isinstance(df.index, pd.DatetimeIndex): df = df[df.index.normalize() == df.index[-1].normalize()]
+    volume = df['volume'].sum()
+    return (df['close'] * df['volume']).sum() / volume if volume > 0 else np.nan
+
 class BBMeanReversionLong(BaseStrategy):
     def __init__(self, symbol_type="BANKNIFTY"):
         super().__init__("BB_MEAN_REVERSION_LONG", symbol_type, is_index_driven=True)
@@ -91,63 +99,69 @@ class BBMeanReversionShort(BaseStrategy):
         return None
 
 class BigDogBreakoutLong(BaseStrategy):
+    PARAMS = {"range_bars": 10, "range_ratio": 0.002, "vol_len": 20, "vol_mult": 1.8, "rr": 3}
+
     def __init__(self, symbol_type="BANKNIFTY"):
         super().__init__("BIGDOG_BREAKOUT_LONG", symbol_type, is_index_driven=True)
 
     def check_setup(self, df, pcr_insights=None):
         if df is None or len(df) < 20: return None
 
-        last_10 = df.iloc[-10:]
+        p = self.params
+        last_10 = df.iloc[-p['range_bars']:]
         range_high = last_10['high'].max()
         range_low = last_10['low'].min()
         price = df['close'].iloc[-1]
 
-        if (range_high - range_low) / price < 0.002:
+        if (range_high - range_low) / price < p['range_ratio']:
             self.vars['range_high'] = range_high
             self.vars['range_low'] = range_low
 
         if 'range_high' in self.vars:
-            avg_vol = df['volume'].rolling(20).mean().iloc[-1]
+            avg_vol = df['volume'].rolling(p['vol_len']).mean().iloc[-1]
             last_candle = df.iloc[-1]
-            if last_candle['close'] > self.vars['range_high'] and last_candle['volume'] > 1.8 * avg_vol:
+            if last_candle['close'] > self.vars['range_high'] and last_candle['volume'] > p['vol_mult'] * avg_vol:
                 rl = self.vars['range_low']
                 self.reset_vars()
                 return {
                     "type": "LONG",
                     "entry_price": last_candle['close'],
                     "sl": rl,
-                    "target": last_candle['close'] + (last_candle['close'] - rl) * 3,
+                    "target": last_candle['close'] + (last_candle['close'] - rl) * p['rr'],
                     "reason": "Low volatility consolidation broken upside with high volume."
                 }
         return None
 
 class BigDogBreakoutShort(BaseStrategy):
+    PARAMS = {"range_bars": 10, "range_ratio": 0.002, "vol_len": 20, "vol_mult": 1.8, "rr": 3}
+
     def __init__(self, symbol_type="BANKNIFTY"):
         super().__init__("BIGDOG_BREAKOUT_SHORT", symbol_type, is_index_driven=True)
 
     def check_setup(self, df, pcr_insights=None):
         if df is None or len(df) < 20: return None
 
-        last_10 = df.iloc[-10:]
+        p = self.params
+        last_10 = df.iloc[-p['range_bars']:]
         range_high = last_10['high'].max()
         range_low = last_10['low'].min()
         price = df['close'].iloc[-1]
 
-        if (range_high - range_low) / price < 0.002:
+        if (range_high - range_low) / price < p['range_ratio']:
             self.vars['range_high'] = range_high
             self.vars['range_low'] = range_low
 
         if 'range_low' in self.vars:
-            avg_vol = df['volume'].rolling(20).mean().iloc[-1]
+            avg_vol = df['volume'].rolling(p['vol_len']).mean().iloc[-1]
             last_candle = df.iloc[-1]
-            if last_candle['close'] < self.vars['range_low'] and last_candle['volume'] > 1.8 * avg_vol:
+            if last_candle['close'] < self.vars['range_low'] and last_candle['volume'] > p['vol_mult'] * avg_vol:
                 rh = self.vars['range_high']
                 self.reset_vars()
                 return {
                     "type": "SHORT",
                     "entry_price": last_candle['close'],
                     "sl": rh,
-                    "target": last_candle['close'] - (rh - last_candle['close']) * 3,
+                    "target": last_candle['close'] - (rh - last_candle['close']) * p['rr'],
                     "reason": "Low volatility consolidation broken downside with high volume."
                 }
         return None
@@ -259,15 +273,18 @@ class IndexBreakoutLong(BaseStrategy):
         return None
 
 class RSIScalperLong(BaseStrategy):
+    PARAMS = {"rsi_len": 14, "oversold_level": 30, "target_pts": 30}
+
     def __init__(self, symbol_type="BANKNIFTY"):
         super().__init__("RSI_SCALPER_LONG", symbol_type, is_index_driven=True)
 
     def check_setup(self, df, pcr_insights=None):
-        if df is None or len(df) < 15: return None
-        rsi = ta.rsi(df['close'], length=14)
+        p = self.params
+        if df is None or len(df) < p['rsi_len'] + 1: return None
+        rsi = ta.rsi(df['close'], length=p['rsi_len'])
         if rsi is None or pd.isna(rsi.iloc[-1]): return None
 
-        if rsi.iloc[-1] < 30: self.vars['oversold'] = True
+        if rsi.iloc[-1] < p['oversold_level']: self.vars['oversold'] = True
 
         if self.vars.get('oversold'):
             if df.iloc[-1]['close'] > df.iloc[-1]['open'] and rsi.iloc[-1] > rsi.iloc[-2]:
@@ -276,21 +293,24 @@ class RSIScalperLong(BaseStrategy):
                     "type": "LONG",
                     "entry_price": df.iloc[-1]['close'],
                     "sl": df.iloc[-1]['low'],
-                    "target": df.iloc[-1]['close'] + 30,
+                    "target": df.iloc[-1]['close'] + p['target_pts'],
                     "reason": "RSI Oversold reversal."
                 }
         return None
 
 class RSIScalperShort(BaseStrategy):
+    PARAMS = {"rsi_len": 14, "overbought_level": 70, "target_pts": 30}
+
     def __init__(self, symbol_type="BANKNIFTY"):
         super().__init__("RSI_SCALPER_SHORT", symbol_type, is_index_driven=True)
 
     def check_setup(self, df, pcr_insights=None):
-        if df is None or len(df) < 15: return None
-        rsi = ta.rsi(df['close'], length=14)
+        p = self.params
+        if df is None or len(df) < p['rsi_len'] + 1: return None
+        rsi = ta.rsi(df['close'], length=p['rsi_len'])
         if rsi is None or pd.isna(rsi.iloc[-1]): return None
 
-        if rsi.iloc[-1] > 70: self.vars['overbought'] = True
+        if rsi.iloc[-1] > p['overbought_level']: self.vars['overbought'] = True
 
         if self.vars.get('overbought'):
             if df.iloc[-1]['close'] < df.iloc[-1]['open'] and rsi.iloc[-1] < rsi.iloc[-2]:
@@ -299,7 +319,7 @@ class RSIScalperShort(BaseStrategy):
                     "type": "SHORT",
                     "entry_price": df.iloc[-1]['close'],
                     "sl": df.iloc[-1]['high'],
-                    "target": df.iloc[-1]['close'] - 30,
+                    "target": df.iloc[-1]['close'] - p['target_pts'],
                     "reason": "RSI Overbought reversal."
                 }
         return None
@@ -524,9 +544,9 @@ class VWAPEMAGateLong(BaseStrategy):
 
     def check_setup(self, df, pcr_insights=None):
         if df is None or len(df) < 21: return None
-        vwap = (df['close'] * df['volume']).cumsum() / df['volume'].cumsum()
+        vwap = session_vwap(df, pcr_insights)
         ema9 = ta.ema(df['close'], length=9)
-        if df.iloc[-1]['close'] > vwap.iloc[-1] and df.iloc[-1]['close'] > ema9.iloc[-1]:
+        if df.iloc[-1]['close'] > vwap and df.iloc[-1]['close'] > ema9.iloc[-1]:
             if df.iloc[-1]['volume'] > 1.5 * df['volume'].rolling(20).mean().iloc[-1]:
                 return {
                     "type": "LONG",
@@ -543,9 +563,9 @@ class VWAPEMAGateShort(BaseStrategy):
 
     def check_setup(self, df, pcr_insights=None):
         if df is None or len(df) < 21: return None
-        vwap = (df['close'] * df['volume']).cumsum() / df['volume'].cumsum()
+        vwap = session_vwap(df, pcr_insights)
         ema9 = ta.ema(df['close'], length=9)
-        if df.iloc[-1]['close'] < vwap.iloc[-1] and df.iloc[-1]['close'] < ema9.iloc[-1]:
+        if df.iloc[-1]['close'] < vwap and df.iloc[-1]['close'] < ema9.iloc[-1]:
             if df.iloc[-1]['volume'] > 1.5 * df['volume'].rolling(20).mean().iloc[-1]:
                 return {
                     "type": "SHORT",
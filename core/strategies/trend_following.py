@@ -3,24 +3,29 @@ import numpy as np
 from core.strategies.base_strategy import BaseStrategy
 
 class TrendFollowingStrategy(BaseStrategy):
+    # target_range None: (30, 40) points on BANKNIFTY, (15, 20) otherwise
+    PARAMS = {"sma_len": 20, "trend_band": 2, "target_range": None, "range_pad": (5, 10), "body_ratio": 0.6}
+
     def __init__(self, symbol_type="BANKNIFTY"):
         super().__init__("TREND_FOLLOWING", symbol_type)
         self.update_params(symbol_type)
 
     def update_params(self, symbol_type):
         super().update_params(symbol_type)
-        self.target_range = (30, 40) if "BANKNIFTY" in symbol_type else (15, 20)
+        self.target_range = self.params['target_range'] or ((30, 40) if "BANKNIFTY" in symbol_type else (15, 20))
 
     def get_trend(self, index_df, pcr_insights=None):
-        if index_df is None or len(index_df) < 20: return "NEUTRAL"
+        p = self.params
+        if index_df is None or len(index_df) < p['sma_len']: return "NEUTRAL"
 
         # Primary Trend: Price vs 20 SMA
         last_close = index_df['close'].iloc[-1]
-        sma = index_df['close'].rolling(20).mean().iloc[-1]
+        sma = index_df['close'].rolling(p['sma_len']).mean().iloc[-1]
 
         if pd.isna(sma): return "NEUTRAL"
 
-        price_trend = "BULLISH" if last_close > (sma + 2) else ("BEARISH" if last_close < (sma - 2) else "NEUTRAL")
+        band = p['trend_band']
+        price_trend = "BULLISH" if last_close > (sma + band) else ("BEARISH" if last_close < (sma - band) else "NEUTRAL")
 
         # Secondary Trend: PCR, PCR Change, and Buildup Status
         if pcr_insights and price_trend != "NEUTRAL":
@@ -63,11 +68,12 @@ class TrendFollowingStrategy(BaseStrategy):
         body_size = abs(last_candle['close'] - last_candle['open'])
 
         # Slightly more relaxed range to prevent bias if one side has higher volatility
-        min_range = self.target_range[0] - 5
-        max_range = self.target_range[1] + 10
+        pad_lo, pad_hi = self.params['range_pad']
+        min_range = self.target_range[0] - pad_lo
+        max_range = self.target_range[1] + pad_hi
 
         if is_bearish and min_range <= candle_range <= max_range:
-            if body_size >= 0.6 * candle_range: # Relaxed body size from 70% to 60%
+            if body_size >= self.params['body_ratio'] * candle_range: # Relaxed body size from 70% to 60%
                 return {
                     "type": f"{option_type}_ENTRY",
                     "entry_price": last_candle['high'] + 1,
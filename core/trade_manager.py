@@ -1,7 +1,7 @@
 from datetime import datetime
 
 class Trade:
-    def __init__(self, symbol, entry_price, entry_time, trade_type, strategy_name, sl=None, target=None):
+    def __init__(self, symbol, entry_price, entry_time, trade_type, strategy_name, sl=None, target=None, tp1=None, trail=None):
         self.symbol = symbol
         self.entry_price = entry_price
         self.entry_time = entry_time
@@ -9,12 +9,34 @@ class Trade:
         self.strategy_name = strategy_name
         self.sl = sl
         self.target = target
+        self.tp1 = tp1 # partial exit level, below target
+        self.trail = trail # trailing stop distance in points
+        self.peak = entry_price # highest price since entry, for the trailing stop
 
         self.exit_price = None
         self.exit_time = None
         self.status = 'OPEN' # 'OPEN', 'CLOSED'
         self.pnl = 0
-        self.exit_reason = None # 'SL', 'TARGET', 'TIME'
+        self.exit_reason = None # 'SL', 'TRAIL', 'TARGET', 'TIME'
+        self.remaining = 1.0 # open fraction of the position
+        self.partials = [] # (price, time, fraction, reason)
+        self.mark_price = entry_price # last price marked by PnLTracker
+        self.tracker = None
+        self.ref = None # position in its PnLTracker's trades, how the runtime journal names it
+
+    def __getstate__(self):
+        # Pickled on its own (runtime journal) it must not drag the whole tracker along; PnLTracker relinks it
+        return dict(self.__dict__, tracker=None)
+
+    def partial_close(self, price, time, fraction, reason):
+        fraction = min(fraction, self.remaining)
+        self.partials.append((price, time, fraction, reason))
+        self.remaining -= fraction
+
+    def open_pnl(self):
+        """PnL at the last marked price, including fractions already booked."""
+        booked = sum(f * (p - self.entry_price) for p, _, f, _ in self.partials)
+        return booked + self.remaining * (self.mark_price - self.entry_price)
 
     def close(self, exit_price, exit_time, reason):
         self.exit_price = exit_price
@@ -26,88 +48,141 @@ class Trade:
         # Whether it's a Call (Market Long) or Put (Market Short),
         # profit is made if the premium RISES.
         self.pnl = self.exit_price - self.entry_price
+        if self.partials:
+            self.pnl = sum(f * (p - self.entry_price) for p, _, f, _ in self.partials) + self.remaining * self.pnl
+        # Report once; a repeated close must not be counted twice
+        tracker, self.tracker = self.tracker, None
+        if tracker: tracker.on_close(self)
+
+class PnLStats:
+    """Running aggregates for one book (all trades, or one strategy); O(1) per event."""
+    __slots__ = ("trades", "closed", "wins", "losses", "gross_win", "gross_loss", "realized", "unrealized", "peak", "max_drawdown")
+
+    def __init__(self):
+        self.trades, self.closed, self.wins, self.losses = 0, 0, 0, 0
+        self.gross_win, self.gross_loss = 0.0, 0.0
+        self.realized, self.unrealized = 0.0, 0.0
+        self.peak, self.max_drawdown = 0.0, 0.0
+
+    def close(self, pnl, open_pnl):
+        self.closed += 1
+        if pnl > 0:
+            self.wins += 1
+            self.gross_win += pnl
+        else:
+            self.losses += 1
+            self.gross_loss -= pnl
+        self.realized += pnl
+        self.unrealized -= open_pnl
+        self.track()
+
+    def track(self):
+        # Drawdown on equity = realized + marked open PnL
+        equity = self.realized + self.unrealized
+        if equity > self.peak: self.peak = equity
+        elif self.peak - equity > self.max_drawdown: self.max_drawdown = self.peak - equity
+
+    def to_dict(self):
+        return {
+            "total_trades": self.trades,
+            "total_closed": self.closed,
+            "total_pnl": round(self.realized + self.unrealized, 2),
+            "realized_pnl": round(self.realized, 2),
+            "unrealized_pnl": round(self.unrealized, 2),
+            "win_count": self.wins,
+            "loss_count": self.losses,
+            "win_rate": round(self.wins / self.closed * 100, 2) if self.closed else 0,
+            "max_drawdown": round(self.max_drawdown, 2),
+            "avg_win": round(self.gross_win / self.wins, 2) if self.wins else 0,
+            "avg_loss": round(self.gross_loss / self.losses, 2) if self.losses else 0
+        }
 
 class PnLTracker:
+    """
+    Incremental PnL: trades report their own close, open trades are marked per tick
+    via mark(), so stats never rescan the trade list. Keeps a per-strategy breakdown
+    and an equity curve with one point per minute.
+    """
     def __init__(self):
         self.trades = []
-        self.total_pnl = 0.0
-        self.win_count = 0
-        self.loss_count = 0
-        self.max_drawdown = 0.0
-        self.avg_win = 0.0
-        self.avg_loss = 0.0
-        self.unrealized_pnl = 0.0
-        self.net_total_pnl = 0.0
+        self.total = PnLStats()
+        self.by_strategy = {}
+        self.open_by_symbol = {} # symbol -> open trades, for per-tick marking
+        self.equity_curve = [] # [epoch_sec, realized, equity]
+
+    def __setstate__(self, s):
+        self.__dict__.update(s)
+        for t in self.trades:
+            if t.status == 'OPEN': t.tracker = self
 
     def add_trade(self, trade):
+        trade.ref = len(self.trades)
         self.trades.append(trade)
+        trade.tracker = self
+        stats = self._strategy(trade.strategy_name)
+        self.total.trades += 1
+        stats.trades += 1
+        if trade.status == 'CLOSED': self.on_close(trade, opened=False)
+        else: self.open_by_symbol.setdefault(trade.symbol, []).append(trade)
+
+    def _strategy(self, name):
+        stats = self.by_strategy.get(name)
+        if stats is None: stats = self.by_strategy[name] = PnLStats()
+        return stats
+
+    def on_close(self, trade, opened=True):
+        open_pnl = 0.0
+        if opened:
+            open_pnl = trade.open_pnl()
+            trades = self.open_by_symbol.get(trade.symbol)
+            if trades and trade in trades:
+                trades.remove(trade)
+                if not trades: del self.open_by_symbol[trade.symbol]
+        self.total.close(trade.pnl, open_pnl)
+        self.by_strategy[trade.strategy_name].close(trade.pnl, open_pnl)
+        self._curve(trade.exit_time)
+
+    def mark(self, symbol, price, when=None):
+        """Mark open trades on `symbol` at `price`; no-op (one dict lookup) when none are open."""
+        trades = self.open_by_symbol.get(symbol)
+        if not trades: return
+        total = self.total
+        for t in trades:
+            # We always BUY options: open PnL = price - entry, on the fraction still open
+            delta = (price - t.mark_price) * t.remaining
+            if price == t.mark_price: continue
+            t.mark_price = price
+            total.unrealized += delta
+            stats = self.by_strategy[t.strategy_name]
+            stats.unrealized += delta
+            stats.track()
+        total.track()
+        self._curve(when)
+
+    def _curve(self, when):
+        if when is None: return
+        ts = when.timestamp() if hasattr(when, 'timestamp') else float(when)
+        point = [int(ts), round(self.total.realized, 2), round(self.total.realized + self.total.unrealized, 2)]
+        curve = self.equity_curve
+        if curve and curve[-1][0] // 60 == point[0] // 60: curve[-1] = point
+        else: curve.append(point)
+
+    # Previous attribute names, read straight from the running aggregates
+    total_pnl = property(lambda self: self.total.realized)
+    unrealized_pnl = property(lambda self: self.total.unrealized)
+    net_total_pnl = property(lambda self: self.total.realized + self.total.unrealized)
+    win_count = property(lambda self: self.total.wins)
+    loss_count = property(lambda self: self.total.losses)
+    max_drawdown = property(lambda self: self.total.max_drawdown)
+    avg_win = property(lambda self: self.total.gross_win / self.total.wins if self.total.wins else 0)
+    avg_loss = property(lambda self: self.total.gross_loss / self.total.losses if self.total.losses else 0)
 
     def update_stats(self, active_trades=None, current_prices=None):
-        # Recalculate from closed trades
-        self.total_pnl = 0
-        self.win_count = 0
-        self.loss_count = 0
-        
-        total_win = 0
-        total_loss = 0
-        peak = 0
-        max_dd = 0
-        current_pnl = 0
-
-        # 1. Process Closed Trades
-        for t in self.trades:
-            if t.status == 'CLOSED':
-                self.total_pnl += t.pnl
-                current_pnl += t.pnl
-                
-                # Drawdown Logic
-                if current_pnl > peak:
-                    peak = current_pnl
-                dd = peak - current_pnl
-                if dd > max_dd: max_dd = dd
-
-                if t.pnl > 0:
-                    self.win_count += 1
-                    total_win += t.pnl
-                else:
-                    self.loss_count += 1
-                    total_loss += abs(t.pnl)
-
-        # 2. Process Active Trades (Unrealized PnL)
-        self.unrealized_pnl = 0
-        if active_trades and current_prices:
-            for t in active_trades:
-                if t.symbol in current_prices:
-                    curr_price = current_prices[t.symbol]
-                    # We always BUY options (Long Volatility)
-                    # PnL = (Current Price - Entry Price)
-                    unrealized = curr_price - t.entry_price
-                    self.unrealized_pnl += unrealized
-                    
-                    # Update peak/dd logic tentatively for running drawdown
-                    # (Optional: might be too noisy, but accurate for "Total PnL")
-        
-        self.net_total_pnl = self.total_pnl + self.unrealized_pnl
-        
-        self.max_drawdown = max_dd
-        self.avg_win = total_win / self.win_count if self.win_count > 0 else 0
-        self.avg_loss = total_loss / self.loss_count if self.loss_count > 0 else 0
-
-    def get_stats(self):
-        # Note: update_stats should be called before this with live data if needed
-        closed_trades = [t for t in self.trades if t.status == 'CLOSED']
-        total_closed = len(closed_trades)
-        win_rate = (self.win_count / total_closed * 100) if total_closed > 0 else 0
-        return {
-            "total_trades": len(self.trades),
-            "total_closed": total_closed,
-            "total_pnl": round(self.net_total_pnl if hasattr(self, 'net_total_pnl') else self.total_pnl, 2),
-            "realized_pnl": round(self.total_pnl, 2),
-            "unrealized_pnl": round(getattr(self, 'unrealized_pnl', 0), 2),
-            "win_count": self.win_count,
-            "loss_count": self.loss_count,
-            "win_rate": round(win_rate, 2),
-            "max_drawdown": round(self.max_drawdown, 2),
-            "avg_win": round(self.avg_win, 2),
-            "avg_loss": round(self.avg_loss, 2)
-        }
+        # Stats are always current; prices passed here are just marked
+        if current_prices:
+            for symbol, price in current_prices.items(): self.mark(symbol, price)
+
+    def get_stats(self, by_strategy=False):
+        out = self.total.to_dict()
+        if by_strategy: out["by_strategy"] = {name: s.to_dict() for name, s in self.by_strategy.items()}
+        return out
@@ -3,6 +3,7 @@ import pandas as pd
 import threading
 from datetime import datetime
 import json
+from contextlib import contextmanager
 try:
     from config import DB_PATH
 except ImportError:
@@ -19,12 +20,22 @@ class DatabaseManager:
                     db_path = DB_PATH
                 cls._instance = super(DatabaseManager, cls).__new__(cls)
                 cls._instance.db_path = db_path
+                cls._instance.pending_writes = 0 # writes waiting on / holding the SQLite lock
                 cls._instance._init_db()
         return cls._instance
 
     def _get_connection(self):
         return sqlite3.connect(self.db_path)
 
+    @contextmanager
+    def _write_connection(self):
+        with self._lock: self.pending_writes += 1
+        try:
+            with self._get_connection() as conn:
+                yield conn
+        finally:
+            with self._lock: self.pending_writes -= 1
+
     def _init_db(self):
         with self._get_connection() as conn:
             # Enable WAL mode for better concurrency
@@ -106,7 +117,7 @@ class DatabaseManager:
             else:
                 return
 
-        with self._get_connection() as conn:
+        with self._write_connection() as conn:
             for _, row in data.iterrows():
                 conn.execute('''
                     INSERT OR REPLACE INTO ohlcv (symbol, interval, timestamp, open, high, low, close, volume)
@@ -114,6 +125,16 @@ class DatabaseManager:
                 ''', (symbol, interval, int(row['timestamp']), row['open'], row['high'], row['low'], row['close'], row['volume']))
             conn.commit()
 
+    def store_candles(self, interval, rows):
+        """Bulk insert (symbol, timestamp, open, high, low, close, volume) rows, e.g. the hub's closed live bars."""
+        if not rows: return
+        with self._write_connection() as conn:
+            conn.executemany('''
+                INSERT OR REPLACE INTO ohlcv (symbol, interval, timestamp, open, high, low, close, volume)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [(sym, interval, *rest) for sym, *rest in rows])
+            conn.commit()
+
     def get_ohlcv(self, symbol, interval, start_ts=None, end_ts=None):
         query = "SELECT timestamp, open, high, low, close, volume FROM ohlcv WHERE symbol = ? AND interval = ?"
         params = [symbol, interval]
@@ -135,7 +156,7 @@ class DatabaseManager:
             return df
 
     def store_trade(self, trade):
-        with self._get_connection() as conn:
+        with self._write_connection() as conn:
             if hasattr(trade, 'db_id') and trade.db_id:
                 conn.execute('''
                     UPDATE trades SET
@@ -153,7 +174,7 @@ class DatabaseManager:
 
     def store_pcr_insight(self, symbol, timestamp, insight, raw_list=None):
         if not insight: return
-        with self._get_connection() as conn:
+        with self._write_connection() as conn:
             conn.execute('''
                 INSERT OR REPLACE INTO pcr_insights (symbol, timestamp, pcr, pcr_change, buildup_status, raw_data)
                 VALUES (?, ?, ?, ?, ?, ?)
@@ -178,7 +199,7 @@ class DatabaseManager:
             return pd.read_sql_query(query, conn, params=params)
 
     def store_pcr_history(self, symbol, timestamp, pcr, total_call_oi, total_put_oi):
-        with self._get_connection() as conn:
+        with self._write_connection() as conn:
             conn.execute('''
                 INSERT OR REPLACE INTO pcr_data (symbol, timestamp, pcr, total_call_oi, total_put_oi)
                 VALUES (?, ?, ?, ?, ?)
@@ -2,6 +2,8 @@ import pandas as pd
 import numpy as np
 from data.gathering.tv_feed import TvFeed
 from data.database import DatabaseManager
+from core.io_pool import io_pool
+from core.startup import startup
 from tvDatafeed import Interval
 import math
 from datetime import datetime, timezone, timedelta
@@ -19,15 +21,29 @@ IST_TZ = timezone(timedelta(hours=5, minutes=30))
 
 class DataManager:
     def __init__(self):
-        self.feed = TvFeed()
+        self._feed = None
         self.db = DatabaseManager()
         self._instrument_df = None
         self.upstox_client = None
         self.key_cache = {} # Cache for instrument mapping
 
+    @property
+    def feed(self):
+        # Logging into TradingView is a network round trip: only the first historical fetch pays it
+        if self._feed is None:
+            with startup.phase("tradingview_login"): self._feed = TvFeed()
+        return self._feed
+
     def set_upstox_client(self, client):
         self.upstox_client = client
 
+    # Async wrappers: the blocking calls run on the shared I/O pool, never on the event loop
+    async def get_data_async(self, *args, timeout=None, **kwargs):
+        return await io_pool.run(self.get_data, *args, timeout=timeout, **kwargs)
+
+    async def getNiftyAndBNFnOKeys_async(self, *args, timeout=None, **kwargs):
+        return await io_pool.run(self.getNiftyAndBNFnOKeys, *args, timeout=timeout, **kwargs)
+
     def get_atm_strike(self, spot_price, step=100):
         return int(round(spot_price / step) * step)
 
@@ -1,8 +1,7 @@
 import logging
 import asyncio
-from data.gathering.live_feed import TradingViewLiveFeed
-from data.gathering.upstox_feed import UpstoxLiveFeed
 import config
+from core.startup import startup
 
 logger = logging.getLogger(__name__)
 
@@ -17,16 +16,18 @@ class FeedManager:
             cls._instance.subscribers = [] # list of (callback, state_filter)
         return cls._instance
 
-    def get_upstox_feed(self, access_token):
+    def get_upstox_feed(self, access_token, streamer_factory=None):
         if self.upstox_feed is None:
             logger.info("Initializing Global Upstox Live Feed")
-            self.upstox_feed = UpstoxLiveFeed(access_token, self._broadcast)
+            with startup.phase("upstox_import"): from data.gathering.upstox_feed import UpstoxLiveFeed # upstox_client is a heavy import
+            self.upstox_feed = UpstoxLiveFeed(access_token, self._broadcast, streamer_factory=streamer_factory)
             self.upstox_feed.start()
         return self.upstox_feed
 
     def get_tv_feed(self):
         if self.tv_feed is None:
             logger.info("Initializing Global TradingView Live Feed")
+            from data.gathering.live_feed import TradingViewLiveFeed
             self.tv_feed = TradingViewLiveFeed(self._broadcast)
             self.tv_feed.start()
         return self.tv_feed
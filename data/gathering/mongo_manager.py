@@ -1,6 +1,7 @@
 from pymongo import MongoClient
 from datetime import datetime
 import pandas as pd
+from core.io_pool import io_pool
 
 class MongoDataManager:
     def __init__(self, host='localhost', port=27017, db_name='upstox_strategy_db'):
@@ -23,9 +24,9 @@ class MongoDataManager:
                 del item['_id']
         return data
 
-    def get_all_ticks_for_session(self, instrument_keys, date_str):
-        # date_str in YYYY-MM-DD
-        start_time = datetime.strptime(f"{date_str} 09:15:00", "%Y-%m-%d %H:%M:%S")
+    def get_all_ticks_for_session(self, instrument_keys, date_str, start=None):
+        # date_str in YYYY-MM-DD; start (datetime) resumes mid-session, e.g. from a replay checkpoint
+        start_time = start or datetime.strptime(f"{date_str} 09:15:00", "%Y-%m-%d %H:%M:%S")
         end_time = datetime.strptime(f"{date_str} 15:30:00", "%Y-%m-%d %H:%M:%S")
 
         query = {
@@ -39,6 +40,10 @@ class MongoDataManager:
         # This could be large, maybe use a generator
         return cursor
 
+    def session_ticks_async(self, instrument_keys, date_str, start=None):
+        """get_all_ticks_for_session as an async iterator; cursor batches are fetched on the I/O pool."""
+        return io_pool.iterate(self.get_all_ticks_for_session(instrument_keys, date_str, start=start))
+
     def get_oi_data_for_strikes(self, strikes_keys, current_time):
         # current_time is the _insertion_time to look around
         # Find latest OI for each strike before current_time
@@ -0,0 +1,210 @@
+import math
+import random
+import threading
+import time
+import logging
+from datetime import datetime, timedelta, timezone
+from core.utils import black_scholes_price, black_scholes_greeks
+
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_YEAR = 252 * 6.25 * 3600 # trading seconds
+
+class _Instrument:
+    __slots__ = ("key", "tsym", "kind", "strike", "ltp", "oi", "vtt", "pv", "iv", "weight")
+
+    def __init__(self, key, tsym, kind, strike=None, ltp=0.0, oi=0, iv=0.0, weight=1.0):
+        self.key, self.tsym, self.kind, self.strike = key, tsym, kind, strike
+        self.ltp, self.oi, self.vtt, self.pv, self.iv, self.weight = ltp, oi, 0, 0.0, iv, weight
+
+class MarketSimulator:
+    """
+    Upstox-shaped fullFeed ticks for an index, its future and an N-strike CE/PE chain.
+
+    Spot follows a geometric random walk in virtual time (1/rate seconds per tick);
+    the future carries a small basis, option premiums are Black-Scholes off spot with a
+    smile, and OI, vtt, atp, tbq/tsq and depth are all derived from the same prices so
+    they stay mutually consistent. Int64 fields are strings, as the SDK decodes them.
+    """
+    def __init__(self, index="NIFTY", spot=24000.0, n_strikes=11, step=None, rate=1000,
+                 vol=0.15, days_to_expiry=3, start=None, seed=42):
+        self.index = index
+        self.step = step or (100 if "BANK" in index else 50)
+        self.rate, self.vol, self.rnd = rate, vol, random.Random(seed)
+        self.spot = spot
+        self.now = start or datetime(2026, 1, 5, 3, 45, tzinfo=timezone.utc) # 09:15 IST
+        self.expiry_t = days_to_expiry / 365
+        self.dt = 1.0 / rate
+        self.lot = 30 if "BANK" in index else 75
+
+        self.index_key = "NSE_INDEX|Nifty Bank" if "BANK" in index else "NSE_INDEX|Nifty 50"
+        self.instruments = [
+            _Instrument(self.index_key, index, "INDEX", ltp=spot, weight=2.0),
+            _Instrument(f"NSE_FO|SIM{index}FUT", f"{index}26JANFUT", "FUT", ltp=spot * 1.001, oi=1_200_000, weight=2.0),
+        ]
+        atm = int(round(spot / self.step) * self.step)
+        half = n_strikes // 2
+        self.strikes = [atm + i * self.step for i in range(-half, half + 1)]
+        for k in self.strikes:
+            moneyness = abs(k - spot) / self.step
+            iv = vol * (1 + 0.02 * moneyness) # mild smile
+            w = 1.0 / (1 + 0.3 * moneyness) # ATM prints more often
+            for kind in ("CE", "PE"):
+                px = max(0.05, black_scholes_price(spot, k, self.expiry_t, 0.07, iv, kind))
+                self.instruments.append(_Instrument(f"NSE_FO|SIM{kind[0]}{k}", f"{index}26JAN{k}{kind}", kind, k,
+                                                    ltp=round(px, 2), oi=self.rnd.randint(200, 3000) * self.lot, iv=iv, weight=w))
+        self._cum_weights = []
+        total = 0.0
+        for inst in self.instruments:
+            total += inst.weight
+            self._cum_weights.append(total)
+
+    def mapping(self):
+        """Same shape as DataManager.getNiftyAndBNFnOKeys()[index]."""
+        by_key = {(i.kind, i.strike): i for i in self.instruments}
+        options = [{
+            "strike": k, "ce": by_key[("CE", k)].key, "ce_trading_symbol": by_key[("CE", k)].tsym,
+            "pe": by_key[("PE", k)].key, "pe_trading_symbol": by_key[("PE", k)].tsym
+        } for k in self.strikes]
+        fut = self.instruments[1]
+        return {"future": fut.key, "future_trading_symbol": fut.tsym, "expiry": None, "options": options,
+                "all_keys": [fut.key] + [o['ce'] for o in options] + [o['pe'] for o in options]}
+
+    def _advance(self):
+        self.now += timedelta(seconds=self.dt)
+        self.expiry_t = max(1e-6, self.expiry_t - self.dt / SECONDS_PER_YEAR)
+        sigma = self.vol * math.sqrt(self.dt / SECONDS_PER_YEAR)
+        self.spot *= math.exp(self.rnd.gauss(0, sigma))
+
+    def _pick(self):
+        x = self.rnd.random() * self._cum_weights[-1]
+        lo, hi = 0, len(self._cum_weights) - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._cum_weights[mid] < x: lo = mid + 1
+            else: hi = mid
+        return self.instruments[lo]
+
+    def _feed(self, inst):
+        ts_ms = str(int(self.now.timestamp() * 1000))
+        if inst.kind == "INDEX":
+            inst.ltp = round(self.spot, 2)
+            return {"indexFF": {"ltpc": {"ltp": inst.ltp, "ltt": ts_ms, "cp": inst.ltp}}}
+
+        if inst.kind == "FUT":
+            price = self.spot * (1 + 0.07 * self.expiry_t)
+            tick_size = 0.05
+        else:
+            price = black_scholes_price(self.spot, inst.strike, self.expiry_t, 0.07, inst.iv, inst.kind)
+            tick_size = 0.05
+        price = max(tick_size, round(round(price / tick_size) * tick_size, 2))
+        ltq = self.lot * self.rnd.randint(1, 20)
+        inst.ltp = price
+        inst.vtt += ltq
+        inst.pv += price * ltq
+        # OI drifts with traded volume, never below a lot
+        inst.oi = max(self.lot, inst.oi + self.lot * self.rnd.randint(-2, 3))
+
+        levels = []
+        for i in range(5):
+            levels.append({
+                "bidQ": str(self.lot * self.rnd.randint(1, 40)), "bidP": round(max(tick_size, price - (i + 1) * tick_size), 2),
+                "askQ": str(self.lot * self.rnd.randint(1, 40)), "askP": round(price + (i + 1) * tick_size, 2)
+            })
+        bid_depth = sum(int(l["bidQ"]) for l in levels)
+        ask_depth = sum(int(l["askQ"]) for l in levels)
+        ff = {
+            "ltpc": {"ltp": price, "ltt": ts_ms, "ltq": str(ltq), "cp": price},
+            "marketLevel": {"bidAskQuote": levels},
+            "atp": round(inst.pv / inst.vtt, 2),
+            "vtt": str(inst.vtt),
+            "oi": float(inst.oi),
+            "iv": round(inst.iv, 4),
+            "tbq": float(bid_depth * 20), "tsq": float(ask_depth * 20)
+        }
+        if inst.kind != "FUT":
+            ff["optionGreeks"] = black_scholes_greeks(self.spot, inst.strike, self.expiry_t, 0.07, inst.iv, inst.kind)
+        return {"marketFF": ff}
+
+    def next_doc(self):
+        """One tick in the MongoDB `tick_data` document shape consumed by process_tick."""
+        self._advance()
+        inst = self._pick()
+        return {"instrumentKey": inst.key, "_insertion_time": self.now, "fullFeed": self._feed(inst)}
+
+    def docs(self, n):
+        return [self.next_doc() for _ in range(n)]
+
+    def next_message(self, keys=None, batch=1):
+        """A decoded MarketDataStreamerV3 `live_feed` message with `batch` ticks."""
+        feeds = {}
+        batch = min(batch, len(self.instruments) if keys is None else len(keys)) # one tick per key per message
+        while len(feeds) < batch:
+            self._advance()
+            inst = self._pick()
+            if keys is not None and inst.key not in keys: continue
+            feeds[inst.key] = {"fullFeed": self._feed(inst)}
+        return {"type": "live_feed", "feeds": feeds, "currentTs": str(int(self.now.timestamp() * 1000))}
+
+class SimulatedStreamer:
+    """
+    Stand-in for upstox_client.MarketDataStreamerV3: same on/connect/subscribe surface,
+    but messages come from a MarketSimulator on a background thread at `rate` ticks/sec.
+    Pass `lambda cfg: SimulatedStreamer(sim)` as UpstoxLiveFeed's streamer_factory.
+    With `pool` > 0 that many messages are generated up front and cycled, so the
+    offered rate is not limited by Black-Scholes pricing in the sender thread.
+    """
+    def __init__(self, simulator, rate=None, batch=10, pool=0):
+        self.sim = simulator
+        self.rate = rate or simulator.rate
+        self.batch = batch
+        self.pool_size = pool
+        self.pool = []
+        self.handlers = {}
+        self.keys = set()
+        self.sent = 0
+        self._running = False
+        self._thread = None
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    def auto_reconnect(self, *args):
+        pass
+
+    def connect(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        if "open" in self.handlers: self.handlers["open"]()
+
+    def subscribe(self, keys, mode="full"):
+        self.keys.update(keys)
+
+    def unsubscribe(self, keys):
+        self.keys.difference_update(keys)
+
+    def disconnect(self):
+        self._running = False
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+        if "close" in self.handlers: self.handlers["close"](1000, "simulator stopped")
+
+    def _run(self):
+        interval = self.batch / self.rate
+        next_at = time.perf_counter()
+        on_message = self.handlers.get("message")
+        i = 0
+        while self._running:
+            if self.keys and on_message:
+                if self.pool_size and not self.pool:
+                    # Built once keys are subscribed, so it only carries subscribed instruments
+                    self.pool = [self.sim.next_message(self.keys, self.batch) for _ in range(self.pool_size)]
+                    next_at = time.perf_counter()
+                msg = self.pool[i % len(self.pool)] if self.pool else self.sim.next_message(self.keys, self.batch)
+                i += 1
+                on_message(msg)
+                self.sent += len(msg["feeds"])
+            next_at += interval
+            delay = next_at - time.perf_counter()
+            if delay > 0: time.sleep(delay)
@@ -0,0 +1,167 @@
+import json
+import logging
+import os
+import queue
+import struct
+import threading
+import zlib
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+IST_TZ = timezone(timedelta(hours=5, minutes=30))
+MAGIC = b"TCK1"
+# (column, dtype); `t` is arrival time (epoch s), `key` indexes the chunk's key table, ltt is epoch ms (NaN if absent)
+COLUMNS = (("t", "<f8"), ("key", "<i4"), ("ltp", "<f8"), ("ltq", "<f8"), ("ltt", "<f8"), ("vtt", "<f8"),
+           ("oi", "<f8"), ("atp", "<f8"), ("iv", "<f8"), ("tbq", "<f8"), ("tsq", "<f8"))
+
+def _pack(col):
+    # Byte-shuffled (all first bytes, then all second bytes, ...) compresses far better than raw floats
+    return zlib.compress(np.ascontiguousarray(col).view(np.uint8).reshape(len(col), -1).T.tobytes(), 1)
+
+def _unpack(blob, dtype, rows):
+    width = np.dtype(dtype).itemsize
+    return np.frombuffer(zlib.decompress(blob), dtype=np.uint8).reshape(width, rows).T.copy().view(dtype).ravel()
+
+class TickRecorder:
+    """
+    Append-only recording of decoded live ticks. `append` only adds a tuple to an in-memory
+    buffer; every `flush_rows` ticks or `flush_sec` seconds the buffer goes to a writer thread
+    that writes it as one compressed columnar chunk. Segments rotate per session (IST date) and
+    past `segment_mb`, under `root/<date>/`, each with a `.idx.json` of its chunks' offsets,
+    time ranges and instruments.
+    """
+    def __init__(self, root, flush_rows=50000, flush_sec=2.0, segment_mb=256):
+        self.root, self.flush_rows, self.flush_sec = root, flush_rows, flush_sec
+        self.segment_bytes = segment_mb * 1024 * 1024
+        self.rows = []
+        self.first_t = None
+        self.pending = queue.Queue()
+        self.segment = None # (date, path, file, index) being written by the writer thread
+        self.thread = threading.Thread(target=self._writer, name="tick-recorder", daemon=True)
+        self.thread.start()
+
+    def append(self, key, t, ltp, ltq=0, ltt=None, vtt=0, oi=0, atp=0, iv=0, tbq=0, tsq=0):
+        rows = self.rows
+        rows.append((t, key, ltp, ltq, np.nan if ltt is None else ltt, vtt, oi, atp, iv, tbq, tsq))
+        if self.first_t is None: self.first_t = t
+        if len(rows) >= self.flush_rows or t - self.first_t >= self.flush_sec: self.flush()
+
+    def flush(self):
+        if not self.rows: return
+        self.pending.put(self.rows)
+        self.rows, self.first_t = [], None
+
+    def close(self):
+        self.flush()
+        self.pending.put(None)
+        self.thread.join()
+
+    def _writer(self):
+        while True:
+            rows = self.pending.get()
+            if rows is None: break
+            try: self._write_chunk(rows)
+            except Exception as e: logger.error(f"Tick recorder dropped {len(rows)} ticks: {e!r}")
+        if self.segment: self.segment[2].close()
+
+    def _write_chunk(self, rows):
+        keys = {}
+        key_ids = [keys.setdefault(r[1], len(keys)) for r in rows]
+        cols = list(zip(*rows))
+        cols[1] = key_ids
+        blobs = [_pack(np.asarray(c, dtype=dt)) for c, (_, dt) in zip(cols, COLUMNS)]
+        t0, t1 = float(min(cols[0])), float(max(cols[0]))
+        header = json.dumps({"rows": len(rows), "keys": list(keys), "t0": t0, "t1": t1,
+                             "columns": [[name, dt, len(b)] for (name, dt), b in zip(COLUMNS, blobs)]}).encode()
+        date, path, f, index = self._segment_for(t0)
+        offset = f.tell()
+        f.write(MAGIC + struct.pack("<I", len(header)) + header)
+        for b in blobs: f.write(b)
+        f.flush()
+        index["chunks"].append({"offset": offset, "size": f.tell() - offset, "rows": len(rows), "t0": t0, "t1": t1, "keys": list(keys)})
+        counts = np.bincount(key_ids, minlength=len(keys))
+        times = np.asarray(cols[0])
+        ids = np.asarray(key_ids)
+        for k, i in keys.items():
+            kt = times[ids == i]
+            lo, hi, n = index["instruments"].get(k, (float(kt.min()), float(kt.max()), 0))
+            index["instruments"][k] = (min(lo, float(kt.min())), max(hi, float(kt.max())), n + int(counts[i]))
+        with open(path + ".idx.json.tmp", "w") as out: json.dump(index, out)
+        os.replace(path + ".idx.json.tmp", path + ".idx.json")
+
+    def _segment_for(self, t):
+        date = datetime.fromtimestamp(t, IST_TZ).strftime("%Y-%m-%d")
+        seg = self.segment
+        if seg is None or seg[0] != date or seg[2].tell() >= self.segment_bytes:
+            if seg: seg[2].close()
+            folder = os.path.join(self.root, date)
+            os.makedirs(folder, exist_ok=True)
+            name = f"{datetime.fromtimestamp(t, IST_TZ):%H%M%S}_{len(os.listdir(folder)) // 2}"
+            path = os.path.join(folder, name + ".ticks")
+            seg = self.segment = (date, path, open(path, "ab"), {"segment": name + ".ticks", "chunks": [], "instruments": {}})
+        return seg
+
+class TickReader:
+    """Recorded sessions read back chunk by chunk; chunks outside the requested keys or time range are skipped via the index."""
+    def __init__(self, root):
+        self.root = root
+
+    def sessions(self):
+        return sorted(d for d in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, d))) if os.path.isdir(self.root) else []
+
+    def segments(self, date):
+        folder = os.path.join(self.root, date)
+        if not os.path.isdir(folder): return []
+        return [os.path.join(folder, f) for f in sorted(os.listdir(folder)) if f.endswith(".ticks")]
+
+    def index(self, path):
+        try:
+            with open(path + ".idx.json") as f: return json.load(f)
+        except (OSError, ValueError):
+            return {"chunks": list(self._scan(path)), "instruments": None} # interrupted before the index was written
+
+    def _scan(self, path):
+        with open(path, "rb") as f:
+            while True:
+                offset = f.tell()
+                head = f.read(8)
+                if len(head) < 8 or head[:4] != MAGIC: return
+                header = json.loads(f.read(struct.unpack("<I", head[4:])[0]))
+                body = sum(c[2] for c in header["columns"])
+                if len(f.read(body)) < body: return # torn final chunk
+                yield {"offset": offset, "size": f.tell() - offset, "rows": header["rows"], "t0": header["t0"], "t1": header["t1"], "keys": header["keys"]}
+
+    def chunks(self, date, keys=None, start=None, end=None):
+        """Yields (keys, {column: array}) per chunk, in recording order."""
+        want = set(keys) if keys is not None else None
+        for path in self.segments(date):
+            with open(path, "rb") as f:
+                for c in self.index(path)["chunks"]:
+                    if (start is not None and c["t1"] < start) or (end is not None and c["t0"] > end): continue
+                    if want is not None and want.isdisjoint(c["keys"]): continue
+                    f.seek(c["offset"])
+                    raw = f.read(c["size"])
+                    hlen = struct.unpack("<I", raw[4:8])[0]
+                    header = json.loads(raw[8:8 + hlen])
+                    cols, pos = {}, 8 + hlen
+                    for name, dt, n in header["columns"]:
+                        cols[name] = _unpack(raw[pos:pos + n], dt, header["rows"])
+                        pos += n
+                    yield header["keys"], cols
+
+    def docs(self, date, keys=None, start=None, end=None):
+        """Recorded ticks as the tick docs process_tick takes (Mongo `tick_data` shape), for replay."""
+        want = set(keys) if keys is not None else None
+        for chunk_keys, c in self.chunks(date, keys, start, end):
+            mask = np.ones(len(c["t"]), bool)
+            if want is not None: mask &= np.isin(c["key"], [i for i, k in enumerate(chunk_keys) if k in want])
+            if start is not None: mask &= c["t"] >= start
+            if end is not None: mask &= c["t"] <= end
+            rows = zip(*(c[name][mask].tolist() for name, _ in COLUMNS))
+            for t, k, ltp, ltq, ltt, vtt, oi, atp, iv, tbq, tsq in rows:
+                yield {"instrumentKey": chunk_keys[k], "_insertion_time": datetime.fromtimestamp(t, timezone.utc),
+                       "fullFeed": {"marketFF": {"ltpc": {"ltp": ltp, "ltq": ltq, "ltt": None if ltt != ltt else int(ltt)},
+                                                 "vtt": vtt, "oi": oi, "atp": atp, "iv": iv, "tbq": tbq, "tsq": tsq}}}
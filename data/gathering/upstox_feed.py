@@ -5,13 +5,15 @@ import time
 from datetime import datetime,timezone
 from datetime import datetime, timezone
 import upstox_client
+from core.latency import new_trace
 
 logger = logging.getLogger(__name__)
 
 class UpstoxLiveFeed:
-    def __init__(self, access_token, callback):
+    def __init__(self, access_token, callback, streamer_factory=None):
         self.access_token = access_token
         self.callback = callback
+        self.streamer_factory = streamer_factory # configuration -> streamer; defaults to MarketDataStreamerV3
         self.streamer = None
         self.instrument_keys = []
         self.key_to_symbol = {} # Mapping instrument_key -> display_symbol
@@ -90,7 +92,15 @@ class UpstoxLiveFeed:
                         "timestamp": ts,
                         "oi": target_ff.get("oi"),
                         "iv": target_ff.get("iv"),
-                        "ohlc": i1_candle
+                        # Top of book, traded averages and greeks (marketFF only) for the hub's analytics and chain picks
+                        "ltq": ltpc.get("ltq"),
+                        "atp": target_ff.get("atp"),
+                        "tbq": target_ff.get("tbq"),
+                        "tsq": target_ff.get("tsq"),
+                        "marketLevel": target_ff.get("marketLevel"),
+                        "optionGreeks": target_ff.get("optionGreeks"),
+                        "ohlc": i1_candle,
+                        "trace": new_trace(ts)
                     }
 
                     if ltp is not None:
@@ -108,9 +118,12 @@ class UpstoxLiveFeed:
         configuration.access_token = self.access_token
 
         try:
-            self.streamer = upstox_client.MarketDataStreamerV3(
-                upstox_client.ApiClient(configuration)
-            )
+            if self.streamer_factory:
+                self.streamer = self.streamer_factory(configuration)
+            else:
+                self.streamer = upstox_client.MarketDataStreamerV3(
+                    upstox_client.ApiClient(configuration)
+                )
 
             self.streamer.on("open", self.on_open)
             self.streamer.on("message", self.on_message)
@@ -164,3 +177,16 @@ class UpstoxLiveFeed:
                 self.streamer.subscribe(new_keys, "full")
             except Exception as e:
                 logger.error(f"[UpstoxLiveFeed] Subscription error: {e}")
+
+    def remove_symbols(self, keys):
+        """Unsubscribe keys that are no longer tracked (e.g. strikes that left the chain window)."""
+        gone = [k for k in keys if k in self.key_to_symbol or k in self.instrument_keys]
+        for key in gone:
+            self.key_to_symbol.pop(key, None)
+            if key in self.instrument_keys: self.instrument_keys.remove(key)
+
+        if self.is_running and self.streamer and gone:
+            try:
+                self.streamer.unsubscribe(gone)
+            except Exception as e:
+                logger.error(f"[UpstoxLiveFeed] Unsubscribe error: {e}")
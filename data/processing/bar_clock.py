@@ -0,0 +1,36 @@
+import time
+
+class BarClock:
+    """
+    Minute boundaries on the exchange clock (feed ltt/ts, not arrival time). A boundary is
+    due `grace` seconds after it passes, so ticks that arrive slightly late still land in
+    the bar they belong to; anything older than the open minute after that is late.
+    Between ticks exchange time is extrapolated from the wall clock, which lets a timer
+    close bars for instruments that did not print.
+    """
+    def __init__(self, grace=0.5):
+        self.grace = grace
+        self.latest = None # newest feed time seen
+        self.offset = 0.0 # feed time - wall time at that tick
+        self.open_minute = None # first minute not yet finalized
+
+    def observe(self, ts):
+        if self.latest is None or ts > self.latest:
+            self.latest, self.offset = ts, ts - time.time()
+            if self.open_minute is None: self.open_minute = int(ts) // 60
+
+    def now(self):
+        return time.time() + self.offset
+
+    def due(self, now):
+        """The boundary (epoch minute) to finalize at `now`, or None. Empty minutes in a gap are
+        skipped: one boundary closes the last bar that had ticks."""
+        if self.open_minute is None: return None
+        last = int(now - self.grace) // 60
+        if last <= self.open_minute: return None
+        boundary, self.open_minute = self.open_minute + 1, last
+        return boundary
+
+    def seconds_until_due(self):
+        if self.open_minute is None: return 1.0
+        return (self.open_minute + 1) * 60 + self.grace - self.now()
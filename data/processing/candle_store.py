@@ -0,0 +1,128 @@
+import numpy as np
+
+FIELDS = ("open", "high", "low", "close", "volume", "oi")
+F_OPEN, F_HIGH, F_LOW, F_CLOSE, F_VOLUME, F_OI = range(len(FIELDS))
+
+class ChainCandleStore:
+    """
+    1-minute OHLCV+OI bars for every tracked instrument in one array:
+    data[field, row, slot], one row per instrument, slots a ring over minutes shared by all rows.
+
+    The bar in progress lives on the InstrumentState (bar_* slots) and is written to the
+    array once, when it closes, so a tick costs a few attribute compares. Rows are recycled
+    when the chain re-centers; a freed row is blanked before reuse.
+    """
+    def __init__(self, capacity=375, rows=32):
+        self.capacity = capacity
+        self.data = np.full((len(FIELDS), rows, capacity), np.nan)
+        self.minutes = np.full(capacity, -1, dtype=np.int64) # minute id held by each slot
+        self.head = None # newest minute with a slot
+        self.rows = {} # key -> row
+        self.records = {} # key -> InstrumentState
+        self.free = list(range(rows - 1, -1, -1))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def track(self, rec):
+        if rec.key in self.rows: return self.rows[rec.key]
+        if not self.free: self._grow()
+        row = self.free.pop()
+        self.rows[rec.key], self.records[rec.key] = row, rec
+        rec.bar_minute = None
+        return row
+
+    def untrack(self, key):
+        row = self.rows.pop(key, None)
+        if row is None: return
+        self.records.pop(key)
+        self.data[:, row, :] = np.nan
+        self.free.append(row)
+
+    def clear(self):
+        for key in list(self.rows): self.untrack(key)
+        self.minutes[:] = -1
+        self.head = None
+
+    def _grow(self):
+        n = self.data.shape[1]
+        self.data = np.concatenate([self.data, np.full((len(FIELDS), n, self.capacity), np.nan)], axis=1)
+        self.free.extend(range(2 * n - 1, n - 1, -1))
+
+    def on_tick(self, rec, minute):
+        """Fold the record's latest tick into its bar. Returns True when this tick opened a new bar."""
+        ltp = rec.ltp
+        if rec.bar_minute == minute:
+            if ltp > rec.bar_high: rec.bar_high = ltp
+            elif ltp < rec.bar_low: rec.bar_low = ltp
+            rec.bar_close = ltp
+            return False
+        if rec.bar_minute is not None: self._commit(rec)
+        if self.head is None or minute > self.head: self._advance(minute)
+        rec.bar_minute, rec.bar_start_vtt = minute, rec.vtt
+        rec.bar_open = rec.bar_high = rec.bar_low = rec.bar_close = ltp
+        return True
+
+    def _advance(self, minute):
+        # Blank the slots the ring is about to reuse, then close out bars older than `minute`
+        cap = self.capacity
+        start = minute - cap + 1 if self.head is None else max(self.head + 1, minute - cap + 1)
+        for m in range(start, minute + 1):
+            slot = m % cap
+            self.data[:, :, slot] = np.nan
+            self.minutes[slot] = m
+        self.head = minute
+        for rec in self.records.values():
+            if rec.bar_minute is not None and rec.bar_minute < minute: self._commit(rec)
+
+    def _commit(self, rec):
+        m = rec.bar_minute
+        if self.head is not None and m <= self.head - self.capacity: return # older than the ring
+        slot = m % self.capacity
+        if self.minutes[slot] != m: return
+        self.data[:, self.rows[rec.key], slot] = (rec.bar_open, rec.bar_high, rec.bar_low, rec.bar_close,
+                                                  max(0, rec.vtt - rec.bar_start_vtt), rec.oi)
+
+    def close_through(self, minute):
+        """Close every bar opened before `minute` (e.g. on a clock boundary with no tick)."""
+        if self.head is None or minute > self.head: self._advance(minute)
+
+    # --- reads (evaluation / API time) ---
+
+    def _order(self, n=None):
+        """Ring slots oldest -> newest, last n minutes up to head."""
+        if self.head is None: return np.empty(0, dtype=np.int64)
+        n = min(n or self.capacity, self.capacity)
+        return np.arange(self.head - n + 1, self.head + 1) % self.capacity
+
+    def _with_live(self):
+        # Write bars still in progress into their slots so reads include the forming minute
+        for rec in self.records.values():
+            if rec.bar_minute is not None: self._commit(rec)
+
+    def times(self, n=None):
+        slots = self._order(n)
+        return self.minutes[slots]
+
+    def matrix(self, field="close", keys=None, n=None, live=True):
+        """(instrument x minute) array for one field; rows follow `keys` (default: tracked order)."""
+        if live: self._with_live()
+        keys = list(self.rows) if keys is None else keys
+        rows = [self.rows[k] for k in keys]
+        return self.data[FIELDS.index(field)][np.ix_(rows, self._order(n))]
+
+    def table(self, key, n=None, live=True):
+        """One instrument's last n minutes as [minute, open, high, low, close, volume, oi] x minutes (NaN where it did not trade)."""
+        if live: self._with_live()
+        slots = self._order(n)
+        return np.vstack([self.minutes[slots], self.data[:, self.rows[key], :][:, slots]])
+
+    def frame(self, key, n=None, live=True):
+        """One instrument's bars as an OHLCV+oi DataFrame on an IST DatetimeIndex (engine shape)."""
+        import pandas as pd # only frame consumers pay for pandas; the hub's tick path never does
+        if live: self._with_live()
+        slots = self._order(n)
+        block = self.data[:, self.rows[key], :][:, slots].T
+        idx = pd.to_datetime(self.minutes[slots] * 60, unit="s", utc=True).tz_convert("Asia/Kolkata").tz_localize(None)
+        df = pd.DataFrame(block, index=idx, columns=FIELDS)
+        return df[df['close'].notna()]
@@ -0,0 +1,40 @@
+import bisect
+import os
+import pickle
+
+class ReplayCheckpoints:
+    """
+    State checkpoints of one replayed session, one pickle per `every_min` interval under
+    `root/<index>_<date>/<start>.ckpt`. A checkpoint is taken just before the first tick of
+    its interval, so resuming the tick query at the interval start (epoch seconds of the
+    ticks' `_insertion_time`) applies every later tick exactly once. A seek restores
+    the newest checkpoint at or before the target: it never replays more than one interval.
+    """
+    def __init__(self, root, index, date, every_min=15):
+        self.dir = os.path.join(root, f"{index}_{date}")
+        self.step = every_min * 60
+        os.makedirs(self.dir, exist_ok=True)
+        self.starts = sorted(int(f[:-5]) for f in os.listdir(self.dir) if f.endswith(".ckpt"))
+        self.interval = None # interval of the last tick seen
+
+    def due(self, ts):
+        """Interval start to checkpoint before applying the tick at `ts`, or None (same interval, or already saved)."""
+        interval = int(ts) // self.step
+        if interval == self.interval: return None
+        self.interval = interval
+        start = interval * self.step
+        i = bisect.bisect_left(self.starts, start)
+        return None if i < len(self.starts) and self.starts[i] == start else start
+
+    def nearest(self, ts):
+        i = bisect.bisect_right(self.starts, ts)
+        return self.starts[i - 1] if i else None
+
+    def save(self, start, blob):
+        path = os.path.join(self.dir, f"{start}.ckpt")
+        with open(path + ".tmp", "wb") as f: f.write(blob)
+        os.replace(path + ".tmp", path)
+        if start not in self.starts: bisect.insort(self.starts, start)
+
+    def load(self, start):
+        with open(os.path.join(self.dir, f"{start}.ckpt"), "rb") as f: return pickle.load(f)
@@ -0,0 +1,88 @@
+import asyncio
+import time
+
+MIN_SPEED, MAX_SPEED = 0.5, 100.0
+
+class ReplayClock:
+    """
+    Virtual clock pacing a replay by tick timestamps: data time runs `speed` times faster than
+    the wall clock from an anchor (wall, data) that moves whenever the speed changes or play
+    resumes, so pausing or switching speed never makes the replay jump or burst. speed None
+    plays as fast as ticks can be processed. Controls wake a waiting tick immediately.
+    """
+    def __init__(self, speed=1.0):
+        self.speed = speed
+        self.anchor = None # (monotonic, data ts) the virtual clock runs from
+        self.last = None # data time of the last tick let through
+        self.step_to = None # data time after which a step pauses again
+        self.resumed = asyncio.Event()
+        self.resumed.set()
+        self.changed = asyncio.Event()
+
+    @property
+    def paused(self):
+        return not self.resumed.is_set()
+
+    def now(self):
+        """Current virtual data time."""
+        if self.anchor is None or self.speed is None or self.paused: return self.last
+        wall, ts = self.anchor
+        return ts + (time.monotonic() - wall) * self.speed
+
+    def _control(self):
+        self.anchor = None if self.last is None else (time.monotonic(), self.last)
+        self.changed.set()
+
+    def pause(self):
+        self.resumed.clear()
+        self._control()
+
+    def resume(self):
+        self.step_to = None
+        self.resumed.set()
+        self._control()
+
+    def set_speed(self, speed):
+        """Data seconds per wall second, clamped to [0.5, 100]; None for as fast as possible."""
+        vt = self.now()
+        self.speed = None if speed is None else min(MAX_SPEED, max(MIN_SPEED, float(speed)))
+        self.anchor = None if vt is None else (time.monotonic(), vt)
+        self.changed.set()
+
+    def step(self, grace=0.0):
+        """Play on until the candle in progress has closed (its minute plus the bar-close grace), then pause."""
+        if self.last is None: return self.resume()
+        self.step_to = (int(self.last) // 60 + 1) * 60 + grace
+        self.resumed.set()
+        self._control()
+
+    def seek(self, ts):
+        """Continue from data time `ts` (a replay seek landed there)."""
+        self.last, self.anchor, self.step_to = ts, None, None
+
+    def hold(self):
+        """Pause if the step in progress has closed its candle; True when it just did."""
+        if self.step_to is None or self.last is None or self.last < self.step_to: return False
+        self.step_to = None
+        self.pause()
+        return True
+
+    async def wait(self, ts):
+        """Hold the tick at data time `ts` until the virtual clock reaches it."""
+        while True:
+            if self.paused:
+                await self.resumed.wait()
+                continue
+            # Steps run flat out: the point is the next candle, not the time it took
+            if self.speed is None or self.step_to is not None: break
+            now = time.monotonic()
+            if self.anchor is None or ts < self.anchor[1]: self.anchor = (now, ts)
+            delay = self.anchor[0] + (ts - self.anchor[1]) / self.speed - now
+            if delay <= 0:
+                # Fell behind (slow processing, engine drain): carry on from here instead of bursting to catch up
+                if delay < -1.0: self.anchor = (now, ts)
+                break
+            self.changed.clear()
+            try: await asyncio.wait_for(self.changed.wait(), delay)
+            except asyncio.TimeoutError: break
+        self.last = ts
@@ -0,0 +1,116 @@
+import math
+
+def bucket_size(price, pct):
+    """Profile bucket for an instrument trading at `price`: pct of it, rounded up to a 1-2-5 step (at least the 0.05 tick)."""
+    raw = max(0.05, price * pct)
+    mag = 10 ** math.floor(math.log10(raw))
+    return next(round(m * mag, 2) for m in (1, 2, 5, 10) if m * mag >= raw - 1e-9)
+
+class SessionAnalytics:
+    """
+    Session-anchored levels of one instrument, folded in per tick in O(1): VWAP with standard
+    deviation bands, a volume profile bucketed by price (POC, value area) and the cumulative
+    delta of traded volume signed by aggressor. A tick's volume is its vtt step; the volume
+    traded before the first tick seen (a mid-session start or restart) is booked at the price
+    that makes the VWAP match the exchange's `atp`. The minute in progress is also kept on its
+    own, so `levels(through)` reports the session as of a closed bar even once the next
+    minute's first ticks are in.
+    """
+    __slots__ = ("bucket_pct", "bucket", "vtt", "price", "side", "sum_v", "sum_pv", "sum_p2v", "delta", "profile",
+                 "minute", "m_v", "m_pv", "m_p2v", "m_delta", "m_profile")
+
+    def __init__(self, bucket_pct=0.0005):
+        self.bucket_pct, self.bucket = bucket_pct, None
+        self.vtt = None # vtt of the last tick; None until the first one (or after a restore)
+        self.price, self.side = 0.0, 0
+        self.sum_v = self.sum_pv = self.sum_p2v = self.delta = 0.0
+        self.profile = {} # bucket index -> volume
+        self.minute = None
+        self.m_v = self.m_pv = self.m_p2v = self.m_delta = 0.0
+        self.m_profile = {}
+
+    def resync(self):
+        """After a restore: the ticks missed while down are caught up from the next tick's vtt/atp."""
+        self.vtt = None
+
+    def update(self, minute, ltp, vtt, atp=0.0, bid=0.0, ask=0.0):
+        if self.minute is None or minute > self.minute:
+            self.minute = minute
+            self.m_v = self.m_pv = self.m_p2v = self.m_delta = 0.0
+            self.m_profile = {}
+        if self.vtt is None:
+            if self.bucket is None: self.bucket = bucket_size(ltp, self.bucket_pct)
+            gap = vtt - self.sum_v
+            if gap > 0:
+                # Unseen volume, at the price that puts the VWAP on the exchange's average traded price
+                p = (atp * vtt - self.sum_pv) / gap if atp > 0 else ltp
+                if p <= 0: p = ltp
+                self.sum_v, self.sum_pv, self.sum_p2v = vtt, self.sum_pv + p * gap, self.sum_p2v + p * p * gap
+            self.vtt, self.price = vtt, ltp
+            return
+        dv = vtt - self.vtt
+        if dv > 0:
+            pv = ltp * dv
+            p2v = pv * ltp
+            self.sum_v += dv
+            self.sum_pv += pv
+            self.sum_p2v += p2v
+            # Aggressor: at/through the ask buys, at/through the bid sells, otherwise the tick rule
+            if ask and ltp >= ask: side = 1
+            elif bid and ltp <= bid: side = -1
+            elif ltp > self.price: side = 1
+            elif ltp < self.price: side = -1
+            else: side = self.side
+            self.side = side
+            self.delta += side * dv
+            b = round(ltp / self.bucket)
+            profile = self.profile
+            profile[b] = profile.get(b, 0) + dv
+            if minute == self.minute: # a late tick (an earlier, closed minute) only adds to the session
+                self.m_v += dv
+                self.m_pv += pv
+                self.m_p2v += p2v
+                self.m_delta += side * dv
+                profile = self.m_profile
+                profile[b] = profile.get(b, 0) + dv
+        if dv: self.vtt = vtt # a negative step is a feed reset: rebase on it
+        self.price = ltp
+
+    def levels(self, through=None, value_area=0.7, bands=(1.0, 2.0)):
+        """Levels as of the close of minute `through` (default: every tick so far); None before any volume."""
+        sub = through is not None and self.minute is not None and self.minute > through
+        v = self.sum_v - (self.m_v if sub else 0)
+        if v <= 0: return None
+        vwap = (self.sum_pv - (self.m_pv if sub else 0)) / v
+        sd = math.sqrt(max(0.0, (self.sum_p2v - (self.m_p2v if sub else 0)) / v - vwap * vwap))
+        out = {"vwap": round(vwap, 2), "sd": round(sd, 2), "volume": int(v),
+               "bands": [[k, round(vwap - k * sd, 2), round(vwap + k * sd, 2)] for k in bands],
+               "delta": int(self.delta - (self.m_delta if sub else 0))}
+        minus = self.m_profile if sub else {}
+        keys = sorted(self.profile)
+        vols = [self.profile[b] - minus.get(b, 0) for b in keys]
+        total = sum(vols)
+        if total <= 0: return out
+        # Value area: from the POC, take the heavier neighbouring bucket until it holds `value_area` of the volume
+        poc = lo = hi = max(range(len(vols)), key=vols.__getitem__)
+        held = vols[poc]
+        while held < value_area * total:
+            below = vols[lo - 1] if lo > 0 else -1
+            above = vols[hi + 1] if hi + 1 < len(vols) else -1
+            if above < 0 and below < 0: break
+            if above >= below:
+                hi += 1
+                held += above
+            else:
+                lo -= 1
+                held += below
+        step = self.bucket
+        out.update(poc=round(keys[poc] * step, 2), val=round(keys[lo] * step, 2), vah=round(keys[hi] * step, 2))
+        return out
+
+def oi_levels(rows):
+    """Chain OI walls from the hub's oiData rows: the strikes holding the most call/put OI and adding the most today."""
+    rows = [r for r in rows if r['callOi'] or r['putOi']]
+    if not rows: return None
+    return {"call_wall": max(rows, key=lambda r: r['callOi'])['strike'], "put_wall": max(rows, key=lambda r: r['putOi'])['strike'],
+            "call_added": max(rows, key=lambda r: r['callOiChange'])['strike'], "put_added": max(rows, key=lambda r: r['putOiChange'])['strike']}
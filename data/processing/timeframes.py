@@ -0,0 +1,61 @@
+from datetime import datetime, timezone
+
+SESSION_ANCHOR = 225 # 09:15 IST in minutes past 00:00 UTC; bars align to the session open like TradingView's
+
+def bucket_start(minute, tf):
+    return minute - (minute - SESSION_ANCHOR) % tf
+
+def minute_iso(minute):
+    return datetime.fromtimestamp(minute * 60, timezone.utc).isoformat()
+
+class TimeframeRollup:
+    """
+    Higher-timeframe bars for one instrument, built from its closed 1m bars (hub candle dicts).
+    Each timeframe rolls up from the largest lower timeframe that divides it (15m from 5m,
+    5m and 3m from 1m), so a 1m close costs a few dict updates whatever the tick rate.
+    """
+    def __init__(self, timeframes=(1, 3, 5, 15), keep=100):
+        self.tfs = sorted(set(timeframes) | {1})
+        self.keep = keep
+        parent = {tf: max(t for t in self.tfs if t < tf and tf % t == 0) for tf in self.tfs if tf != 1}
+        self.children = {tf: [c for c, p in parent.items() if p == tf] for tf in self.tfs}
+        self.history = {tf: [] for tf in parent}
+        self.bucket = dict.fromkeys(parent) # tf -> start minute of the bar in progress
+        self.done = dict.fromkeys(parent, True) # tf -> bar in progress already reported complete
+
+    def on_close(self, bar, minute):
+        """Fold one closed 1m bar; returns the timeframes whose bar completed with it."""
+        completed = []
+        self._feed(1, bar, minute, completed)
+        return completed
+
+    def close_through(self, boundary):
+        """Complete bars that end at or before `boundary` (epoch minute) even if their last minute never printed."""
+        completed = []
+        for tf in self.tfs[1:]:
+            if not self.done[tf] and self.bucket[tf] + tf <= boundary: self._complete(tf, completed)
+        return completed
+
+    def _feed(self, src, bar, start, completed):
+        for tf in self.children[src]:
+            b = bucket_start(start, tf)
+            hist = self.history[tf]
+            if self.bucket[tf] != b:
+                # A bucket whose last sub-bar never printed completes when the next one opens
+                if not self.done[tf]: self._complete(tf, completed)
+                hist.append({"time": minute_iso(b), "open": bar['open'], "high": bar['high'], "low": bar['low'],
+                             "close": bar['close'], "volume": bar['volume']})
+                if len(hist) > self.keep: hist.pop(0)
+                self.bucket[tf], self.done[tf] = b, False
+            else:
+                cur = hist[-1]
+                if bar['high'] > cur['high']: cur['high'] = bar['high']
+                if bar['low'] < cur['low']: cur['low'] = bar['low']
+                cur['close'] = bar['close']
+                cur['volume'] += bar['volume']
+            if start + src == b + tf: self._complete(tf, completed)
+
+    def _complete(self, tf, completed):
+        self.done[tf] = True
+        completed.append(tf)
+        self._feed(tf, self.history[tf][-1], self.bucket[tf], completed)
@@ -1,12 +1,15 @@
+from core.startup import startup, Lazy # first, so the startup report covers every import below
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request
 from fastapi.middleware.cors import CORSMiddleware
-import pandas as pd
+from fastapi.responses import PlainTextResponse
 import uvicorn
 import json
 import asyncio
 import numpy as np
 import logging
+import os
 import uuid
+import pickle
 import httpx
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
@@ -14,17 +17,36 @@ from pathlib import Path
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-from data.gathering.data_manager import DataManager
 from data.gathering.feed_manager import feed_manager
-from data.gathering.mongo_manager import MongoDataManager
+from data.gathering.tick_recorder import TickRecorder, TickReader
 import config
-from data.database import DatabaseManager
 from core.trade_manager import PnLTracker, Trade
+from core.exit_manager import ExitManager
+from core.risk_manager import RiskManager
 from core.utils import calculate_buildup, black_scholes_greeks, find_iv
-from core.state_manager import MarketState, clean_json
+from core.latency import LatencyTracer, new_trace, now_ns
+from core.metrics import MetricsRegistry, process_rss_bytes, monitor_loop_lag
+from data.processing.candle_store import ChainCandleStore
+from data.processing.timeframes import TimeframeRollup, SESSION_ANCHOR, minute_iso
+from data.processing.bar_clock import BarClock
+from data.processing.replay_checkpoints import ReplayCheckpoints
+from data.processing.replay_clock import ReplayClock
+from data.processing.session_analytics import oi_levels
+from core.shm_candles import SharedBars, history_table
+from core.dispatch import LatestQueue, Poster
+from core.io_pool import io_pool
+from core.snapshots import SnapshotStore
+from core.state_manager import MarketState, clean_json, ROLE_INDEX, ROLE_CE, ROLE_PE, ROLE_CHAIN_CE, ROLE_CHAIN_PE, PANEL_ROLES, PANEL_NAMES
+
+startup.mark("imports")
 
 IST_TZ = timezone(timedelta(hours=5, minutes=30))
 ENGINE_URL = "http://localhost:8002/evaluate"
+ENGINE_STATE_URL = "http://localhost:8002/state"
+ENGINE_WARM_URL = "http://localhost:8002/warm"
+# GlobalState fields a replay checkpoint restores (pickled together, so shared records and trades stay shared)
+CHECKPOINT_FIELDS = ("market_state", "exits", "pnl_tracker", "candles", "clock", "index_sym", "ce_sym", "pe_sym",
+                     "strike_map", "chain_center", "chain_step")
 
 app = FastAPI(title="OptionScalp: Data Acquisition Hub (Cockpit v3.0 Spec)")
 app.add_middleware(
@@ -34,37 +56,209 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-dm = DataManager()
-db = DatabaseManager(db_path=config.DB_PATH)
-mongo = MongoDataManager()
+# Built on first use: pandas, tvDatafeed and pymongo are only imported, and TradingView only logged into, when needed
+def _data_manager():
+    from data.gathering.data_manager import DataManager
+    return DataManager()
+
+def _database():
+    from data.database import DatabaseManager
+    return DatabaseManager(db_path=config.DB_PATH)
+
+def _mongo():
+    from data.gathering.mongo_manager import MongoDataManager
+    return MongoDataManager()
+
+dm, db, mongo = Lazy("data_manager", _data_manager), Lazy("sqlite", _database), Lazy("mongo", _mongo)
 
 class GlobalState:
     def __init__(self):
         self.market_state = MarketState()
-        self.active_trades = []
+        self.exits = ExitManager(config.SQUARE_OFF_TIME, config.PARTIAL_EXIT_FRACTION)
         self.pnl_tracker = PnLTracker()
         self.websocket = None
+        self.client_id = None
         self.is_playing = False
         self.is_live = False
         self.index_sym, self.ce_sym, self.pe_sym = "", "", ""
         self.strike_map = {} # strike -> {"ce_key": ..., "pe_key": ...}
+        self.candles = ChainCandleStore(capacity=config.CHAIN_CANDLE_BARS) # 1m bars for every tracked instrument
+        self.chain_center, self.chain_step, self.recentering = None, 50, False
+        self.clock = BarClock(config.BAR_CLOSE_GRACE_SEC) # exchange-time minute boundaries
+        self.shared = {} # ("panel", role, tf) / ("chain", key) -> SharedBars the engine reads
+        self.shared_ok = config.SHARED_CANDLES
+        self.replay = None # (date, instrument keys, ReplayCheckpoints, tick source) of the session being replayed
+        self.recorder = None # TickRecorder while live ticks are being recorded
+        self.replay_task = None
+        self.replay_clock = ReplayClock(config.REPLAY_SPEED) # paces replay by tick time; pause/resume/speed/step act on it
+        self.snapshots = None # SnapshotStore of the live session's trades, PnL and OI baselines
+        # (index, spot) -> getNiftyAndBNFnOKeys-shaped mapping for that index, used when the chain re-centers
+        self.chain_mapper = lambda idx_raw, spot: dm.getNiftyAndBNFnOKeys([idx_raw], {idx_raw: spot}).get(idx_raw)
 
 state = GlobalState()
+tracer = LatencyTracer("hub")
+
+metrics = MetricsRegistry("hub")
+m_loop_lag = metrics.gauge("event_loop_lag_ms", "Last measured event loop wake-up delay")
+m_loop_lag_hist = metrics.histogram("event_loop_lag_seconds", "Event loop wake-up delay")
+m_tick_queue = metrics.gauge("tick_queue_depth", "Live ticks handed to the loop but not yet processed")
+m_bcast_bytes = metrics.counter("broadcast_bytes_total", "MarketState bytes sent", label="client", rate=True)
+m_bcast_msgs = metrics.counter("broadcasts_total", "MarketState messages sent", label="client", rate=True)
+m_replay_docs = metrics.counter("replay_docs_total", "Mongo tick docs replayed", rate=True)
+m_engine_calls = metrics.counter("engine_dispatch_total", "Minute boundaries sent to the engine", rate=True)
+m_late_ticks = metrics.counter("late_ticks_total", "Ticks for a minute that was already finalized")
+m_engine_errors = metrics.counter("engine_dispatch_errors_total", "Engine dispatches that failed or timed out")
+m_engine_seconds = metrics.histogram("engine_dispatch_seconds", "Engine /evaluate round trip")
+metrics.gauge_fn("engine_queue_depth", "Boundaries waiting for the engine", lambda: len(engine_queue))
+metrics.counter_fn("engine_coalesced_total", "Pending boundaries replaced by a newer one for the same index", lambda: engine_queue.coalesced)
+metrics.counter_fn("engine_dropped_total", "Pending boundaries dropped because the queue was full", lambda: engine_queue.dropped)
+m_signals = metrics.counter("signals_total", "Signals accepted on /api/signal", label="type")
+metrics.counter_fn("ticks_total", "Ticks processed per instrument",
+                   lambda: {rec.sym: rec.ticks for rec in state.market_state.instruments.values()}, label="instrument", rate=True)
+metrics.gauge_fn("sqlite_pending_writes", "SQLite writes waiting on or holding the DB", lambda: db.pending_writes if db.ready else 0)
+metrics.gauge_fn("active_trades", "Open paper trades", lambda: len(state.exits))
+metrics.gauge_fn("process_rss_bytes", "Resident set size", process_rss_bytes)
+metrics.gauge_fn("io_pool_pending", "Blocking data calls queued or running on the I/O pool", lambda: io_pool.pending)
+metrics.counter_fn("io_pool_timeouts_total", "Blocking data calls that timed out", lambda: io_pool.timeouts)
+
+@app.on_event("startup")
+async def start_monitors():
+    asyncio.create_task(monitor_loop_lag(m_loop_lag, m_loop_lag_hist))
+    engine_poster.start()
+    if config.RUNTIME_SNAPSHOTS:
+        with startup.phase("restore"): await restore_runtime()
+        asyncio.create_task(snapshot_loop())
+    startup.ready("Hub")
+    asyncio.create_task(warm_clients())
+
+async def warm_clients():
+    # After the hub is accepting connections: the first fetch_live/start_replay should not pay for pandas and SQLite setup
+    for client in (dm, db):
+        try: await io_pool.run(client.load)
+        except Exception as e: logger.warning(f"Warm-up failed: {e!r}")
+
+@app.get("/api/startup")
+async def get_startup():
+    """Cold start broken down by phase: imports, app setup, startup hooks and clients built on first use"""
+    return startup.report()
+
+@app.on_event("shutdown")
+async def release_shared():
+    await engine_poster.close()
+    if state.snapshots:
+        if state.is_live: state.snapshots.save(*capture_runtime())
+        state.snapshots.close()
+    close_shared()
+    if state.recorder: state.recorder.close()
+    io_pool.shutdown()
+
+async def restore_runtime():
+    """The live session's paper trades, PnL, OI-change baselines and session analytics as of the crash or restart:
+    the last snapshot plus the journal after it, or the journal alone before the first snapshot. Only today's session is restored."""
+    state.snapshots = SnapshotStore(os.path.join(config.SNAPSHOT_DIR, "hub"), header=lambda: ("session", session_date()))
+    snap, events = await io_pool.run(state.snapshots.load)
+    today = session_date()
+    if snap is not None and snap["date"] == today:
+        state.exits, state.pnl_tracker = snap["exits"], snap["pnl_tracker"]
+        state.market_state.session_start_oi.update(snap["session_start_oi"])
+        for analytics in snap.get("analytics", {}).values(): analytics.resync()
+        state.market_state.analytics.update(snap.get("analytics", {}))
+    baselines = state.market_state.session_start_oi
+    # Without a snapshot of today (a crash before the first one), today's journals alone rebuild it on the fresh state
+    day = snap["date"] if snap is not None else None
+    for kind, *ev in events:
+        if kind == "session": day = ev[0] # each journal opens with the session it belongs to
+        elif day != today: continue
+        elif kind == "open":
+            trade = ev[0]
+            state.exits.add(trade)
+            state.pnl_tracker.add_trade(trade)
+        elif kind == "exit":
+            ref, price, ts, reason, fraction = ev
+            trade = state.pnl_tracker.trades[ref]
+            state.pnl_tracker.mark(trade.symbol, price, ts) # as the tick that triggered it did
+            state.exits.apply(trade, price, ts, reason, fraction)
+        elif kind == "trail":
+            ref, peak, sl = ev
+            state.exits.apply_trail(state.pnl_tracker.trades[ref], peak, sl)
+        elif kind == "oi": baselines[ev[0]] = ev[1]
+    logger.info(f"Restored {len(state.exits)} open trades, {len(state.pnl_tracker.trades)} trades, "
+                f"{len(baselines)} OI baselines ({len(events)} journal events)")
+
+def session_date():
+    return datetime.now(IST_TZ).strftime("%Y-%m-%d")
+
+def journal(event):
+    # Live state changes between snapshots; replays are never persisted
+    if state.is_live and state.snapshots: state.snapshots.append(event)
+
+def capture_runtime():
+    """(pickled runtime state, journal it continues in); on the loop, so it is consistent with the journal."""
+    gen = state.snapshots.rotate()
+    snap = {"date": session_date(), "exits": state.exits, "pnl_tracker": state.pnl_tracker,
+            "session_start_oi": state.market_state.session_start_oi, "analytics": state.market_state.analytics}
+    return pickle.dumps(snap, protocol=pickle.HIGHEST_PROTOCOL), gen
+
+async def snapshot_runtime():
+    try: await io_pool.run(state.snapshots.save, *capture_runtime())
+    except Exception as e: logger.warning(f"Runtime snapshot failed: {e!r}")
+
+async def snapshot_loop():
+    while True:
+        await asyncio.sleep(config.SNAPSHOT_SEC)
+        if state.is_live: await snapshot_runtime()
+
+@app.get("/metrics")
+async def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 @app.get("/")
 async def root():
     return {"status": "OptionScalp Data Acquisition Hub is running", "spec": "Cockpit v3.0"}
 
+@app.get("/api/latency")
+async def get_latency(reset: bool = False):
+    """Per-stage tick-to-signal latency (p50/p99/max) as seen by the hub"""
+    snap = tracer.snapshot()
+    if reset: tracer.reset()
+    return snap
+
+@app.get("/api/pnl")
+async def get_pnl(curve: bool = False):
+    """Running paper-trade PnL, per-strategy breakdown and (optionally) the per-minute equity curve"""
+    out = state.pnl_tracker.get_stats(by_strategy=True)
+    if curve: out["equity_curve"] = state.pnl_tracker.equity_curve
+    return out
+
+@app.get("/api/chain/candles")
+async def get_chain_candles(field: str = "close", n: int = 30):
+    """Last n one-minute bars of `field` for every tracked instrument (null where it did not trade)"""
+    candles = state.candles
+    if field not in ("open", "high", "low", "close", "volume", "oi") or not len(candles): return {"minutes": [], "instruments": {}}
+    keys = list(candles.rows)
+    rows = candles.matrix(field, keys, n)
+    return clean_json({"minutes": [int(m) * 60 for m in candles.times(n)],
+                       "instruments": {candles.records[k].sym: row.tolist() for k, row in zip(keys, rows)}})
+
 @app.post("/api/signal")
 async def receive_signal(signal: dict):
     """Signals from Strategy Engine or Exit logic"""
+    trace = signal.get('trace')
+    if trace:
+        tracer.record("close_to_signal", trace.get('close_ns'))
+        tracer.record("report_to_accept", trace.get('report_ns'))
     sig_type = signal.get('type', 'BUY').upper()
     if sig_type == 'LONG': sig_type = 'BUY'
     elif sig_type == 'SHORT': sig_type = 'SELL'
 
     logger.info(f"Signal: {signal['strat_name']} on {signal['symbol']} Type: {sig_type}")
+    m_signals.labels(sig_type).inc()
 
     if sig_type == 'BUY':
+        target, tp1 = signal.get('target'), signal.get('tp1')
+        if config.PARTIAL_EXITS and tp1 is None:
+            levels = RiskManager().get_sl_tp(signal['entry_price'], state.index_sym)
+            tp1, target = levels['tp1'], target if target is not None else levels['tp2']
         new_trade = Trade(
             symbol=signal['symbol'],
             entry_price=signal['entry_price'],
@@ -72,9 +266,13 @@ async def receive_signal(signal: dict):
             trade_type='LONG',
             strategy_name=signal['strat_name'],
             sl=signal.get('sl'),
-            target=signal.get('target')
+            target=target,
+            tp1=tp1,
+            trail=signal.get('trail', config.TRAILING_STOP_PTS)
         )
-        state.active_trades.append(new_trade)
+        state.exits.add(new_trade)
+        state.pnl_tracker.add_trade(new_trade)
+        journal(("open", new_trade))
 
     new_signal = {
         "id": str(uuid.uuid4()),
@@ -90,6 +288,13 @@ async def receive_signal(signal: dict):
         state.market_state.ceOption['signals'].append(new_signal)
     elif signal['symbol'] == state.pe_sym:
         state.market_state.peOption['signals'].append(new_signal)
+    else:
+        # A strike the engine picked from the chain: shown on its side's panel, labelled with the strike's symbol
+        ms = state.market_state
+        rec = ms.instruments.get(ms.instrument_keys.get(signal['symbol']))
+        if rec is not None and rec.role in (ROLE_CHAIN_CE, ROLE_CHAIN_PE):
+            new_signal['label'] = f"{signal['strat_name']} {signal['symbol']}"
+            (ms.ceOption if rec.role == ROLE_CHAIN_CE else ms.peOption)['signals'].append(new_signal)
 
     return {"status": "accepted"}
 
@@ -98,202 +303,558 @@ async def receive_signal(signal: dict):
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
     state.websocket = websocket
+    state.client_id = f"{websocket.client.host}:{websocket.client.port}" if websocket.client else "ui"
     logger.info("UI Connected")
     try:
         while True:
             msg = await websocket.receive_text()
             data = json.loads(msg)
-            if data['type'] == 'fetch_live': await handle_fetch_live(data)
-            elif data['type'] == 'start_replay': await handle_start_replay(data)
-            elif data['type'] == 'ping': await websocket.send_json({"type": "pong"})
+            try:
+                if data['type'] == 'fetch_live': await handle_fetch_live(data)
+                elif data['type'] == 'start_replay': await handle_start_replay(data)
+                elif data['type'] == 'seek': await handle_seek(data)
+                elif data['type'] in ('pause', 'resume', 'set_speed', 'step_candle'): await handle_replay_control(data)
+                elif data['type'] == 'set_view': handle_set_view(data)
+                elif data['type'] == 'ping': await websocket.send_json({"type": "pong"})
+            except TimeoutError as e: # a data source hung; only this client waited for it
+                await websocket.send_json({"type": "error", "message": str(e)})
     except WebSocketDisconnect:
         state.websocket = None
         logger.info("UI Disconnected")
 
+def handle_set_view(data):
+    """Which panels are on screen and which chain symbols/keys have their depth ladder open."""
+    ms = state.market_state
+    hidden = [PANEL_NAMES[p] for p in data.get('hidden_panels', []) if p in PANEL_NAMES]
+    depth_keys = [ms.instrument_keys.get(k, k) for k in data.get('depth', [])]
+    ms.set_view(hidden, depth_keys)
+
 async def handle_start_replay(data):
-    state.is_playing, state.is_live = False, False
+    speed = state.replay_clock.speed
+    if 'speed' in data:
+        try: speed = None if data['speed'] == "max" else float(data['speed'])
+        except (KeyError, TypeError, ValueError):
+            return await state.websocket.send_json({"type": "error", "message": f"Bad replay speed {data.get('speed')!r}"})
+    await stop_replay()
+    state.is_live = False
     state.market_state = MarketState()
 
     idx_raw = data['index'].replace("NSE:", "")
     state.index_sym = f"NSE:{idx_raw}"
+    engine_queue.clear() # the previous run's boundaries
+    await engine_poster.drain()
+    await reset_engine()
     date_str = data.get('date', datetime.now().strftime("%Y-%m-%d"))
 
     ref_date = datetime.strptime(date_str, "%Y-%m-%d").replace(hour=10, minute=0)
-    idx_df = dm.get_data(state.index_sym, n_bars=1, reference_date=ref_date)
+    idx_df = await dm.get_data_async(state.index_sym, n_bars=1, reference_date=ref_date)
     if idx_df.empty: return await state.websocket.send_json({"type": "error", "message": "No index data"})
 
-    mapping = dm.getNiftyAndBNFnOKeys([idx_raw], {idx_raw: idx_df['close'].iloc[0]})
+    mapping = await dm.getNiftyAndBNFnOKeys_async([idx_raw], {idx_raw: idx_df['close'].iloc[0]})
     if idx_raw not in mapping: return await state.websocket.send_json({"type": "error", "message": "Failed to map instruments"})
 
     setup_market_mapping(idx_raw, mapping[idx_raw], idx_df['close'].iloc[0])
 
     all_keys = list(state.market_state.rev_instrument_keys.keys())
-    ticks_cursor = mongo.get_all_ticks_for_session(all_keys, date_str)
+    source = data.get('source', 'mongo')
+    ticks_cursor = session_ticks(source, all_keys, date_str)
 
+    ckpts = ReplayCheckpoints(config.REPLAY_CHECKPOINT_DIR, idx_raw, date_str, config.REPLAY_CHECKPOINT_MIN)
+    state.replay = (date_str, all_keys, ckpts, source)
+    state.replay_clock = ReplayClock()
+    state.replay_clock.set_speed(speed)
     state.is_playing = True
-    asyncio.create_task(replay_engine(ticks_cursor))
+    state.replay_task = asyncio.create_task(replay_engine(ticks_cursor, ckpts))
+
+def session_ticks(source, keys, date_str, start=None):
+    """A replay's tick docs (async iterator) from Mongo's tick_data or, with source "recording", from the hub's own tick
+    recordings; `start` (epoch s) resumes mid-session."""
+    if source == "recording": return io_pool.iterate(TickReader(config.TICK_RECORD_DIR).docs(date_str, keys, start=start))
+    # tick_data holds naive IST wall-clock times
+    return mongo.session_ticks_async(keys, date_str, start=datetime.fromtimestamp(start, IST_TZ).replace(tzinfo=None) if start is not None else None)
+
+def tick_time(doc):
+    """A tick doc's `_insertion_time` as epoch seconds: naive (Mongo) is IST wall-clock, aware (recordings, live) is absolute."""
+    t = doc['_insertion_time']
+    return (t if t.tzinfo else t.replace(tzinfo=IST_TZ)).timestamp()
+
+async def handle_seek(data):
+    """{"type": "seek", "time": "HH:MM"}: jump the replay to that time of its day via the nearest earlier checkpoint."""
+    if state.replay is None: return await state.websocket.send_json({"type": "error", "message": "No replay to seek"})
+    date_str, keys, ckpts, source = state.replay
+    target = datetime.strptime(f"{date_str} {data['time']}", "%Y-%m-%d %H:%M").replace(tzinfo=IST_TZ).timestamp()
+    start = ckpts.nearest(target)
+    if start is None: return await state.websocket.send_json({"type": "error", "message": f"No checkpoint before {data['time']}"})
+    await stop_replay()
+    await restore_checkpoint(ckpts, start)
+    cursor = session_ticks(source, keys, date_str, start=start)
+    state.is_playing = True
+    state.replay_task = asyncio.create_task(replay_engine(cursor, ckpts, until=target))
+
+async def handle_replay_control(data):
+    """pause / resume / set_speed {"speed": 0.5-100 or "max"} / step_candle (play until the current candle closes, then pause)."""
+    clock, kind = state.replay_clock, data['type']
+    if kind == 'pause': clock.pause()
+    elif kind == 'resume': clock.resume()
+    elif kind == 'step_candle': clock.step(config.BAR_CLOSE_GRACE_SEC)
+    else:
+        try: clock.set_speed(None if data.get('speed') == "max" else float(data['speed']))
+        except (KeyError, TypeError, ValueError):
+            return await state.websocket.send_json({"type": "error", "message": f"Bad replay speed {data.get('speed')!r}"})
+    await send_replay_status()
+
+async def send_replay_status():
+    """Current state plus where the replay clock stands, so a paused or stepped UI shows exactly that instant."""
+    ws = state.websocket
+    if not ws: return
+    await broadcast_state()
+    clock = state.replay_clock
+    await ws.send_json({"type": "replay_status", "playing": state.is_playing, "paused": clock.paused,
+                        "speed": "max" if clock.speed is None else clock.speed, "time": clock.last})
+
+async def stop_replay():
+    state.is_playing = False
+    task, state.replay_task = state.replay_task, None
+    if task and not task.done():
+        task.cancel()
+        try: await task
+        except asyncio.CancelledError: pass
+
+async def save_checkpoint(ckpts, start):
+    # The engine's strategy vars must have seen every boundary before the checkpoint
+    await engine_poster.drain()
+    snap = {"hub": {f: getattr(state, f) for f in CHECKPOINT_FIELDS}, "engine": await engine_state()}
+    blob = pickle.dumps(snap, protocol=pickle.HIGHEST_PROTOCOL)
+    await io_pool.run(ckpts.save, start, blob)
+
+async def restore_checkpoint(ckpts, start):
+    snap = await io_pool.run(ckpts.load, start)
+    engine_queue.clear() # boundaries from after the checkpoint
+    await engine_poster.drain()
+    close_shared()
+    for f, v in snap["hub"].items(): setattr(state, f, v)
+    state.recentering = False
+    if snap["engine"] is not None: await engine_state(snap["engine"])
+    logger.info(f"Replay restored checkpoint {datetime.fromtimestamp(start):%H:%M:%S}")
+
+async def engine_state(vars=None):
+    """Export (vars=None) or import the engine's strategy vars for this index; None when the engine is unreachable."""
+    try:
+        async with httpx.AsyncClient(timeout=5.0) as client:
+            if vars is None: r = await client.get(ENGINE_STATE_URL, params={"index_sym": state.index_sym})
+            else: r = await client.put(ENGINE_STATE_URL, json={"index_sym": state.index_sym, "vars": vars})
+            r.raise_for_status()
+            return r.json().get("vars")
+    except Exception as e:
+        logger.warning(f"Engine state {'export' if vars is None else 'import'} failed: {e!r}")
+        return None
+
+async def reset_engine():
+    """Drop the engine's strategy vars for this index: a replay starting over runs boundaries the book has already seen."""
+    try:
+        async with httpx.AsyncClient(timeout=5.0) as client:
+            r = await client.delete(ENGINE_STATE_URL, params={"index_sym": state.index_sym})
+            r.raise_for_status()
+    except Exception as e:
+        logger.warning(f"Engine state reset failed: {e!r}")
+
+async def warm_engine():
+    """Have the engine warm start this index from stored bars now, rather than on the first boundary."""
+    body = {"index_sym": state.index_sym, "ce_sym": state.ce_sym, "pe_sym": state.pe_sym, "until": datetime.now(timezone.utc).timestamp()}
+    try:
+        async with httpx.AsyncClient(timeout=config.IO_TIMEOUT_SEC) as client:
+            r = await client.post(ENGINE_WARM_URL, json=body)
+            r.raise_for_status()
+            logger.info(f"Engine warm start: {r.json().get('warm')}")
+    except Exception as e:
+        logger.warning(f"Engine warm start request failed: {e!r}")
 
 def setup_market_mapping(idx_raw, mapping, spot):
-    state.market_state.instrument_keys[state.index_sym] = "NSE_INDEX|Nifty Bank" if "BANK" in idx_raw else "NSE_INDEX|Nifty 50"
-    state.market_state.rev_instrument_keys[state.market_state.instrument_keys[state.index_sym]] = state.index_sym
-
+    ms, candles = state.market_state, state.candles
+    candles.clear()
+    close_shared()
+    state.clock = BarClock(config.BAR_CLOSE_GRACE_SEC)
+    ms.timeframes = {role: TimeframeRollup(config.CANDLE_TIMEFRAMES) for role in PANEL_ROLES}
+    idx_key = "NSE_INDEX|Nifty Bank" if "BANK" in idx_raw else "NSE_INDEX|Nifty 50"
     # Initialize underlying tick with spot price
-    state.market_state.underlying['tick']['ltp'] = spot
+    rec = ms.register(idx_key, state.index_sym, ROLE_INDEX)
+    rec.ltp = spot
+    candles.track(rec)
 
-    strike = dm.get_atm_strike(spot, step=100 if "BANK" in idx_raw else 50)
+    state.chain_step = 100 if "BANK" in idx_raw else 50
+    strike = state.chain_center = dm.get_atm_strike(spot, step=state.chain_step)
     for opt in mapping['options']:
         if opt['strike'] == strike:
             state.ce_sym, state.pe_sym = f"NSE:{opt['ce_trading_symbol']}", f"NSE:{opt['pe_trading_symbol']}"
-            for k, s in [(opt['ce'], state.ce_sym), (opt['pe'], state.pe_sym)]:
-                state.market_state.instrument_keys[s] = k
-                state.market_state.rev_instrument_keys[k] = s
+            candles.track(ms.register(opt['ce'], state.ce_sym, ROLE_CE, opt['strike']))
+            candles.track(ms.register(opt['pe'], state.pe_sym, ROLE_PE, opt['strike']))
+        else:
+            candles.track(ms.register(opt['ce'], f"NSE:{opt['ce_trading_symbol']}", ROLE_CHAIN_CE, opt['strike']))
+            candles.track(ms.register(opt['pe'], f"NSE:{opt['pe_trading_symbol']}", ROLE_CHAIN_PE, opt['strike']))
         state.strike_map[opt['strike']] = {"ce_key": opt['ce'], "pe_key": opt['pe']}
-        state.market_state.rev_instrument_keys[opt['ce']] = f"CE_{opt['strike']}"
-        state.market_state.rev_instrument_keys[opt['pe']] = f"PE_{opt['strike']}"
 
-async def replay_engine(cursor):
-    last_emit_time = 0
-    for doc in cursor:
+def maybe_recenter(spot):
+    if state.recentering or state.chain_center is None or abs(spot - state.chain_center) < state.chain_step: return
+    state.recentering = True
+    asyncio.create_task(recenter_chain(spot))
+
+async def recenter_chain(spot):
+    idx_raw = state.index_sym.replace("NSE:", "")
+    try:
+        # Instrument master lookups are pandas-heavy; keep them off the loop
+        mapping = await io_pool.run(state.chain_mapper, idx_raw, spot)
+        if mapping: apply_chain_window(mapping, spot)
+    except Exception as e:
+        logger.error(f"Chain re-center failed: {e}")
+    finally:
+        state.recentering = False
+
+def apply_chain_window(mapping, spot):
+    """Swap the tracked chain strikes for `mapping`'s, subscribing/unsubscribing only the difference."""
+    ms, candles = state.market_state, state.candles
+    want = {}
+    for opt in mapping['options']:
+        want[opt['ce']] = (f"NSE:{opt['ce_trading_symbol']}", ROLE_CHAIN_CE, opt['strike'])
+        want[opt['pe']] = (f"NSE:{opt['pe_trading_symbol']}", ROLE_CHAIN_PE, opt['strike'])
+    # Panel instruments stay put: the charts keep their symbols for the session. So does a strike with an open
+    # trade, which needs its ticks for marks and exits; a later re-center drops it once the trade is closed.
+    gone = [k for k, rec in ms.instruments.items()
+            if rec.role in (ROLE_CHAIN_CE, ROLE_CHAIN_PE) and k not in want and rec.sym not in state.exits.books]
+    added = [(k, v) for k, v in want.items() if k not in ms.instruments]
+    for key in gone:
+        rec = ms.unregister(key)
+        candles.untrack(key)
+        drop_oi_side(rec)
+    for key, (sym, role, strike) in added:
+        candles.track(ms.register(key, sym, role, strike))
+    state.strike_map = {opt['strike']: {"ce_key": opt['ce'], "pe_key": opt['pe']} for opt in mapping['options']}
+    state.chain_center = dm.get_atm_strike(spot, step=state.chain_step)
+
+    upstox = feed_manager.upstox_feed
+    if upstox:
+        if gone: upstox.remove_symbols(gone)
+        if added: upstox.add_symbols([{"symbol": sym, "key": key} for key, (sym, _, _) in added])
+    logger.info(f"Chain re-centered on {state.chain_center}: +{len(added)} -{len(gone)} instruments")
+
+def drop_oi_side(rec):
+    ms = state.market_state
+    row = ms.oi_rows.get(rec.strike)
+    if row is None or rec.side is None: return
+    if rec.side == 'callOi': ms.total_call_oi -= row['callOi']
+    else: ms.total_put_oi -= row['putOi']
+    row[rec.side], row[rec.side + 'Change'] = 0, 0
+    if not row['callOi'] and not row['putOi']:
+        del ms.oi_rows[rec.strike]
+        ms.oiData.remove(row)
+    if ms.total_call_oi > 0: ms.pcr = round(ms.total_put_oi / ms.total_call_oi, 2)
+
+async def replay_engine(cursor, ckpts=None, until=None):
+    """
+    Play tick docs through process_tick on the replay clock, checkpointing each interval; up to
+    `until` (a seek target) without pacing or broadcasts. The UI gets state on a wall-clock
+    cadence (REPLAY_BROADCAST_SEC) whatever the replay speed.
+    """
+    clock, loop = state.replay_clock, asyncio.get_running_loop()
+    last_emit = 0.0
+    async for doc in cursor:
         if not state.is_playing: break
         if '_id' in doc: del doc['_id']
+        curr_ts = tick_time(doc)
+        if until is not None and curr_ts >= until:
+            until = None
+            clock.seek(curr_ts)
+            await send_replay_status()
+        if until is None:
+            if clock.hold(): await send_replay_status() # a step just closed its candle
+            await clock.wait(curr_ts)
+        start = ckpts.due(curr_ts) if ckpts else None
+        if start is not None: await save_checkpoint(ckpts, start)
+        m_replay_docs.inc()
         await process_tick(doc)
-        curr_ts = doc['_insertion_time'].timestamp()
-        if curr_ts - last_emit_time >= 1.0:
-            if state.websocket: await state.websocket.send_json(clean_json(state.market_state.to_dict()))
-            last_emit_time = curr_ts
-            await asyncio.sleep(0.01)
+        # Replay keeps pace with the engine, so every boundary is evaluated and checkpoints are exact
+        if len(engine_queue): await engine_poster.drain()
+        now = loop.time()
+        if now - last_emit >= config.REPLAY_BROADCAST_SEC:
+            last_emit = now
+            if until is None: await broadcast_state()
+            await asyncio.sleep(0) # flat-out playback still lets UI commands in
+    state.is_playing = False
+    await send_replay_status()
 
 last_broadcast_time = 0
+_EMPTY = {}
+
+async def broadcast_state():
+    ws = state.websocket
+    if not ws: return
+    text = json.dumps(clean_json(state.market_state.to_dict()), separators=(",", ":"), ensure_ascii=False)
+    await ws.send_text(text)
+    m_bcast_bytes.labels(state.client_id).inc(len(text))
+    m_bcast_msgs.labels(state.client_id).inc()
 
 async def process_tick(doc):
     global last_broadcast_time
+    t_start = now_ns()
+    trace = doc.get('_trace')
+    if trace: tracer.record("ingest_to_process", trace['ingest_ns'], t_start)
     key = doc.get('instrumentKey') or doc.get('instrument_key')
-    ff = doc.get('fullFeed', {})
+    rec = state.market_state.instruments.get(key)
+    if rec is None: return
+    ff = doc.get('fullFeed', _EMPTY)
     data = ff.get('marketFF') or ff.get('indexFF')
     if not data: return
 
-    sym = state.market_state.rev_instrument_keys.get(key)
-    ltp = data.get('ltpc', {}).get('ltp')
+    ltp = data.get('ltpc', _EMPTY).get('ltp')
     if ltp is None: return
 
-    tick = calculate_tick_metrics(key, data, ltp)
-
-    closed = False
-    if sym == state.index_sym:
-        state.market_state.underlying['tick'] = tick
-        closed = update_history(state.index_sym, state.market_state.underlying['history'], ltp, tick['vtt'], doc['_insertion_time'])
-    elif sym == state.ce_sym:
-        state.market_state.ceOption['tick'] = tick
-        closed = update_history(state.ce_sym, state.market_state.ceOption['history'], ltp, tick['vtt'], doc['_insertion_time'])
-    elif sym == state.pe_sym:
-        state.market_state.peOption['tick'] = tick
-        closed = update_history(state.pe_sym, state.market_state.peOption['history'], ltp, tick['vtt'], doc['_insertion_time'])
-
-    if closed: await trigger_engine(doc['_insertion_time'])
-    check_trade_exits(tick, sym)
-    update_oi_data(key, tick)
+    # Bucket by exchange time (ltt); replayed docs without it fall back to insertion time
+    ltt = data['ltpc'].get('ltt')
+    ts = float(ltt) / 1000 if ltt else tick_time(doc)
+    clock = state.clock
+    clock.observe(ts)
+    boundary = clock.due(ts)
+    if boundary is not None: finalize_boundary(boundary)
+
+    first = rec.start_oi is None
+    rec.update(data, ltp)
+    if first:
+        state.market_state.session_start_oi[key] = rec.start_oi
+        journal(("oi", key, rec.start_oi))
+    minute = int(ts) // 60
+    if rec.session is not None: rec.session.update(minute, ltp, rec.vtt, rec.atp, rec.best_bid, rec.best_ask)
+    if minute < clock.open_minute:
+        # Its bar was already finalized and sent; keep price/OI/exits current but leave the bars alone
+        m_late_ticks.inc()
+    else:
+        state.candles.on_tick(rec, minute)
+        if rec.role in PANEL_ROLES:
+            update_history(rec, state.market_state.panels[rec.role]['history'], minute)
+            if rec.role == ROLE_INDEX and state.is_live and config.CHAIN_RECENTER: maybe_recenter(ltp)
+    if trace: tracer.record("process_tick", t_start)
+    state.pnl_tracker.mark(rec.sym, rec.ltp, ts)
+    check_trade_exits(rec, ts)
+    update_oi_data(rec)
 
     # Broadcast for Live mode
     if state.is_live and state.websocket:
         curr_ts = datetime.now().timestamp()
         if curr_ts - last_broadcast_time >= 1.0:
-            await state.websocket.send_json(clean_json(state.market_state.to_dict()))
+            await broadcast_state()
             last_broadcast_time = curr_ts
 
-def calculate_tick_metrics(key, data, ltp):
-    current_oi = int(data.get('oi', 0))
-    start_oi = state.market_state.session_start_oi.get(key)
-    if start_oi is None:
-        state.market_state.session_start_oi[key] = current_oi
-        start_oi = current_oi
-
-    oi_change = current_oi - start_oi
-    tick = {
-        "ltp": ltp, "ltq": int(data.get('ltpc', {}).get('ltq', 0)),
-        "atp": float(data.get('atp', ltp)), "vtt": int(data.get('vtt', 0)),
-        "oi": current_oi, "oiChange": oi_change,
-        "oiChangePct": round((oi_change/start_oi*100) if start_oi>0 else 0, 2),
-        "iv": float(data.get('iv', 0)),
-        "tbq": int(data.get('tbq', 0)), "tsq": int(data.get('tsq', 0))
-    }
-    prev_p, prev_oi = state.market_state.last_price.get(key, ltp), state.market_state.last_oi.get(key, current_oi)
-    tick['buildup'] = calculate_buildup(ltp - prev_p, current_oi - prev_oi)
-    state.market_state.last_price[key], state.market_state.last_oi[key] = ltp, current_oi
-
-    greeks = data.get('optionGreeks', {})
-    tick["greeks"] = {
-        "delta": greeks.get('delta', 0),
-        "theta": greeks.get('theta', 0),
-        "gamma": greeks.get('gamma', 0),
-        "vega": greeks.get('vega', 0),
-        "rho": greeks.get('rho', 0)
-    }
-
-    bid_ask = data.get('marketLevel', {}).get('bidAskQuote', [])
-    tick["depth"] = {
-        "bids": [{"price": b.get('bidP', 0), "quantity": int(b.get('bidQ', 0)), "orders": 0} for b in bid_ask],
-        "asks": [{"price": a.get('askP', 0), "quantity": int(a.get('askQ', 0)), "orders": 0} for a in bid_ask]
-    }
-    return tick
-
-def update_history(sym, history, price, vtt, timestamp):
-    iso_time = timestamp.replace(second=0, microsecond=0, tzinfo=timezone.utc).isoformat()
-    if not history or history[-1]['time'] != iso_time:
-        state.market_state.candle_start_vtt[sym] = vtt
+def update_history(rec, history, minute):
+    price, vtt = rec.ltp, rec.vtt
+    if not history or rec.candle_minute != minute:
+        rec.candle_minute, rec.candle_start_vtt = minute, vtt
+        iso_time = minute_iso(minute)
         history.append({"time": iso_time, "open": price, "high": price, "low": price, "close": price, "volume": 0})
         if len(history) > 100: history.pop(0)
         return True
     else:
         candle = history[-1]
-        candle['high'], candle['low'], candle['close'] = max(candle['high'], price), min(candle['low'], price), price
-        candle['volume'] = max(0, vtt - state.market_state.candle_start_vtt.get(sym, vtt))
+        if price > candle['high']: candle['high'] = price
+        elif price < candle['low']: candle['low'] = price
+        candle['close'] = price
+        candle['volume'] = max(0, vtt - rec.candle_start_vtt)
         return False
 
-def check_trade_exits(tick, sym):
-    for trade in state.active_trades[:]:
-        if trade.symbol == sym:
-            lp, closed = tick['ltp'], False
-            if lp <= trade.sl: closed, reason = True, "SL"
-            elif lp >= trade.target: closed, reason = True, "TARGET"
-            if closed:
-                trade.close(lp, datetime.now(timezone.utc).timestamp(), reason)
-                asyncio.create_task(receive_signal({"strat_name": trade.strategy_name, "symbol": trade.symbol, "entry_price": lp, "type": "EXIT", "reason": reason}))
-                state.active_trades.remove(trade)
-
-def update_oi_data(key, tick):
-    for strike, keys in state.strike_map.items():
-        if key in [keys['ce_key'], keys['pe_key']]:
-            side = 'callOi' if key == keys['ce_key'] else 'putOi'
-            found = False
-            for row in state.market_state.oiData:
-                if row['strike'] == strike:
-                    row[side], row[side+'Change'], found = tick['oi'], tick['oiChange'], True
-                    break
-            if not found:
-                state.market_state.oiData.append({
-                    "strike": strike,
-                    "callOi": tick['oi'] if side=='callOi' else 0,
-                    "putOi": tick['oi'] if side=='putOi' else 0,
-                    "callOiChange": tick['oiChange'] if side=='callOi' else 0,
-                    "putOiChange": tick['oiChange'] if side=='putOi' else 0
-                })
-
-    total_c = sum(row['callOi'] for row in state.market_state.oiData)
-    total_p = sum(row['putOi'] for row in state.market_state.oiData)
-    if total_c > 0:
-        new_pcr = round(total_p / total_c, 2)
-        state.market_state.pcrChange, state.market_state.pcr = round(new_pcr - state.market_state.pcr, 4), new_pcr
-
-async def trigger_engine(timestamp):
+def finalize_boundary(boundary):
+    """Close every bar that started before `boundary` (epoch minute) and evaluate once for all timeframes."""
+    close_ns = now_ns()
+    state.candles.close_through(boundary)
+    ms = state.market_state
+    histories, closed_iso = {}, minute_iso(boundary - 1)
+    for role in PANEL_ROLES:
+        history = ms.panels[role]['history']
+        rec = ms.panel_records.get(role)
+        # A tick inside the grace period may already have opened the next bar
+        if rec is not None and rec.candle_minute is not None and rec.candle_minute >= boundary: history = history[:-1]
+        histories[role] = history
+        rollup = ms.timeframes.get(role)
+        if rollup is None: continue
+        if history and history[-1]['time'] == closed_iso: rollup.on_close(history[-1], boundary - 1)
+        rollup.close_through(boundary)
+    if state.is_live and config.STORE_LIVE_CANDLES: store_closed_bars(histories, boundary)
+    if config.SESSION_ANALYTICS: ms.session_levels = session_levels(boundary - 1)
+    tfs = [tf for tf in config.CANDLE_TIMEFRAMES if tf > 1 and (boundary - SESSION_ANCHOR) % tf == 0]
+    # No panel printed in the minute before `boundary`: the engine would only re-run bars it has already seen
+    if not any(h and h[-1]['time'] == closed_iso for h in histories.values()): return
+    trace = new_trace(boundary * 60)
+    trace['close_ns'] = close_ns
+    if state.is_live: tracer.observe("boundary_lateness", max(0.0, state.clock.now() - boundary * 60) * 1e6)
+    trigger_engine(boundary * 60, histories, tfs, trace)
+
+def session_levels(through):
+    """Session VWAP/bands, volume profile and delta of the panel instruments as of the close of minute `through`, plus the chain's OI walls."""
+    out = {"oi": oi_levels(state.market_state.oiData)}
+    for name, rec in panel_books():
+        levels = rec.session.levels(through, config.VALUE_AREA, config.VWAP_BAND_SD) if rec.session is not None else None
+        # Resting quantities on the book, not flow: published next to the traded delta as pressure
+        if levels is not None and rec.tbq + rec.tsq: levels["book_imbalance"] = round((rec.tbq - rec.tsq) / (rec.tbq + rec.tsq), 4)
+        out[name] = levels
+    return out
+
+def store_closed_bars(histories, boundary):
+    """The panel bars that closed at `boundary` into ohlcv, off the loop: the engine warm starts from them after a restart."""
+    iso, rows = minute_iso(boundary - 1), []
+    for role, history in histories.items():
+        rec = state.market_state.panel_records.get(role)
+        if rec is None or not history or history[-1]['time'] != iso: continue
+        bar = history[-1]
+        rows.append((rec.sym.replace("NSE:", ""), (boundary - 1) * 60, bar['open'], bar['high'], bar['low'], bar['close'], bar['volume']))
+    if rows: asyncio.create_task(store_candles(rows))
+
+async def store_candles(rows):
+    try: await io_pool.run(lambda: db.store_candles(config.OHLCV_1M, rows))
+    except Exception as e: logger.warning(f"Storing {len(rows)} closed bars failed: {e!r}")
+
+async def bar_clock_loop():
+    """Live: finalize minute boundaries on time even when no instrument prints after them."""
+    clock = state.clock
+    while state.is_live:
+        await asyncio.sleep(min(1.0, max(0.05, clock.seconds_until_due())))
+        boundary = clock.due(clock.now())
+        if boundary is not None: finalize_boundary(boundary)
+
+def check_trade_exits(rec, ts):
+    exits = state.exits
+    if not exits.open: return
+    events = (*exits.on_tick(rec.sym, rec.ltp, ts), *exits.check_time(ts))
+    if exits.raised:
+        for trade in exits.raised: journal(("trail", trade.ref, trade.peak, trade.sl))
+        exits.raised.clear()
+    for trade, price, reason, fraction in events:
+        journal(("exit", trade.ref, price, ts, reason, fraction))
+        exit_signal = {"strat_name": trade.strategy_name, "symbol": trade.symbol, "entry_price": price, "type": "EXIT", "reason": reason}
+        if fraction < 1: exit_signal['fraction'] = round(fraction, 4)
+        asyncio.create_task(receive_signal(exit_signal))
+
+def update_oi_data(rec):
+    if rec.strike is None: return
+    ms, side = state.market_state, rec.side
+    row = ms.oi_rows.get(rec.strike)
+    if row is None:
+        row = {"strike": rec.strike, "callOi": 0, "putOi": 0, "callOiChange": 0, "putOiChange": 0}
+        ms.oi_rows[rec.strike] = row
+        ms.oiData.append(row)
+
+    # Keep PCR totals incremental instead of summing the chain on every tick
+    if side == 'callOi': ms.total_call_oi += rec.oi - row[side]
+    else: ms.total_put_oi += rec.oi - row[side]
+    row[side], row[side+'Change'] = rec.oi, rec.oi_change
+
+    if ms.total_call_oi > 0:
+        new_pcr = round(ms.total_put_oi / ms.total_call_oi, 2)
+        ms.pcrChange, ms.pcr = round(new_pcr - ms.pcr, 4), new_pcr
+
+def panel_books():
+    records = state.market_state.panel_records
+    return [(name, records[role]) for name, role in (("index", ROLE_INDEX), ("ce", ROLE_CE), ("pe", ROLE_PE)) if role in records]
+
+def index_buildup():
+    rec = state.market_state.panel_records.get(ROLE_INDEX)
+    return rec.buildup if rec else 'Neutral'
+
+def chain_matrices(n):
+    """Closed 1m bars of every tracked strike per side as (strike x minute) lists, null where a strike did not trade."""
+    candles = state.candles
+    out = {}
+    for side, roles in (("CE", (ROLE_CE, ROLE_CHAIN_CE)), ("PE", (ROLE_PE, ROLE_CHAIN_PE))):
+        recs = sorted((r for r in candles.records.values() if r.role in roles), key=lambda r: r.strike)
+        keys = [r.key for r in recs]
+        out[side] = {"symbols": [r.sym for r in recs], "strikes": [r.strike for r in recs], "delta": [r.delta for r in recs]}
+        for field in ("open", "high", "low", "close", "volume"):
+            m = candles.matrix(field, keys, n + 1, live=False)[:, :-1] # the newest slot is the minute just opened
+            out[side][field] = np.where(np.isnan(m), None, m).tolist()
+    return out
+
+def share(key, table, capacity):
+    seg = state.shared.get(key)
+    if seg is None: seg = state.shared[key] = SharedBars.create(capacity)
+    return [seg.name, seg.write(table)]
+
+def publish_shared(histories, timeframes):
+    """Write this boundary's bars to shared memory; returns {segment: [name, seq]} for the engine, or None to fall back to JSON."""
+    ms, candles = state.market_state, state.candles
+    try:
+        out = {"panels": {}, "timeframes": {tf: {} for tf in timeframes}}
+        for name, role in (("index_data", ROLE_INDEX), ("ce_data", ROLE_CE), ("pe_data", ROLE_PE)):
+            out["panels"][name] = share(("panel", role, 1), history_table(histories[role]), 100)
+            for tf in timeframes: out["timeframes"][tf][name] = share(("panel", role, tf), history_table(ms.panel_history(role, tf)), 100)
+        if config.CHAIN_EVALUATION and len(candles):
+            n = config.CHAIN_EVAL_BARS
+            out["chain"] = {}
+            for side, roles in (("CE", (ROLE_CE, ROLE_CHAIN_CE)), ("PE", (ROLE_PE, ROLE_CHAIN_PE))):
+                recs = sorted((r for r in candles.records.values() if r.role in roles), key=lambda r: r.strike)
+                out["chain"][side] = {"symbols": [r.sym for r in recs], "strikes": [r.strike for r in recs], "delta": [r.delta for r in recs],
+                                      # the newest slot is the minute just opened
+                                      "segments": [share(("chain", r.key), candles.table(r.key, n + 1, live=False)[:, :-1], n) for r in recs]}
+        # Strikes dropped by a re-center release their segments
+        for key in [k for k in state.shared if k[0] == "chain" and k[1] not in candles.rows]: state.shared.pop(key).close()
+        return out
+    except OSError as e:
+        logger.warning(f"Shared memory unavailable ({e!r}); sending bars as JSON")
+        close_shared()
+        state.shared_ok = False
+        return None
+
+def close_shared():
+    for seg in state.shared.values(): seg.close()
+    state.shared = {}
+
+def trigger_engine(close_ts, histories, timeframes=(), trace=None):
+    """
+    Queue one evaluation per boundary: closed 1m bars at the top level, higher timeframes that
+    closed with it nested. engine_poster sends it; the tick path never waits on the engine.
+    """
+    ms = state.market_state
     payload = {
         "index_sym": state.index_sym, "ce_sym": state.ce_sym, "pe_sym": state.pe_sym,
-        "index_data": state.market_state.underlying['history'], "ce_data": state.market_state.ceOption['history'], "pe_data": state.market_state.peOption['history'],
-        "pcr_insights": {"pcr": state.market_state.pcr, "pcr_change": state.market_state.pcrChange, "buildup_status": state.market_state.underlying['tick'].get('buildup', 'Neutral')},
-        "candle_time": int(timestamp.timestamp()) + 19800
+        "pcr_insights": {"pcr": ms.pcr, "pcr_change": ms.pcrChange, "buildup_status": index_buildup()},
+        "book": {name: rec.top_of_book() for name, rec in panel_books()},
+        "candle_time": int(close_ts) + 19800,
+        "trace": trace
     }
-    try:
-        async with httpx.AsyncClient() as client: await client.post(ENGINE_URL, json=payload, timeout=1.0)
-    except: pass
+    # Strategies read the hub's session levels next to PCR instead of recomputing them from their bar window
+    if ms.session_levels: payload["pcr_insights"]["session"] = ms.session_levels
+    shm = publish_shared(histories, timeframes) if state.shared_ok else None
+    if shm: payload["shm"] = shm # bars stay in shared memory; the engine gets segment names
+    else:
+        # Copies: the lists keep growing while the payload waits in the queue (closed bars themselves no longer change)
+        payload.update({
+            "index_data": list(histories[ROLE_INDEX]), "ce_data": list(histories[ROLE_CE]), "pe_data": list(histories[ROLE_PE]),
+            "timeframes": {tf: {"index_data": list(ms.panel_history(ROLE_INDEX, tf)), "ce_data": list(ms.panel_history(ROLE_CE, tf)),
+                                "pe_data": list(ms.panel_history(ROLE_PE, tf))} for tf in timeframes}
+        })
+        if config.CHAIN_EVALUATION and len(state.candles): payload["chain"] = chain_matrices(config.CHAIN_EVAL_BARS)
+    # A slow or stopped engine gets the newest boundary per index, not a backlog
+    engine_queue.put(state.index_sym, payload)
+    engine_poster.start()
+
+def on_engine_send(payload):
+    trace = payload.get('trace')
+    if trace:
+        trace['dispatch_ns'] = now_ns()
+        tracer.record("close_to_dispatch", trace.get('close_ns'), trace['dispatch_ns'])
+    m_engine_calls.inc()
+
+def on_engine_done(payload, ok, seconds):
+    trace = payload.get('trace')
+    if not ok: m_engine_errors.inc()
+    elif trace: tracer.record("engine_roundtrip", trace['dispatch_ns'])
+    m_engine_seconds.observe(seconds * 1e6)
+
+def carry_timeframes(pending, payload):
+    """engine_queue merge: a boundary replacing a pending one keeps the higher-timeframe bars that closed only with
+    the pending one (JSON `timeframes` or shm segments), or the engine would never evaluate them."""
+    if ('shm' in pending) != ('shm' in payload): return payload # shared memory fell back to JSON in between
+    old, new = pending.get('shm', pending), payload.get('shm', payload)
+    if old.get('timeframes'): new['timeframes'] = {**old['timeframes'], **new.get('timeframes', {})}
+    return payload
+
+# One keep-alive client drains the boundaries; a failed one is not retried, the next boundary supersedes it
+engine_queue = LatestQueue(config.ENGINE_QUEUE_SIZE, merge=carry_timeframes)
+engine_poster = Poster(ENGINE_URL, engine_queue, timeout=config.ENGINE_TIMEOUT_SEC, on_send=on_engine_send, on_done=on_engine_done)
 
 async def handle_fetch_live(data):
     state.is_playing, state.is_live = False, True
@@ -301,45 +862,75 @@ async def handle_fetch_live(data):
     state.index_sym = f"NSE:{idx_raw}"
 
     # Initial Setup
-    idx_df = dm.get_data(state.index_sym, n_bars=1)
+    idx_df = await dm.get_data_async(state.index_sym, n_bars=1)
     if not idx_df.empty:
         spot = idx_df['close'].iloc[-1]
-        mapping = dm.getNiftyAndBNFnOKeys([idx_raw], {idx_raw: spot})
+        mapping = await dm.getNiftyAndBNFnOKeys_async([idx_raw], {idx_raw: spot})
         if idx_raw in mapping:
             setup_market_mapping(idx_raw, mapping[idx_raw], spot)
+            asyncio.create_task(warm_engine())
             # Initial broadcast
-            if state.websocket:
-                await state.websocket.send_json(clean_json(state.market_state.to_dict()))
+            await broadcast_state()
+
+    start_live_feed()
+    # The session's first snapshot: its date scopes the journal that follows
+    if state.snapshots: await snapshot_runtime()
 
+def start_live_feed(streamer_factory=None):
+    """Route the shared Upstox feed into process_tick; streamer_factory swaps in e.g. the simulator."""
     main_loop = asyncio.get_running_loop()
+    if config.TICK_RECORDING and state.recorder is None:
+        state.recorder = TickRecorder(config.TICK_RECORD_DIR, config.TICK_RECORD_FLUSH_ROWS, config.TICK_RECORD_FLUSH_SEC, config.TICK_RECORD_SEGMENT_MB)
     def callback(upd):
+        # Recorded on the feed thread: the loop only ever sees the tick itself
+        if state.recorder: record_tick(state.recorder, upd)
+        m_tick_queue.inc()
         asyncio.run_coroutine_threadsafe(process_tick_live(upd), main_loop)
 
     feed_manager.subscribe(callback)
 
     # Start/Get Feed
-    upstox = feed_manager.get_upstox_feed(config.ACCESS_TOKEN)
+    upstox = feed_manager.get_upstox_feed(config.ACCESS_TOKEN, streamer_factory=streamer_factory)
     symbols_with_keys = [{"symbol": sym, "key": key} for key, sym in state.market_state.rev_instrument_keys.items()]
     if symbols_with_keys:
         upstox.add_symbols(symbols_with_keys)
+    asyncio.create_task(bar_clock_loop())
+    return upstox
+
+def record_tick(recorder, update):
+    ts = update.get('timestamp')
+    recorder.append(update.get('instrument_key') or update.get('symbol'), datetime.now(timezone.utc).timestamp(),
+                    update.get('ltp', update.get('price', 0)), update.get('ltq', 0), ts * 1000 if ts else None,
+                    update.get('vtt', update.get('volume', 0)), update.get('oi', 0), update.get('atp', 0),
+                    update.get('iv', 0), update.get('tbq', 0), update.get('tsq', 0))
 
 async def process_tick_live(update):
     # Map update fields to MongoDB-like doc and call process_tick
+    trace = update.get('trace')
+    if trace and trace.get('feed_ts'):
+        tracer.observe("feed_to_ingest", max(0.0, datetime.now(timezone.utc).timestamp() - trace['feed_ts']) * 1e6)
+    market_ff = {
+        "ltpc": {"ltp": update.get('ltp', update.get('price', 0)), "ltq": update.get('ltq') or 0,
+                 "ltt": update['timestamp'] * 1000 if update.get('timestamp') else None},
+        "vtt": update.get('vtt', update.get('volume', 0)),
+        "oi": update.get('oi') or 0,
+        "atp": update.get('atp') or 0,
+        "iv": update.get('iv') or 0,
+        "tbq": update.get('tbq') or 0,
+        "tsq": update.get('tsq') or 0
+    }
+    # Depth and greeks only when the feed sent them (indexFF carries neither)
+    if update.get('marketLevel'): market_ff['marketLevel'] = update['marketLevel']
+    if update.get('optionGreeks'): market_ff['optionGreeks'] = update['optionGreeks']
     doc = {
-        "instrumentKey": update.get('symbol') or update.get('instrument_key'),
+        "_trace": trace,
+        "instrumentKey": update.get('instrument_key') or update.get('symbol'),
         "_insertion_time": datetime.now(timezone.utc),
-        "fullFeed": {
-            "marketFF": {
-                "ltpc": {"ltp": update.get('ltp', update.get('price', 0)), "ltq": update.get('ltq', 0)},
-                "vtt": update.get('vtt', update.get('volume', 0)),
-                "oi": update.get('oi', 0),
-                "atp": update.get('atp', 0),
-                "iv": update.get('iv', 0),
-                "tbq": update.get('tbq', 0),
-                "tsq": update.get('tsq', 0)
-            }
-        }
+        "fullFeed": {"marketFF": market_ff}
     }
-    await process_tick(doc)
+    try: await process_tick(doc)
+    finally: m_tick_queue.dec()
+
+startup.mark("app")
 
 if __name__ == "__main__": uvicorn.run(app, host="0.0.0.0", port=8001)
@@ -1,12 +1,29 @@
+from core.startup import startup # first, so the startup report covers every import below
 from fastapi import FastAPI, Request
-import pandas as pd
+from fastapi.responses import PlainTextResponse
+import asyncio
+import multiprocessing as mp
+import numpy as np
 import uvicorn
 import logging
-from core.strategies.master_strategies import STRATEGIES
-from core.strategies.trend_following import TrendFollowingStrategy
-import pandas_ta as ta
-import httpx
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 import os
+import time
+from datetime import datetime
+import base64
+import pickle
+from core.latency import LatencyTracer, now_ns
+from core.metrics import MetricsRegistry, process_rss_bytes, monitor_loop_lag
+from core.profiler import StrategyProfiler
+from core.chain_eval import ChainSide
+from core.shm_candles import SharedBarsReader, table_frame
+from core.dispatch import FifoQueue, Poster
+from core.snapshots import SnapshotStore
+from data.processing.timeframes import TimeframeRollup, SESSION_ANCHOR, minute_iso
+import config
+
+startup.mark("imports")
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -16,39 +33,503 @@ app = FastAPI(title="OptionScalp: Strategy Engine")
 # Central Hub URL - where we send signals
 ACQUISITION_URL = "http://localhost:8001/api/signal"
 
+@lru_cache(maxsize=None)
+def strategy_classes():
+    """(STRATEGIES, TrendFollowingStrategy), imported on first use: with pandas and pandas_ta they are most of the engine's import time."""
+    with startup.phase("strategies"):
+        from core.strategies.master_strategies import STRATEGIES
+        from core.strategies.trend_following import TrendFollowingStrategy
+    return STRATEGIES, TrendFollowingStrategy
+
+def configure(strat):
+    # Each strategy evaluates on the closes of one timeframe, with its configured thresholds
+    strat.timeframe = config.STRATEGY_TIMEFRAMES.get(strat.name, strat.timeframe)
+    if strat.name in config.STRATEGY_PARAMS: strat.set_params(**config.STRATEGY_PARAMS[strat.name])
+    return strat
+
+class StrategyBook:
+    """
+    Strategy instances of one index, keyed by (side, instrument), so the vars they carry between
+    candles (band levels, mother candles, oversold flags) never mix across indexes or strikes.
+    """
+    def __init__(self, index_sym):
+        self.index_sym = index_sym
+        self.sets = {}
+        self.tf_main = configure(strategy_classes()[1](index_sym))
+        self.warmed = None # (index, CE, PE) symbols warm_book ran for
+        self.backfill = {} # (timeframe, symbol) -> stored bars from the warm start
+        self.through = None # last boundary (epoch minute) evaluated
+
+    def strategies(self, side="INDEX", instrument=None):
+        key = (side, instrument or self.index_sym)
+        strats = self.sets.get(key)
+        if strats is None: strats = self.sets[key] = [configure(s()) for s in strategy_classes()[0]]
+        return strats
+
+    def export_vars(self):
+        """What strategies carry between candles, for replay checkpoints."""
+        return {"tf_main": self.tf_main.vars, "sets": {key: {s.name: s.vars for s in strats} for key, strats in self.sets.items()},
+                "through": self.through}
+
+    def import_vars(self, snap, resume=False):
+        """resume: restoring a runtime snapshot, so warm_book still replays the stored bars after `through`."""
+        self.tf_main.vars, self.sets = snap["tf_main"], {}
+        for key, named in snap["sets"].items():
+            for strat in self.strategies(*key): strat.vars = named.get(strat.name, {})
+        self.through = snap.get("through")
+        # Replay checkpoint vars are exactly as of the seek; a warm start must not replay over them
+        self.warmed = None if resume else (self.warmed or ())
+
+    def extend(self, timeframe, symbol, df):
+        """`df` (hub bars) with older stored bars prepended while it is shorter than WARM_START_BARS."""
+        stored = self.backfill.get((timeframe, symbol))
+        if stored is None: return df
+        if len(df) >= config.WARM_START_BARS:
+            del self.backfill[(timeframe, symbol)] # the hub has caught up
+            return df
+        import pandas as pd
+        older = stored if df.empty else stored[stored.index < df.index[0]]
+        return pd.concat([older, df]).iloc[-config.WARM_START_BARS:] if len(older) else df
+
 class Engine:
     def __init__(self):
-        self.strategies = {
-            "CE": [s() for s in STRATEGIES],
-            "PE": [s() for s in STRATEGIES],
-            "INDEX": [s() for s in STRATEGIES]
-        }
-        self.tf_main = TrendFollowingStrategy()
+        self.books = {} # index symbol -> StrategyBook
+        self.workers = None # StrategyWorkers when evaluation is sharded across processes
+        self.reader = SharedBarsReader() # hub segments this process has mapped
+        self.warm_lock = asyncio.Lock() # in-process warm starts vs evaluation
+        self.snapshots = None # SnapshotStore of every index's strategy vars
+        self.profiler = StrategyProfiler(
+            budget_ms=config.STRATEGY_BUDGET_MS, strikes=config.STRATEGY_BUDGET_STRIKES,
+            enabled=config.STRATEGY_PROFILING, sample_every=config.PROFILE_SAMPLE_EVERY, keep=config.PROFILE_KEEP_SLOWEST
+        )
+
+    def book(self, index_sym):
+        book = self.books.get(index_sym)
+        if book is None: book = self.books[index_sym] = StrategyBook(index_sym)
+        return book
+
+class StrategyWorkers:
+    """
+    Strategy evaluation in `n` worker processes. Each index is pinned to one worker on first
+    sight, so its StrategyBook lives in exactly one place and its candles are evaluated in
+    order, while different indexes evaluate in parallel.
+    """
+    def __init__(self, n):
+        ctx = mp.get_context("spawn")
+        self.shards = []
+        for i in range(n):
+            conn, child = ctx.Pipe()
+            proc = ctx.Process(target=worker_main, args=(child,), name=f"strategy-worker-{i}", daemon=True)
+            proc.start()
+            self.shards.append((conn, proc, asyncio.Lock()))
+        self.routes = {} # index symbol -> shard
+
+    def route(self, index_sym):
+        shard = self.routes.get(index_sym)
+        if shard is None: shard = self.routes[index_sym] = len(self.routes) % len(self.shards)
+        return shard
+
+    async def _call(self, shard, msg):
+        conn, _, lock = self.shards[shard]
+        async with lock:
+            conn.send(msg)
+            return await asyncio.get_running_loop().run_in_executor(None, conn.recv)
+
+    async def evaluate(self, data, emit):
+        """run_evaluation in the index's worker; its signals reach `emit` as each strategy returns, not with the result."""
+        conn, _, lock = self.shards[self.route(data['index_sym'])]
+        loop = asyncio.get_running_loop()
+        async with lock:
+            conn.send(("evaluate", data))
+            while True:
+                kind, body = await loop.run_in_executor(None, conn.recv)
+                if kind == "done": return body
+                emit(body)
+
+    async def vars(self, index_sym, blob=None, resume=False):
+        return await self._call(self.route(index_sym), ("vars", (index_sym, blob, resume)))
+
+    async def warm(self, data):
+        return await self._call(self.route(data['index_sym']), ("warm", data))
+
+    async def reset(self, index_sym):
+        return await self._call(self.route(index_sym), ("reset", index_sym))
+
+    async def profile(self, opts):
+        reports = await asyncio.gather(*(self._call(i, ("profile", opts)) for i in range(len(self.shards))))
+        owners = {i: [sym for sym, s in self.routes.items() if s == i] for i in range(len(self.shards))}
+        return {"workers": [dict(r, indexes=owners[i]) for i, r in enumerate(reports)]}
+
+    def close(self):
+        for conn, proc, _ in self.shards:
+            try: conn.send(None)
+            except OSError: pass
+            proc.join(timeout=2)
+
+def worker_main(conn):
+    """Worker process loop: ("evaluate", payload) -> ("signal", signal) per signal as it is found, then ("done", result),
+    ("profile", opts) -> profiler report, ("vars", (index_sym, blob, resume)) -> strategy_vars, ("warm", data) -> warm_book, ("reset", index_sym) -> book dropped."""
+    strategy_classes() # load while the engine is still starting, not on the first candle
+    while True:
+        msg = conn.recv()
+        if msg is None: return
+        kind, body = msg
+        try:
+            if kind == "evaluate": conn.send(("done", run_evaluation(body, emit=lambda sig: conn.send(("signal", sig)))))
+            elif kind == "vars": conn.send(strategy_vars(*body))
+            elif kind == "warm": conn.send(warm_book(engine.book(body['index_sym']), body))
+            elif kind == "reset": conn.send(engine.books.pop(body, None) is not None)
+            else: conn.send(profile_report(body))
+        except Exception as e:
+            logger.error(f"Strategy worker failed on {kind}: {e!r}")
+            err = {"signals": [], "strategies": [], "error": repr(e)}
+            conn.send(("done", err) if kind == "evaluate" else err)
+
+def profile_report(opts):
+    if opts.get('configure'):
+        c = opts['configure']
+        engine.profiler.configure(
+            enabled=c.get('enabled'), budget_ms=c.get('budget_ms'), strikes=c.get('strikes'),
+            sample_every=c.get('sample_every'), reset=c.get('reset', False)
+        )
+    return engine.profiler.report(with_profiles=opts.get('profiles', False))
+
+def strategy_vars(index_sym, blob=None, resume=False):
+    """Export (blob=None) or replace one index's strategy vars as base64 pickle; returns the exported blob."""
+    book = engine.book(index_sym)
+    if blob is None: return base64.b64encode(pickle.dumps(book.export_vars())).decode()
+    book.import_vars(pickle.loads(base64.b64decode(blob)), resume)
+
+def stored_bars(symbol, until):
+    """
+    (epoch minutes, hub candle dicts) of `symbol`'s 1m bars in ohlcv that closed by `until`: the
+    session so far plus WARM_START_BARS before it, so the first session bar has a full window.
+    """
+    from data.database import DatabaseManager
+    end = int(until) // 60
+    session_open = end - (end - SESSION_ANCHOR) % 1440
+    df = DatabaseManager(db_path=config.DB_PATH).get_ohlcv(symbol.replace("NSE:", ""), config.OHLCV_1M, start_ts=(session_open - 5 * 1440) * 60, end_ts=(end - 1) * 60)
+    if df.empty: return [], []
+    ts = df['timestamp'].to_numpy() // 60
+    df = df.iloc[max(0, int(np.searchsorted(ts, session_open)) - config.WARM_START_BARS):]
+    minutes, bars = [], []
+    for t, o, h, l, c, v in df[['timestamp', 'open', 'high', 'low', 'close', 'volume']].itertuples(index=False):
+        minutes.append(int(t) // 60)
+        bars.append({"time": minute_iso(int(t) // 60), "open": o, "high": h, "low": l, "close": c, "volume": v})
+    return minutes, bars
+
+def minute_of(iso):
+    return int(datetime.fromisoformat(iso).timestamp()) // 60
+
+def quietly(name, fn, *args):
+    # Warm-up runner for evaluate_timeframe: strategies update their vars, nothing is timed, profiled or reported
+    try: return fn(*args), 0
+    except Exception: return None, 0
+
+def warm_book(book, data):
+    """
+    Warm start of one index: the index/CE/PE 1m bars stored before `data` (a payload or POST /warm
+    body; `until` epoch s, else its candle_time) are loaded concurrently, rolled up to every
+    timeframe and the session's boundaries played through evaluate_timeframe without signalling,
+    so strategy vars are where they would be had the engine run since the open. The stored bars stay in book.backfill to lengthen short hub
+    histories, so strategies needing 51 bars signal from the first live candle after a restart.
+    """
+    syms = (data['index_sym'], data.get('ce_sym'), data.get('pe_sym'))
+    if book.warmed is not None or not config.WARM_START: return None
+    book.warmed = syms
+    t0 = time.perf_counter()
+    until = int(data.get('until') or data['candle_time'] - 19800)
+    names = [s for s in dict.fromkeys(syms) if s]
+    with ThreadPoolExecutor(len(names)) as pool: loaded = dict(zip(names, pool.map(lambda s: stored_bars(s, until), names)))
+    # Higher timeframes roll up exactly as the hub's do; a bucket still open at `until` is left out
+    series = {}
+    for sym, (minutes, bars) in loaded.items():
+        rollup = TimeframeRollup(config.CANDLE_TIMEFRAMES, keep=len(bars) + 1)
+        for minute, bar in zip(minutes, bars): rollup.on_close(bar, minute)
+        series[(1, sym)] = minutes, bars
+        for tf, hist in rollup.history.items():
+            hist = [b for b in hist if minute_of(b['time']) + tf <= until // 60]
+            series[(tf, sym)] = [minute_of(b['time']) for b in hist], hist
+    frames = {key: (np.asarray(m, dtype=np.int64), candles_frame(bars)) for key, (m, bars) in series.items()}
+    index_minutes = frames[(1, syms[0])][0]
+    session_open = until // 60 - (until // 60 - SESSION_ANCHOR) % 1440
+    # After a runtime restore only the bars since the snapshot are new to the strategies
+    replay = index_minutes[index_minutes >= max(session_open, book.through or 0)]
+    roles = {"index_data": syms[0], "ce_data": syms[1], "pe_data": syms[2]}
+    # The hub's session levels are as of now, not of the replayed minutes: strategies fall back to their bars there
+    pcr = {k: v for k, v in (data.get('pcr_insights') or {}).items() if k != 'session'}
+    empty = candles_frame([])
+    def window(tf, sym, boundary):
+        if (tf, sym) not in frames: return empty
+        minutes, df = frames[(tf, sym)]
+        k = int(np.searchsorted(minutes, boundary - tf, side="right"))
+        return df.iloc[max(0, k - config.WARM_START_BARS):k]
+    scratch = {"signals": [], "strategies": []}
+    ctx = {"index_sym": syms[0], "ce_sym": syms[1], "pe_sym": syms[2], "pcr_insights": pcr}
+    for minute in replay:
+        boundary = int(minute) + 1
+        for tf in [1] + [tf for tf in config.CANDLE_TIMEFRAMES if tf > 1 and (boundary - SESSION_ANCHOR) % tf == 0]:
+            bars = {role: window(tf, sym, boundary) for role, sym in roles.items()}
+            evaluate_timeframe(book, ctx, bars, tf, {}, scratch, run=quietly)
+        scratch["signals"].clear()
+        scratch["strategies"].clear()
+    book.backfill = {key: df for key, (_, df) in frames.items() if len(df)}
+    summary = {"bars": {sym: len(loaded[sym][0]) for sym in names}, "replayed": len(replay), "ms": round((time.perf_counter() - t0) * 1000, 1)}
+    logger.info(f"Warm start {syms[0]}: {summary}")
+    return summary
+
+async def warm(data):
+    """warm_book for one index in its worker, or on a thread in-process (it reads SQLite and replays bars)."""
+    if engine.workers: return await engine.workers.warm(data)
+    async with engine.warm_lock: return await asyncio.to_thread(warm_book, engine.book(data['index_sym']), data)
 
 engine = Engine()
+tracer = LatencyTracer("engine")
+
+metrics = MetricsRegistry("engine")
+m_loop_lag = metrics.gauge("event_loop_lag_ms", "Last measured event loop wake-up delay")
+m_loop_lag_hist = metrics.histogram("event_loop_lag_seconds", "Event loop wake-up delay")
+m_requests = metrics.counter("evaluate_requests_total", "/evaluate requests", rate=True)
+m_request_seconds = metrics.histogram("evaluate_seconds", "/evaluate duration")
+m_strat_seconds = metrics.histogram("strategy_seconds", "check_setup duration", label="strategy")
+m_strat_evals = metrics.counter("strategy_evaluations_total", "check_setup calls", label="strategy")
+m_strat_hits = metrics.counter("strategy_hits_total", "check_setup calls that returned a setup", label="strategy")
+m_signals = metrics.counter("signals_reported_total", "Signals posted to the hub", rate=True)
+m_signal_errors = metrics.counter("signal_report_errors_total", "Signals the hub did not accept after every retry")
+metrics.gauge_fn("signal_outbox_depth", "Signals waiting to reach the hub", lambda: len(outbox.queue))
+metrics.counter_fn("signal_retries_total", "Signal posts retried", lambda: outbox.retried)
+metrics.counter_fn("signal_dropped_total", "Signals dropped because the outbox was full", lambda: outbox.queue.dropped)
+metrics.gauge_fn("strategy_hit_ratio", "Share of check_setup calls returning a setup",
+                 lambda: {k: round(m_strat_hits.labels(k).value / c.value, 4) for k, c in list(m_strat_evals.children.items()) if c.value}, label="strategy")
+metrics.gauge_fn("process_rss_bytes", "Resident set size", process_rss_bytes)
+
+def record_strategy(name, us, hit):
+    tracer.observe("strategy:" + name, us)
+    m_strat_seconds.labels(name).observe(us)
+    m_strat_evals.labels(name).inc()
+    if hit: m_strat_hits.labels(name).inc()
+
+@app.on_event("startup")
+async def start_monitors():
+    asyncio.create_task(monitor_loop_lag(m_loop_lag, m_loop_lag_hist))
+    if config.ENGINE_WORKERS:
+        with startup.phase("spawn_workers"): engine.workers = StrategyWorkers(config.ENGINE_WORKERS)
+    outbox.start()
+    if config.RUNTIME_SNAPSHOTS:
+        with startup.phase("restore"): await restore_runtime()
+        asyncio.create_task(snapshot_loop())
+    startup.ready("Engine")
+    # In-process evaluation imports the strategies in the background; workers import their own
+    if not engine.workers: asyncio.get_running_loop().run_in_executor(None, strategy_classes)
+
+@app.on_event("shutdown")
+async def stop_workers():
+    if engine.snapshots:
+        await snapshot_runtime()
+        engine.snapshots.close()
+    if engine.workers: engine.workers.close()
+    await outbox.close()
+
+async def restore_runtime():
+    """
+    Every index's strategy vars as of the last snapshot. The engine's journal is the bars
+    themselves: the hub stores each closed bar in ohlcv, and warm_book replays the ones after
+    the snapshot's last boundary on the index's first payload.
+    """
+    engine.snapshots = SnapshotStore(os.path.join(config.SNAPSHOT_DIR, "engine"))
+    snap, _ = await asyncio.to_thread(engine.snapshots.load)
+    for index_sym, blob in (snap or {}).get("vars", {}).items():
+        if engine.workers: await engine.workers.vars(index_sym, blob, True)
+        else: strategy_vars(index_sym, blob, True)
+    if snap: logger.info(f"Restored strategy vars of {list(snap['vars'])}")
+
+async def snapshot_runtime():
+    indexes = list(engine.workers.routes) if engine.workers else list(engine.books)
+    if not indexes: return
+    try:
+        gen = engine.snapshots.rotate()
+        blobs = {sym: await engine.workers.vars(sym) if engine.workers else strategy_vars(sym) for sym in indexes}
+        await asyncio.to_thread(engine.snapshots.save, pickle.dumps({"vars": blobs}, protocol=pickle.HIGHEST_PROTOCOL), gen)
+    except Exception as e:
+        logger.warning(f"Runtime snapshot failed: {e!r}")
+
+async def snapshot_loop():
+    while True:
+        await asyncio.sleep(config.SNAPSHOT_SEC)
+        await snapshot_runtime()
+
+@app.get("/api/startup")
+async def get_startup():
+    """Cold start broken down by phase (the strategy import shows up once it has run)"""
+    return startup.report()
+
+@app.get("/metrics")
+async def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/profile")
+async def get_profile(profiles: bool = False):
+    """Per-strategy cost, deprioritized strategies and the slowest sampled cProfiles (per worker when sharded)"""
+    if engine.workers: return await engine.workers.profile({"profiles": profiles})
+    return profile_report({"profiles": profiles})
+
+@app.post("/profile")
+async def set_profile(request: Request):
+    """Body: {"enabled": bool, "budget_ms": float, "strikes": int, "sample_every": int, "reset": bool}"""
+    opts = {"configure": await request.json()}
+    if engine.workers: return await engine.workers.profile(opts)
+    return profile_report(opts)
+
+@app.get("/state")
+async def get_state(index_sym: str):
+    """Strategy vars of one index (base64 pickle), saved with the hub's replay checkpoints"""
+    blob = await engine.workers.vars(index_sym) if engine.workers else strategy_vars(index_sym)
+    return {"vars": blob}
+
+@app.put("/state")
+async def put_state(request: Request):
+    """Body: {"index_sym": ..., "vars": <GET /state blob>} restores them, e.g. on a replay seek"""
+    body = await request.json()
+    if engine.workers: await engine.workers.vars(body['index_sym'], body['vars'])
+    else: strategy_vars(body['index_sym'], body['vars'])
+    return {"status": "ok"}
+
+@app.delete("/state")
+async def reset_state(index_sym: str):
+    """Drops one index's strategy vars, e.g. when a replay starts over: its boundaries precede the book's `through`"""
+    if engine.workers: await engine.workers.reset(index_sym)
+    else: engine.books.pop(index_sym, None)
+    return {"status": "ok"}
+
+@app.post("/warm")
+async def post_warm(request: Request):
+    """Body: {"index_sym", "ce_sym", "pe_sym", "until": epoch s, "pcr_insights"}; the hub sends it when a live session starts,
+    so the first boundary does not wait for the warm start. A no-op for an index already warm."""
+    return {"status": "ok", "warm": await warm(await request.json())}
+
+@app.get("/api/latency")
+async def get_latency(reset: bool = False):
+    """Per-stage and per-strategy latency (p50/p99/max) as seen by the engine"""
+    snap = tracer.snapshot()
+    if reset: tracer.reset()
+    return snap
 
 @app.post("/evaluate")
 async def evaluate(request: Request):
+    recv_ns = now_ns()
+    m_requests.inc()
     data = await request.json()
+    trace = data.get('trace')
+    if trace:
+        tracer.record("dispatch_to_engine", trace.get('dispatch_ns'), recv_ns)
+        tracer.record("close_to_engine", trace.get('close_ns'), recv_ns)
 
-    idx_df = pd.DataFrame(data['index_data'])
-    ce_df = pd.DataFrame(data['ce_data'])
-    pe_df = pd.DataFrame(data['pe_data'])
+    # In-process, the first payload of an index warms it on a thread, and one arriving while a warm start (POST /warm)
+    # is still replaying waits it out instead of running the same strategies alongside; workers warm in run_evaluation
+    if not engine.workers and (engine.warm_lock.locked() or (config.WARM_START and engine.book(data['index_sym']).warmed is None)): await warm(data)
+    # Signals go out through the outbox as each strategy returns, not after the slowest one; the response never waits on the hub
+    def emit(signal):
+        setup, strat_name, symbol, is_pe = signal
+        report_signal(setup, strat_name, symbol, data['candle_time'], is_pe=is_pe, trace=trace)
+    # Strategies run in the index's worker when sharded; timings and signals come back to this loop
+    result = await engine.workers.evaluate(data, emit) if engine.workers else run_evaluation(data, emit)
+    for name, us, hit in result['strategies']: record_strategy(name, us, hit)
+
+    tracer.record("engine_evaluate", recv_ns)
+    m_request_seconds.observe((now_ns() - recv_ns) / 1000)
+    return {"status": "ok"}
+
+def run_evaluation(data, emit=None):
+    """
+    Every timeframe of one boundary payload against its index's StrategyBook.
+    Returns {"signals": [(setup, strat_name, symbol, is_pe)], "strategies": [(name, us, hit)]};
+    with `emit`, each signal goes to emit(signal) the moment its strategy returns instead.
+    """
+    out = {"signals": [], "strategies": []}
+    book = engine.book(data['index_sym'])
+    # A boundary the book has already evaluated (a re-post, or one overtaken by a later one) must not run its strategies again
+    through = (data['candle_time'] - 19800) // 60
+    if book.through is not None and through <= book.through: return dict(out, stale=True)
+    warm_book(book, data)
+    if 'shm' in data:
+        bars = shared_bars(data['shm'])
+        if bars is None: return dict(out, superseded=True)
+        data = dict(data, **bars)
+    book.through = through
+    # One request per minute boundary: the 1m bars plus every higher timeframe that closed with them
+    frames = [(1, data)] + sorted((int(tf), bars) for tf, bars in data.get('timeframes', {}).items())
+    # Every strike's 1m bars, when the hub sends them: option-side checks pick a strike across the chain
+    chain = chain_sides(data)
+    for timeframe, bars in frames:
+        evaluate_timeframe(book, data, bars, timeframe, chain if timeframe == 1 else {}, out, emit=emit)
+    return out
+
+def chain_sides(data):
+    """ChainSide of each side of the payload's chain. Picking by delta, a side where a strike that could be picked has no
+    delta yet (0: no greeks on its ticks) is left out, so the panel's ATM strike is traded instead of a ranking on zeros."""
+    sides = {}
+    for side, m in (data.get('chain') or {}).items():
+        if not len(m['symbols']): continue
+        chain = ChainSide(m)
+        unknown = chain.fresh & (chain.delta == 0)
+        if config.CHAIN_PICK == "delta" and unknown.any():
+            logger.warning(f"{data['index_sym']} {side}: no delta for {', '.join(chain.symbols[i] for i in np.flatnonzero(unknown))}; "
+                           f"using the ATM strike")
+            continue
+        sides[side] = chain
+    return sides
+
+def shared_bars(shm):
+    """The hub's shared-memory notification -> the same frames/chain matrices a JSON payload would carry."""
+    reader = engine.reader
+    # The hub already rewrote the bars for a later boundary, whose notification replaces this one in its queue
+    if any(reader.seq(name) > seq for name, seq in shm['panels'].values()): return None
+    names = []
+    def frames(segments):
+        names.extend(name for name, _ in segments.values())
+        return {k: table_frame(reader.read(name, seq)) for k, (name, seq) in segments.items()}
+    out = dict(frames(shm['panels']), timeframes={tf: frames(segs) for tf, segs in shm.get('timeframes', {}).items()})
+    if shm.get('chain'):
+        out['chain'] = {}
+        for side, m in shm['chain'].items():
+            names.extend(name for name, _ in m['segments'])
+            tables = np.stack([reader.read(name, seq) for name, seq in m['segments']]) if m['segments'] else np.empty((0, 7, 0))
+            out['chain'][side] = dict(m, **{f: tables[:, i] for i, f in enumerate(("open", "high", "low", "close", "volume"), 1)})
+    reader.retain(names)
+    return out
+
+def evaluate_timeframe(book, data, bars, timeframe, chain, out, run=None, emit=None):
+    """Strategies configured for `timeframe` against its bars; `data` carries the shared symbols/PCR.
+    `run(name, fn, *args) -> (result, us)` calls each strategy (default: the profiler);
+    `emit(signal)` takes each signal as it is found (default: appended to out['signals'])."""
+    run = run or engine.profiler.run
     pcr_insights = data['pcr_insights']
     index_sym = data['index_sym']
     ce_sym = data['ce_sym']
     pe_sym = data['pe_sym']
-    candle_time = data['candle_time']
+    idx_df = book.extend(timeframe, index_sym, as_frame(bars['index_data']))
+    ce_df = book.extend(timeframe, ce_sym, as_frame(bars['ce_data']))
+    pe_df = book.extend(timeframe, pe_sym, as_frame(bars['pe_data']))
+    signal, timings = emit or out['signals'].append, out['strategies']
+    tf_main = book.tf_main
 
     # 1. Update Trend
-    engine.tf_main.update_params(index_sym)
+    tf_main.update_params(index_sym)
 
     # 2. Evaluate Trend Following
     for side, df, sym in [("CE", ce_df, ce_sym), ("PE", pe_df, pe_sym)]:
+        if tf_main.timeframe != timeframe: continue
+        if side in chain:
+            res, us = run("TREND_FOLLOWING", trend_following_chain, tf_main, idx_df, chain[side], pcr_insights, side)
+            setup, sym = res or (None, None)
+            timings.append(("TREND_FOLLOWING", us, setup is not None))
+            if setup: signal((setup, "TREND_FOLLOWING", sym, side == "PE"))
+            continue
         if df.empty: continue
-        setup = engine.tf_main.check_setup_unified(idx_df, df, pcr_insights, side)
+        setup, us = run("TREND_FOLLOWING", tf_main.check_setup_unified, idx_df, df, pcr_insights, side)
+        timings.append(("TREND_FOLLOWING", us, setup is not None))
         if setup and check_option_ema_filter(df):
-            await report_signal(setup, "TREND_FOLLOWING", sym, candle_time, is_pe=(side=="PE"))
+            signal((setup, "TREND_FOLLOWING", sym, side == "PE"))
 
     # 3. Evaluate Other Strategies (Simplified version of evaluate_all_strategies)
     is_bn = "BANK" in index_sym.upper()
@@ -56,12 +537,23 @@ async def evaluate(request: Request):
     tgt_pts = 60 if is_bn else 40
 
     if not idx_df.empty and len(idx_df) >= 20:
-        for strat in engine.strategies["INDEX"]:
-            if strat.name == "TREND_FOLLOWING": continue
+        # Strategies that keep blowing their budget run after the fast ones
+        for strat in engine.profiler.order(book.strategies("INDEX")):
+            if strat.name == "TREND_FOLLOWING" or strat.timeframe != timeframe: continue
             if strat.is_index_driven:
-                setup = strat.check_setup(idx_df, pcr_insights)
+                setup, us = run(strat.name, strat.check_setup, idx_df, pcr_insights)
+                timings.append((strat.name, us, setup is not None))
                 if setup:
                     is_pe = ("SHORT" in setup.get('type', '').upper()) or ("PE" in setup.get('type', '').upper())
+                    side = chain.get("PE" if is_pe else "CE")
+                    if side is not None:
+                        row = side.best(side.ema_filter(), config.CHAIN_PICK, config.CHAIN_TARGET_DELTA)
+                        if row is None: continue
+                        setup['entry_price'] = float(side.last['close'][row])
+                        setup['sl'] = setup['entry_price'] - sl_pts
+                        setup['target'] = setup['entry_price'] + tgt_pts
+                        signal((setup, strat.name, side.symbols[row], is_pe))
+                        continue
                     target_df = pe_df if is_pe else ce_df
                     target_sym = pe_sym if is_pe else ce_sym
 
@@ -69,11 +561,33 @@ async def evaluate(request: Request):
                         setup['entry_price'] = target_df['close'].iloc[-1]
                         setup['sl'] = setup['entry_price'] - sl_pts
                         setup['target'] = setup['entry_price'] + tgt_pts
-                        await report_signal(setup, strat.name, target_sym, candle_time, is_pe=is_pe)
+                        signal((setup, strat.name, target_sym, is_pe))
 
-    return {"status": "ok"}
+def trend_following_chain(tf, idx_df, chain, pcr_insights, side):
+    """check_setup_unified + the option EMA filter on every strike of one side; (setup, symbol) of the best, or (None, None)."""
+    trend = tf.get_trend(idx_df, pcr_insights)
+    if trend != ("BULLISH" if side == "CE" else "BEARISH"): return None, None
+    lo, hi = tf.target_range
+    pad_lo, pad_hi = tf.params['range_pad']
+    row = chain.best(chain.pullback(lo - pad_lo, hi + pad_hi, tf.params['body_ratio']) & chain.ema_filter(),
+                     config.CHAIN_PICK, config.CHAIN_TARGET_DELTA)
+    if row is None: return None, None
+    return {"type": f"{side}_ENTRY", "entry_price": float(chain.last['high'][row]) + 1, "sl": float(chain.last['low'][row]),
+            "reason": f"Trend Following {trend} pullback on {side} {chain.symbols[row]}."}, chain.symbols[row]
+
+def as_frame(bars):
+    import pandas as pd
+    return bars if isinstance(bars, pd.DataFrame) else candles_frame(bars)
 
-async def report_signal(setup, strat_name, symbol, candle_time, is_pe=False):
+def candles_frame(rows):
+    """Hub candle dicts -> OHLCV frame on an IST DatetimeIndex (strategies use index.date/.hour)."""
+    import pandas as pd
+    df = pd.DataFrame(rows)
+    if df.empty or 'time' not in df: return df
+    df.index = pd.DatetimeIndex(pd.to_datetime(df.pop('time'), utc=True)).tz_convert('Asia/Kolkata').tz_localize(None)
+    return df
+
+def report_signal(setup, strat_name, symbol, candle_time, is_pe=False, trace=None):
     payload = {
         "strat_name": strat_name,
         "symbol": symbol,
@@ -85,14 +599,32 @@ async def report_signal(setup, strat_name, symbol, candle_time, is_pe=False):
         "is_pe": is_pe,
         "type": "BUY" # We always buy options
     }
-    try:
-        async with httpx.AsyncClient() as client:
-            await client.post(ACQUISITION_URL, json=payload, timeout=2.0)
-    except Exception as e:
-        logger.error(f"Failed to report signal: {e}")
+    # Optional exit legs a strategy may set; the hub falls back to its config otherwise
+    for k in ('tp1', 'trail'):
+        if setup.get(k) is not None: payload[k] = setup[k]
+    if trace:
+        payload['trace'] = dict(trace, report_ns=now_ns())
+        tracer.record("close_to_report", trace.get('close_ns'), payload['trace']['report_ns'])
+    outbox.queue.put(payload)
+    outbox.start()
+
+def on_signal_done(payload, ok, seconds):
+    if ok: m_signals.inc()
+    else:
+        m_signal_errors.inc()
+        logger.error(f"Failed to report signal {payload['strat_name']} {payload['symbol']}")
+
+# Signals reach the hub in order over one keep-alive client, each retried with backoff
+outbox = Poster(ACQUISITION_URL, FifoQueue(config.SIGNAL_OUTBOX_SIZE), timeout=2.0, retries=config.SIGNAL_RETRIES, on_done=on_signal_done)
 
 def check_option_ema_filter(df):
+    t0 = now_ns()
+    try: return _option_ema_filter(df)
+    finally: tracer.record("option_ema_filter", t0)
+
+def _option_ema_filter(df):
     if df is None or len(df) < 15: return False
+    import pandas as pd, pandas_ta as ta
     try:
         ema9 = ta.ema(df['close'], length=9)
         ema14 = ta.ema(df['close'], length=14)
@@ -106,5 +638,7 @@ def check_option_ema_filter(df):
         return above_ema and ema_condition
     except: return False
 
+startup.mark("app")
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8002)
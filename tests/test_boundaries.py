@@ -0,0 +1,40 @@
+import data_acquisition as hub
+import engine
+from core.state_manager import MarketState, ROLE_INDEX, ROLE_CE
+from data.processing.timeframes import minute_iso
+
+BOUNDARY = 1792390260 // 60 # 09:42 IST
+
+def bar(minute):
+    return {"time": minute_iso(minute), "open": 100.0, "high": 101.0, "low": 99.0, "close": 100.5, "volume": 10}
+
+def finalize(monkeypatch, histories):
+    sent = []
+    ms = MarketState()
+    for role, history in histories.items(): ms.panels[role]['history'].extend(history)
+    monkeypatch.setattr(hub.state, "market_state", ms)
+    monkeypatch.setattr(hub.state, "is_live", False)
+    monkeypatch.setattr(hub, "trigger_engine", lambda close_ts, histories, tfs, trace: sent.append((close_ts, histories)))
+    hub.finalize_boundary(BOUNDARY)
+    return sent
+
+def test_boundary_with_a_closed_bar_is_dispatched(monkeypatch):
+    sent = finalize(monkeypatch, {ROLE_INDEX: [bar(BOUNDARY - 2), bar(BOUNDARY - 1)], ROLE_CE: [bar(BOUNDARY - 3)]})
+    assert [close_ts for close_ts, _ in sent] == [BOUNDARY * 60]
+
+def test_boundary_without_a_new_bar_is_skipped(monkeypatch):
+    # Nothing printed in 09:41: the histories end at bars the engine was already sent
+    assert finalize(monkeypatch, {ROLE_INDEX: [bar(BOUNDARY - 3), bar(BOUNDARY - 2)], ROLE_CE: [bar(BOUNDARY - 2)]}) == []
+
+def test_engine_ignores_boundaries_it_has_evaluated():
+    book = engine.engine.book("NSE:STALE_TEST")
+    book.warmed = ()
+    data = {"index_sym": "NSE:STALE_TEST", "ce_sym": "NSE:CE", "pe_sym": "NSE:PE", "pcr_insights": {},
+            "candle_time": BOUNDARY * 60 + 19800, "index_data": [], "ce_data": [], "pe_data": []}
+    assert "stale" not in engine.run_evaluation(data)
+    assert book.through == BOUNDARY
+    assert engine.run_evaluation(data) == {"signals": [], "strategies": [], "stale": True}
+    assert engine.run_evaluation(dict(data, candle_time=data["candle_time"] - 60))["stale"]
+    assert book.through == BOUNDARY
+    assert "stale" not in engine.run_evaluation(dict(data, candle_time=data["candle_time"] + 60))
+    assert book.through == BOUNDARY + 1
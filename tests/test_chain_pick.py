@@ -0,0 +1,48 @@
+import logging
+
+import pytest
+
+import config
+import engine
+
+CE = ["NSE:NIFTY26OCT24900CE", "NSE:NIFTY26OCT25000CE", "NSE:NIFTY26OCT25100CE"]
+ATM_CE = CE[1]
+
+class LongSetup:
+    name, timeframe, is_index_driven, vars = "LONG_SETUP", 1, True, {}
+    def check_setup(self, idx_df, pcr_insights): return {"type": "LONG"}
+
+def bars(n=25, close=100.0):
+    return [{"time": f"2026-10-19T09:{15 + i:02d}:00+05:30", "open": close, "high": close + 1, "low": close - 1, "close": close, "volume": 10}
+            for i in range(n)]
+
+def chain_side(delta, n=20):
+    # Every strike rising bar after bar, so all pass the EMA filter and all traded in the last minute
+    rows = [[100.0 + 10 * k + i for i in range(n)] for k in range(len(CE))]
+    return {"symbols": CE, "strikes": [24900, 25000, 25100], "delta": delta, "open": [[c - 0.5 for c in r] for r in rows],
+            "high": [[c + 1 for c in r] for r in rows], "low": [[c - 1 for c in r] for r in rows], "close": rows,
+            "volume": [[10] * n for _ in rows]}
+
+@pytest.fixture
+def evaluate(monkeypatch):
+    monkeypatch.setattr(config, "CHAIN_PICK", "delta")
+    monkeypatch.setattr(config, "CHAIN_TARGET_DELTA", 0.3)
+    monkeypatch.setattr(engine, "check_option_ema_filter", lambda df: True)
+    def run(delta):
+        book = engine.engine.book("NSE:PICK_TEST")
+        book.warmed, book.through = (), None
+        book.tf_main.timeframe = 0
+        book.sets[("INDEX", "NSE:PICK_TEST")] = [LongSetup()]
+        data = {"index_sym": "NSE:PICK_TEST", "ce_sym": ATM_CE, "pe_sym": "NSE:NIFTY26OCT25000PE", "candle_time": 1792390260 + 19800,
+                "pcr_insights": {}, "index_data": bars(), "ce_data": bars(close=120.0), "pe_data": bars(),
+                "chain": {"CE": chain_side(delta)}}
+        return [(symbol, setup['entry_price']) for setup, _, symbol, _ in engine.run_evaluation(data)["signals"]]
+    return run
+
+def test_delta_pick_ranks_known_deltas(evaluate):
+    assert evaluate([0.62, 0.5, 0.31]) == [(CE[2], 139.0)]
+
+def test_unknown_delta_falls_back_to_atm(evaluate, caplog):
+    with caplog.at_level(logging.WARNING, logger="engine"):
+        assert evaluate([0.62, 0, 0]) == [(ATM_CE, 120.0)]
+    assert f"no delta for {CE[1]}, {CE[2]}; using the ATM strike" in caplog.text
@@ -0,0 +1,41 @@
+import asyncio
+
+from core.dispatch import LatestQueue
+from data_acquisition import carry_timeframes
+
+def payload(minute, timeframes=None):
+    bars = [{"time": f"09:{minute:02d}"}]
+    out = {"index_sym": "NSE:NIFTY", "candle_time": minute, "index_data": bars, "ce_data": bars, "pe_data": bars}
+    if timeframes: out["timeframes"] = {tf: {"index_data": [{"time": f"{tf}m@09:{minute:02d}"}]} for tf in timeframes}
+    return out
+
+def shm_payload(minute, timeframes=()):
+    return {"index_sym": "NSE:NIFTY", "candle_time": minute,
+            "shm": {"panels": {"index_data": ["p1", minute]}, "timeframes": {tf: {"index_data": [f"p{tf}", minute]} for tf in timeframes}}}
+
+def coalesce(*items):
+    queue = LatestQueue(8, merge=carry_timeframes)
+    for item in items: queue.put(item["index_sym"], item)
+    assert len(queue) == 1 and queue.coalesced == len(items) - 1
+    return asyncio.run(queue.get())
+
+def test_coalesced_boundary_keeps_closed_higher_timeframe():
+    got = coalesce(payload(30, timeframes=(5, 15)), payload(31))
+    assert got["candle_time"] == 31 and got["index_data"] == [{"time": "09:31"}]
+    assert got["timeframes"] == {5: {"index_data": [{"time": "5m@09:30"}]}, 15: {"index_data": [{"time": "15m@09:30"}]}}
+
+def test_newer_close_of_a_timeframe_wins():
+    got = coalesce(payload(30, timeframes=(5, 15)), payload(31), payload(35, timeframes=(5,)))
+    assert got["candle_time"] == 35
+    assert got["timeframes"] == {5: {"index_data": [{"time": "5m@09:35"}]}, 15: {"index_data": [{"time": "15m@09:30"}]}}
+
+def test_shared_memory_payloads_carry_segments():
+    got = coalesce(shm_payload(30, timeframes=(5,)), shm_payload(31))
+    assert got["shm"]["panels"] == {"index_data": ["p1", 31]}
+    assert got["shm"]["timeframes"] == {5: {"index_data": ["p5", 30]}}
+
+def test_without_merge_latest_wins():
+    queue = LatestQueue(8)
+    queue.put("NSE:NIFTY", payload(30, timeframes=(5,)))
+    queue.put("NSE:NIFTY", payload(31))
+    assert "timeframes" not in asyncio.run(queue.get())
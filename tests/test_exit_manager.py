@@ -0,0 +1,30 @@
+from core.exit_manager import ExitManager
+from core.trade_manager import Trade
+
+SYM = "NSE:NIFTY26OCT25000CE"
+
+def trailing_trade():
+    return Trade(SYM, 100.0, 1792390200, "LONG", "TEST", sl=90.0, trail=10.0)
+
+def test_trail_raises_on_new_highs():
+    exits = ExitManager()
+    t = trailing_trade()
+    exits.add(t)
+    assert exits.on_tick(SYM, 120.0, 1792390260) == []
+    assert (t.peak, t.sl) == (120.0, 110.0) and exits.raised == [t]
+    [(trade, price, reason, fraction)] = exits.on_tick(SYM, 109.0, 1792390320)
+    assert (trade, price, reason, fraction) == (t, 109.0, "TRAIL", 1.0)
+
+def test_restored_trail_keeps_its_peak():
+    # Restart: the trade comes back at its entry levels, then the journal replays a raise to peak 130
+    exits = ExitManager()
+    t = trailing_trade()
+    exits.add(t)
+    exits.apply_trail(t, 130.0, 120.0)
+    # A high above the trade's entry but below the restored peak must not pull the peak (or the stop) back
+    assert exits.on_tick(SYM, 125.0, 1792390260) == []
+    assert (t.peak, t.sl) == (130.0, 120.0) and exits.raised == []
+    assert exits.on_tick(SYM, 135.0, 1792390320) == []
+    assert (t.peak, t.sl) == (135.0, 125.0)
+    [(_, price, reason, _)] = exits.on_tick(SYM, 124.0, 1792390380)
+    assert (price, reason) == (124.0, "TRAIL")
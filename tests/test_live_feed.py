@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+import data_acquisition as hub
+from core.state_manager import InstrumentState, MarketState, ROLE_CE
+from data.processing.bar_clock import BarClock
+from data.gathering.upstox_feed import UpstoxLiveFeed
+
+KEY, SYM = "NSE_FO|43210", "NSE:NIFTY26OCT25000CE"
+
+def live_message(ltp=101.5, vtt=125000, ltt=1792390260000, bid=101.45, ask=101.5):
+    """A decoded MarketDataStreamerV3 full-mode message (int64 fields arrive as strings)."""
+    return {"type": "live_feed", "currentTs": str(ltt + 40), "feeds": {KEY: {"fullFeed": {"marketFF": {
+        "ltpc": {"ltp": ltp, "ltt": str(ltt), "ltq": "75", "cp": 98.0},
+        "marketLevel": {"bidAskQuote": [{"bidQ": "150", "bidP": bid, "askQ": "75", "askP": ask},
+                                        {"bidQ": "300", "bidP": bid - 0.05, "askQ": "225", "askP": ask + 0.05}]},
+        "optionGreeks": {"delta": 0.52, "theta": -11.2, "gamma": 0.0011, "vega": 8.1, "rho": 0.2},
+        "marketOHLC": {"ohlc": [{"interval": "I1", "open": 101.0, "high": 101.6, "low": 100.9, "close": ltp, "vol": "750"}]},
+        "atp": 100.8, "vtt": str(vtt), "oi": 2500000.0, "iv": 0.1432, "tbq": 60000.0, "tsq": 45000.0}}}}}
+
+def live_docs(monkeypatch, *messages):
+    """`messages` through UpstoxLiveFeed.on_message and process_tick_live -> the docs handed to process_tick."""
+    updates, docs = [], []
+    feed = UpstoxLiveFeed("token", updates.append)
+    feed.key_to_symbol[KEY] = SYM
+    async def capture(doc): docs.append(doc)
+    monkeypatch.setattr(hub, "process_tick", capture)
+    for msg in messages: feed.on_message(msg)
+    async def main():
+        for update in updates: await hub.process_tick_live(update)
+    asyncio.run(main())
+    return docs
+
+def test_live_tick_carries_book_atp_and_greeks(monkeypatch):
+    [doc] = live_docs(monkeypatch, live_message())
+    assert doc["instrumentKey"] == KEY
+    ff = doc["fullFeed"]["marketFF"]
+    assert ff["atp"] == 100.8 and ff["tbq"] == 60000.0 and ff["tsq"] == 45000.0 and ff["ltpc"]["ltq"] == "75"
+    assert ff["marketLevel"]["bidAskQuote"][0]["bidP"] == 101.45
+    assert ff["optionGreeks"]["delta"] == 0.52
+
+    rec = InstrumentState(KEY, SYM, ROLE_CE)
+    rec.update(ff, ff["ltpc"]["ltp"])
+    assert (rec.best_bid, rec.best_ask, rec.atp, rec.ltq, rec.tbq, rec.tsq) == (101.45, 101.5, 100.8, 75, 60000, 45000)
+    assert rec.imbalance == (150 - 75) / (150 + 75)
+    assert rec.delta == 0.52 and rec.vtt == 125000
+
+def test_index_tick_without_depth(monkeypatch):
+    msg = {"type": "live_feed", "feeds": {KEY: {"fullFeed": {"indexFF": {"ltpc": {"ltp": 25010.5, "ltt": "1792390260000", "cp": 24950.0}}}}}}
+    [doc] = live_docs(monkeypatch, msg)
+    ff = doc["fullFeed"]["marketFF"]
+    assert "marketLevel" not in ff and "optionGreeks" not in ff
+    rec = InstrumentState(KEY, "NSE:NIFTY", 0)
+    rec.update(ff, ff["ltpc"]["ltp"])
+    assert rec.ltp == 25010.5 and rec.best_bid == 0 and rec.oi == 0
+
+def test_live_ticks_feed_session_analytics(monkeypatch):
+    """The aggressor comes from the live quote (the tick rule would say the opposite) and the seed volume sits at atp."""
+    ms = MarketState()
+    monkeypatch.setattr(hub.state, "market_state", ms)
+    monkeypatch.setattr(hub.state, "clock", BarClock(hub.config.BAR_CLOSE_GRACE_SEC))
+    monkeypatch.setattr(hub.state, "is_live", False)
+    rec = ms.register(KEY, SYM, ROLE_CE)
+    updates = []
+    feed = UpstoxLiveFeed("token", updates.append)
+    feed.key_to_symbol[KEY] = SYM
+    feed.on_message(live_message(101.5, 125000, 1792390260000)) # first tick: 125000 traded before it at atp 100.8
+    feed.on_message(live_message(101.45, 125750, 1792390261000, bid=101.4, ask=101.45)) # down-tick lifting the ask
+    feed.on_message(live_message(101.5, 126000, 1792390262000, bid=101.5, ask=101.55)) # up-tick hitting the bid
+    async def main():
+        for update in updates: await hub.process_tick_live(update)
+    asyncio.run(main())
+    minute = 1792390260 // 60
+    levels = hub.session_levels(minute)["ce"]
+    assert levels["delta"] == 750 - 250
+    assert levels["volume"] == 126000
+    assert levels["vwap"] == round((125000 * 100.8 + 750 * 101.45 + 250 * 101.5) / 126000, 2)
+    assert levels["book_imbalance"] == pytest.approx((60000 - 45000) / (60000 + 45000), abs=1e-4)
+    assert rec.session is ms.analytics[KEY]
@@ -0,0 +1,68 @@
+import asyncio
+import multiprocessing as mp
+import threading
+import time
+
+import pytest
+
+import engine
+
+SLOW = 0.5
+
+class FakeStrategy:
+    is_index_driven, timeframe = True, 1
+    def __init__(self, name, delay):
+        self.name, self.delay, self.vars = name, delay, {}
+    def check_setup(self, idx_df, pcr_insights):
+        time.sleep(self.delay)
+        return {"type": "LONG"}
+
+def bars(n=25):
+    return [{"time": f"2026-10-19T09:{15 + i:02d}:00+05:30", "open": 100.0, "high": 101.0, "low": 99.0, "close": 100.0, "volume": 10}
+            for i in range(n)]
+
+def payload(index_sym):
+    return {"index_sym": index_sym, "ce_sym": "NSE:TESTCE", "pe_sym": "NSE:TESTPE", "candle_time": 1792390200 + 19800,
+            "pcr_insights": {}, "index_data": bars(), "ce_data": bars(), "pe_data": bars()}
+
+@pytest.fixture
+def fast_and_slow(monkeypatch):
+    def setup(index_sym):
+        book = engine.engine.book(index_sym)
+        book.warmed, book.through = (), None # no stored-bar warm start
+        book.tf_main.timeframe = 0 # keep trend following out of it
+        book.sets[("INDEX", index_sym)] = [FakeStrategy("FAST", 0), FakeStrategy("SLOW", SLOW)]
+        return payload(index_sym)
+    monkeypatch.setattr(engine, "check_option_ema_filter", lambda df: True)
+    return setup
+
+def test_in_process_signal_precedes_slow_strategy(fast_and_slow):
+    data = fast_and_slow("NSE:STREAM_INPROC")
+    seen = []
+    t0 = time.perf_counter()
+    out = engine.run_evaluation(data, emit=lambda sig: seen.append((sig[1], time.perf_counter() - t0)))
+    done = time.perf_counter() - t0
+    assert [name for name, _ in seen] == ["FAST", "SLOW"]
+    assert out["signals"] == []
+    assert done - seen[0][1] >= SLOW * 0.8
+
+def test_worker_streams_signals_before_result(fast_and_slow):
+    data = fast_and_slow("NSE:STREAM_WORKER")
+    conn, child = mp.Pipe()
+    worker = threading.Thread(target=engine.worker_main, args=(child,), daemon=True) # same protocol, shares the patched book
+    worker.start()
+    async def main():
+        workers = engine.StrategyWorkers.__new__(engine.StrategyWorkers)
+        workers.shards, workers.routes = [(conn, None, asyncio.Lock())], {}
+        seen = []
+        t0 = time.perf_counter()
+        result = await workers.evaluate(data, lambda sig: seen.append((sig[1], time.perf_counter() - t0)))
+        return seen, time.perf_counter() - t0, result
+    try:
+        seen, done, result = asyncio.run(main())
+    finally:
+        conn.send(None)
+        worker.join(timeout=5)
+    assert [name for name, _ in seen] == ["FAST", "SLOW"]
+    assert [name for name, _, _ in result["strategies"]] == ["FAST", "SLOW"]
+    assert done - seen[0][1] >= SLOW * 0.8